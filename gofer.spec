@@ -146,6 +146,7 @@ Provides gofer python lib modules.
 %dir %{python_sitelib}/%{name}/messaging/adapter
 %{python_sitelib}/%{name}/messaging/*.py*
 %{python_sitelib}/%{name}/messaging/adapter/*.py*
+%{python_sitelib}/%{name}/messaging/adapter/loopback/
 %{python_sitelib}/%{name}/devel/
 %doc LICENSE
 
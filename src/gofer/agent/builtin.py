@@ -131,6 +131,18 @@ class Builtin(object):
     def authenticator(self):
         return self.plugin.authenticator
 
+    @property
+    def codec(self):
+        return self.plugin.codec
+
+    @property
+    def compression(self):
+        return self.plugin.compression
+
+    @property
+    def signing(self):
+        return self.plugin.signing
+
     def provides(self, name):
         """
         Get whether the plugin provides the name.
@@ -33,6 +33,10 @@ from gofer.config import REQUIRED, OPTIONAL, ANY, BOOL, NUMBER
 # [pam]
 #   service
 #      The default PAM service for authentication.  Default:passwd
+#   cache_ttl
+#      The time (seconds) successful authentications are cached.  Default:0 (disabled)
+#   cache_size
+#      The max number of cached authentications.  Default:100
 #
 
 AGENT_SCHEMA = (
@@ -49,6 +53,8 @@ AGENT_SCHEMA = (
     ('pam', REQUIRED,
         (
             ('service', OPTIONAL, ANY),
+            ('cache_ttl', OPTIONAL, NUMBER),
+            ('cache_size', OPTIONAL, NUMBER),
         )
     ),
 )
@@ -75,14 +81,34 @@ AGENT_SCHEMA = (
 #      The (optional) agent identity. This value also specifies the queue name.
 #   url
 #      The (optional) broker connection URL.
+#   failover
+#      The (optional) alternate broker URLs.  A comma (,) separated list of URLs tried (in order)
+#      when the broker named by url is not available.
 #   cacert
 #      The (optional) SSL CA certificate used to validate the server certificate.
 #   clientcert
 #      The (optional) SSL client certificate.  PEM encoded and contains both key and certificate.
 #   host_validation
 #      The (optional) flag indicates SSL host validation should be performed.
+#   heartbeat
+#      The (optional) connection heartbeat (seconds) used to detect dead connections.
+#      Default: adapter specific.  0 disables heartbeats.
 #   authenticator
 #      The (optional) fully qualified Authenticator to be loaded from the PYTHON path.
+#   codec
+#      The (optional) codec used to encode sent documents (json|compact|msgpack).  Default: json.
+#      Received documents are decoded using the detected codec.
+#   compression
+#      The (optional) size (bytes) above which sent documents are (zlib) compressed.
+#      Default: 0 (disabled).  Received documents are decompressed as needed.
+#   signing
+#      The (optional) message signing mode (nested|detached).  Default: nested.
+#      Detached signatures are sent in the message properties and the document is
+#      sent unchanged.  Received documents are validated using either mode.
+#   auth_threads
+#      The (optional) number of threads used to authenticate and validate received
+#      documents.  Documents are dispatched in the order received.  Default: 0 (authenticated
+#      by the consumer thread).
 #
 # [model]
 #
@@ -112,12 +138,18 @@ PLUGIN_SCHEMA = (
     ('messaging', REQUIRED,
         (
             ('url', OPTIONAL, ANY),
+            ('failover', OPTIONAL, ANY),
             ('uuid', OPTIONAL, ANY),
             ('cacert', OPTIONAL, ANY),
             ('clientcert', OPTIONAL, ANY),
             ('clientkey', OPTIONAL, ANY),
             ('host_validation', OPTIONAL, BOOL),
+            ('heartbeat', OPTIONAL, NUMBER),
             ('authenticator', OPTIONAL, ANY),
+            ('codec', OPTIONAL, '(json|compact|msgpack)'),
+            ('compression', OPTIONAL, NUMBER),
+            ('signing', OPTIONAL, '(nested|detached)'),
+            ('auth_threads', OPTIONAL, NUMBER),
         )
     ),
     ('model', OPTIONAL,
@@ -139,7 +171,9 @@ AGENT_DEFAULTS = {
     'logging': {
     },
     'pam': {
-        'service': 'passwd'
+        'service': 'passwd',
+        'cache_ttl': '0',
+        'cache_size': '100',
     }
 }
 
@@ -69,6 +69,8 @@ class Agent:
     def __init__(self):
         cfg = AgentConfig()
         pam.SERVICE = cfg.pam.service
+        pam.cache.ttl = int(cfg.pam.cache_ttl)
+        pam.cache.size = int(cfg.pam.cache_size)
 
     def start(self, block=True):
         """
@@ -33,7 +33,7 @@ from gofer.agent.whiteboard import Whiteboard
 from gofer.common import nvl, mkdir
 from gofer.common import released
 from gofer.config import Config, Graph, Reader, get_bool
-from gofer.messaging import Document, Connector, Node, Queue, Exchange
+from gofer.messaging import Connector, Node, Queue, Exchange
 from gofer.messaging import NotFound
 from gofer.rmi.consumer import RequestConsumer
 from gofer.rmi.decorator import Remote
@@ -56,6 +56,12 @@ def attach(fn):
 class Container(object):
     """
     Plugin container.
+    :ivar plugins: Plugins by name and path.
+    :type plugins: dict
+    :ivar routes: The routing table used to forward requests for classes
+        not provided by the plugin.  Dispatchers keyed by plugin then
+        by class name.
+    :type routes: dict
     """
 
     __metaclass__ = Singleton
@@ -63,6 +69,7 @@ class Container(object):
     def __init__(self):
         self.__mutex = RLock()
         self.plugins = {}
+        self.routes = {}
 
     @synchronized
     def add(self, plugin, *names):
@@ -117,6 +124,57 @@ class Container(object):
             unique.append(p)
         return unique
 
+    @synchronized
+    def build(self):
+        """
+        Build the routing table.
+        Classes not provided by a plugin are routed to another plugin
+        that provides the class.  The source plugin must forward to
+        and the target plugin must accept from the other plugin.
+        The table is replaced (atomically) when built.
+        """
+        routes = {}
+        plugins = self.all()
+        for plugin in plugins:
+            table = {}
+            forward = plugin.forward
+            for target in plugins:
+                if target == plugin:
+                    continue
+                valid = set()
+                valid.add('*')
+                valid.add(target.name)
+                if not valid.intersection(forward):
+                    # (forwarding) not approved
+                    continue
+                valid = set()
+                valid.add('*')
+                valid.add(plugin.name)
+                if not valid.intersection(target.accept):
+                    # (accept) not approved
+                    continue
+                for name in target.dispatcher.catalog:
+                    if plugin.provides(name):
+                        continue
+                    table.setdefault(name, target.dispatcher)
+            routes[plugin] = table
+        self.routes = routes
+
+    def route(self, plugin, name):
+        """
+        Get the dispatcher to which a request is routed.
+        :param plugin: The plugin that received the request.
+        :type plugin: Plugin
+        :param name: A class name.
+        :type name: str
+        :return: The dispatcher or None when not routed.
+        :rtype: gofer.rmi.dispatcher.Dispatcher
+        """
+        try:
+            return self.routes[plugin][name]
+        except KeyError:
+            return None
+
     @synchronized
     def load(self, path):
         """
@@ -207,6 +265,7 @@ class Plugin(object):
         :type plugin: Plugin
         """
         Plugin.container.delete(plugin)
+        Plugin.container.build()
         if not plugin.impl:
             # not loaded
             return
@@ -269,6 +328,22 @@ class Plugin(object):
     def url(self):
         return self.cfg.messaging.url
 
+    @property
+    def codec(self):
+        return self.cfg.messaging.codec
+
+    @property
+    def compression(self):
+        return int(nvl(self.cfg.messaging.compression, 0))
+
+    @property
+    def signing(self):
+        return self.cfg.messaging.signing
+
+    @property
+    def auth_threads(self):
+        return int(nvl(self.cfg.messaging.auth_threads, 0))
+
     @property
     def enabled(self):
         return get_bool(self.cfg.main.enabled)
@@ -343,6 +418,10 @@ class Plugin(object):
         connector.ssl.client_key = messaging.clientkey
         connector.ssl.client_certificate = messaging.clientcert
         connector.ssl.host_validation = messaging.host_validation
+        if messaging.heartbeat:
+            connector.heartbeat = int(messaging.heartbeat)
+        if messaging.failover:
+            connector.failover = [u.strip() for u in messaging.failover.split(',') if u.strip()]
         connector.add()
 
     @attach
@@ -358,6 +437,7 @@ class Plugin(object):
         node = Node(model.queue)
         consumer = RequestConsumer(node, self)
         consumer.authenticator = self.authenticator
+        consumer.auth_threads = self.auth_threads
         consumer.start()
         self.consumer = consumer
         log.info('plugin:%s, attached => %s', self.name, self.node)
@@ -397,29 +477,10 @@ class Plugin(object):
         :type request: gofer.Document
         :return: The RMI returned.
         """
-        dispatcher = self.dispatcher
-        call = Document(request.request)
-        if not self.provides(call.classname):
-            for plugin in Plugin.all():
-                if plugin == self:
-                    continue
-                if not plugin.provides(call.classname):
-                    # not provided
-                    continue
-                valid = set()
-                valid.add('*')
-                valid.add(plugin.name)
-                if not valid.intersection(self.forward):
-                    # (forwarding) not approved
-                    continue
-                valid = set()
-                valid.add('*')
-                valid.add(self.name)
-                if not valid.intersection(plugin.accept):
-                    # (accept) not approved
-                    continue
-                dispatcher = plugin.dispatcher
-                break
+        classname = Dispatcher.classname(request)
+        dispatcher = Plugin.container.route(self, classname)
+        if dispatcher is None:
+            dispatcher = self.dispatcher
         return dispatcher.dispatch(request)
 
     @synchronized
@@ -686,6 +747,7 @@ class PluginLoader:
             plugin.actions = Actions.collated()
             plugin.delegate = Delegate()
             plugin.load()
+            Plugin.container.build()
             return plugin
         except Exception:
             log.exception('plugin:%s, import failed', plugin.name)
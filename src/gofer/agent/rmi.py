@@ -15,11 +15,13 @@
 
 from time import time
 from logging import getLogger
+from threading import Event, RLock
 
-from gofer.common import Thread, Local
+from gofer.common import Thread, Local, synchronized
 from gofer.rmi.tracker import Tracker
+from gofer.rmi.dispatcher import Dispatcher, Return, RequestCancelled
 from gofer.rmi.store import Pending
-from gofer.messaging import Document, Producer
+from gofer.messaging import Producer
 from gofer.metrics import Timer, timestamp
 from gofer.agent.builtin import Builtin
 
@@ -53,8 +55,51 @@ class Task:
         """
         producer = Producer(plugin.url)
         producer.authenticator = plugin.authenticator
+        producer.codec = plugin.codec
+        producer.compression = plugin.compression
+        producer.signing = plugin.signing
         return producer
 
+    @staticmethod
+    def cancelled(plugin, request, commit):
+        """
+        Dispose of a request cancelled before it was started.
+        The request is committed, no longer tracked and the
+        cancelled reply is sent (if requested).
+        :param plugin: A plugin.
+        :type plugin: gofer.agent.plugin.Plugin
+        :param request: The cancelled request.
+        :type request: Document
+        :param commit: Transaction commit function.
+        :type commit: callable
+        """
+        sn = request.sn
+        commit(sn)
+        Tracker().remove(sn)
+        log.info('sn=%s cancelled', sn)
+        address = request.replyto
+        if not address:
+            return
+        try:
+            raise RequestCancelled(sn)
+        except RequestCancelled:
+            result = Return.exception()
+        try:
+            producer = Task._producer(plugin)
+            producer.open()
+            try:
+                producer.send(
+                    address,
+                    sn=sn,
+                    data=request.data,
+                    status='cancelled',
+                    result=result,
+                    timestamp=timestamp())
+            finally:
+                producer.close()
+        except Exception:
+            log.exception('send (cancelled), failed')
+
     def __init__(self, plugin, request, commit):
         """
         :param plugin: A plugin.
@@ -73,8 +118,14 @@ class Task:
     def __call__(self):
         """
         Dispatch received request.
+        Requests cancelled while queued are not dispatched.
         """
         request = self.request
+        tracker = Tracker()
+        if not tracker.start(request.sn):
+            # cancelled while queued
+            Task.cancelled(self.plugin, request, self.commit)
+            return
         self.context.sn = request.sn
         self.context.progress = Progress(self)
         self.context.cancelled = Cancelled(request.sn)
@@ -153,19 +204,27 @@ class Scheduler(Thread):
         """
         Thread.__init__(self, name='scheduler:%s' % plugin.name)
         self.plugin = plugin
-        self.pending = Pending(plugin.name)
         self.builtin = Builtin(plugin)
+        self.pending = Pending(plugin.name, cancelled=self.cancelled)
         self.setDaemon(True)
 
     def run(self):
         """
         Read the pending queue and dispatch requests
-        to the plugin thread pool.
+        to the plugin thread pool.  Requests cancelled while
+        queued are dropped.
         """
+        tracker = Tracker()
         while not Thread.aborted():
             request = self.pending.get()
+            if request is None:
+                # aborted
+                continue
             try:
                 plugin = self.select_plugin(request)
+                if tracker.cancelled(request.sn):
+                    Task.cancelled(plugin, request, self.pending.commit)
+                    continue
                 task = Task(plugin, request, self.pending.commit)
                 plugin.pool.run(task)
             except Exception:
@@ -180,8 +239,7 @@ class Scheduler(Thread):
         :return: The appropriate plugin.
         :rtype: gofer.agent.plugin.Plugin
         """
-        call = Document(request.request)
-        if self.builtin.provides(call.classname):
+        if self.builtin.provides(Dispatcher.classname(request)):
             plugin = self.builtin
         else:
             plugin = self.plugin
@@ -195,6 +253,25 @@ class Scheduler(Thread):
         """
         self.pending.put(request)
 
+    def cancelled(self, request):
+        """
+        A queued request has been cancelled.
+        The request is removed from the pending queue or the plugin
+        thread pool, committed and the cancelled reply is sent
+        immediately.  Requests not found are in transit and are
+        dropped when dequeued.  Requests already started are ignored.
+        :param request: The cancelled request.
+        :rtype request: gofer.messaging.Document
+        """
+        sn = request.sn
+        if Tracker().started(sn):
+            return
+        plugin = self.select_plugin(request)
+        removed = self.pending.remove(sn) or \
+            plugin.pool.purge(lambda fn: isinstance(fn, Task) and fn.request.sn == sn)
+        if removed:
+            Task.cancelled(plugin, request, self.pending.commit)
+
     def shutdown(self):
         """
         Shutdown the scheduler.
@@ -268,12 +345,81 @@ class Progress:
             log.exception('send (progress), failed')
 
 
+class Signal(object):
+    """
+    Cancellation signal.
+    Hooks are called (once) when signaled.
+    :ivar event: Set when signaled.
+    :type event: Event
+    :ivar hooks: Functions called when signaled.
+    :type hooks: list
+    """
+
+    def __init__(self):
+        self.event = Event()
+        self.hooks = []
+        self.__mutex = RLock()
+
+    def is_set(self):
+        return self.event.isSet()
+
+    def watch(self, fn):
+        """
+        Add a hook.
+        Called immediately when already signaled.
+        :param fn: A function called without arguments.
+        :type fn: callable
+        """
+        if self.__add(fn):
+            return
+        fn()
+
+    @synchronized
+    def unwatch(self, fn):
+        """
+        Remove a hook.
+        :param fn: A function.
+        :type fn: callable
+        """
+        if fn in self.hooks:
+            self.hooks.remove(fn)
+
+    def __call__(self):
+        """
+        Signal and call the hooks.
+        """
+        for fn in self.__signal():
+            try:
+                fn()
+            except Exception:
+                log.exception(fn)
+
+    @synchronized
+    def __add(self, fn):
+        if self.event.isSet():
+            return False
+        self.hooks.append(fn)
+        return True
+
+    @synchronized
+    def __signal(self):
+        self.event.set()
+        hooks = self.hooks
+        self.hooks = []
+        return hooks
+
+
 class Cancelled:
     """
     A callable added to the Context and used
     by plugin methods to check for cancellation.
+    Cancellation is pushed by the tracker so checking does not
+    involve the tracker.  Hooks (such as terminating a process)
+    may be added using watch() and are called when cancelled.
     :ivar tracker: The cancellation tracker.
     :type tracker: Tracker
+    :ivar signal: The cancellation signal.
+    :type signal: Signal
     """
 
     def __init__(self, sn):
@@ -282,10 +428,28 @@ class Cancelled:
         :type sn: str
         """
         self.sn = sn
+        self.signal = Signal()
         self.tracker = Tracker()
+        self.tracker.watch(sn, self.signal)
+
+    def watch(self, fn):
+        """
+        Add a hook called when cancelled.
+        :param fn: A function called without arguments.
+        :type fn: callable
+        """
+        self.signal.watch(fn)
+
+    def unwatch(self, fn):
+        """
+        Remove a hook.
+        :param fn: A function.
+        :type fn: callable
+        """
+        self.signal.unwatch(fn)
 
     def __call__(self):
-        return self.tracker.cancelled(self.sn)
+        return self.signal.is_set()
 
     def __del__(self):
         try:
@@ -94,6 +94,29 @@ def nvl(thing, default):
         return thing
 
 
+def purge(queue, fn):
+    """
+    Remove selected items from a queue.
+    :param queue: A queue.
+    :type queue: Queue.Queue
+    :param fn: A function called with each queued item.
+        Returns True when the item is to be removed.
+    :type fn: callable
+    :return: The list of removed items.
+    :rtype: list
+    """
+    queue.mutex.acquire()
+    try:
+        removed = [item for item in queue.queue if fn(item)]
+        for item in removed:
+            queue.queue.remove(item)
+        if removed:
+            queue.not_full.notify(len(removed))
+        return removed
+    finally:
+        queue.mutex.release()
+
+
 def valid_path(path, mode=os.R_OK):
     """
     Validate the specified path.
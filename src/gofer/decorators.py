@@ -17,6 +17,7 @@ import inspect
 
 from gofer import NAME, Options
 from gofer.rmi.decorator import Remote
+from gofer.rmi.dispatcher import LIFECYCLES, REQUEST
 from gofer.agent.decorator import Actions
 from gofer.agent.decorator import Delegate
 
@@ -38,15 +39,32 @@ def options(fn):
     return opt
 
 
-def remote(fx=None, secret=None):
+def remote(fx=None, secret=None, lifecycle=None, size=None, idle=None):
     """
     The *remote* decorator.
     Used to expose function/methods as RMI targets.
+    When used to decorate a class, specifies the lifecycle of
+    the instances constructed to dispatch requests.
     :param secret: An optional shared secret.
     :type secret: str
+    :param lifecycle: The instance lifecycle (request|singleton|pooled).
+    :type lifecycle: str
+    :param size: The max idle instances pooled (per set of constructor
+        arguments) or singletons kept (least recently used evicted).
+        Instances in use by (concurrent) requests are not limited.
+    :type size: int
+    :param idle: Time (seconds) an idle instance is pooled or a singleton
+        is kept.  Singletons are kept forever by default.
+    :type idle: float
     :return: The decorated function.
     """
     def inner(fn):
+        if inspect.isclass(fn):
+            if lifecycle and lifecycle not in LIFECYCLES:
+                raise ValueError('lifecycle: %s, not valid' % lifecycle)
+            policy = Options(name=lifecycle or REQUEST, size=size, idle=idle)
+            setattr(fn, NAME, Options(lifecycle=policy))
+            return fn
         opt = options(fn)
         if secret:
             required = Options()
@@ -55,7 +73,7 @@ def remote(fx=None, secret=None):
             opt.security.append(auth)
         Remote.add(fn)
         return fn
-    if inspect.isfunction(fx):
+    if inspect.isfunction(fx) or inspect.isclass(fx):
         return inner(fx)
     else:
         return inner
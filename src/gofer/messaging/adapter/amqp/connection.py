@@ -18,7 +18,7 @@ from amqp import Connection as RealConnection
 from amqp import ConnectionError
 
 from gofer.common import ThreadSingleton, utf8
-from gofer.messaging.adapter.model import Connector, BaseConnection
+from gofer.messaging.adapter.model import BaseConnection, Domain
 from gofer.messaging.adapter.connect import retry
 
 
@@ -34,6 +34,10 @@ CONNECTION_EXCEPTIONS = (IOError, SocketError, ConnectionError, AttributeError)
 class Connection(BaseConnection):
     """
     An AMQP broker connection.
+    Heartbeats are serviced only while a reader waits on the connection
+    so they are negotiated only for (distinct) reader connections.
+    :ivar heartbeat: Negotiate the configured heartbeat.
+    :type heartbeat: bool
     """
 
     __metaclass__ = ThreadSingleton
@@ -63,12 +67,15 @@ class Connection(BaseConnection):
                 certfile=connector.ssl.client_certificate)
         return domain
 
-    def __init__(self, url):
+    def __init__(self, url, heartbeat=False):
         """
         :param url: The connector url.
         :type url: str
+        :param heartbeat: Negotiate the configured heartbeat.
+        :type heartbeat: bool
         """
         BaseConnection.__init__(self, url)
+        self.heartbeat = heartbeat
         self._impl = None
 
     def is_open(self):
@@ -80,14 +87,12 @@ class Connection(BaseConnection):
         return self._impl is not None
 
     @retry(*CONNECTION_EXCEPTIONS)
-    def open(self):
+    def open(self, connector):
         """
         Open a connection to the broker.
+        :param connector: The (selected) broker endpoint.
+        :type connector: Connector
         """
-        if self.is_open():
-            # already open
-            return
-        connector = Connector.find(self.url)
         host = ':'.join((connector.host, utf8(connector.port)))
         virtual_host = connector.virtual_host or VIRTUAL_HOST
         domain = self.ssl_domain(connector)
@@ -100,6 +105,7 @@ class Connection(BaseConnection):
             ssl=domain,
             userid=userid,
             password=password,
+            heartbeat=(self.heartbeat and connector.heartbeat) or 0,
             confirm_publish=True)
         log.info('opened: %s', self.url)
 
@@ -113,7 +119,9 @@ class Connection(BaseConnection):
     def close(self):
         """
         Close the connection.
+        Declared broker model objects are invalidated.
         """
+        Domain.declared.invalidate(self.url)
         connection = self._impl
         self._impl = None
         try:
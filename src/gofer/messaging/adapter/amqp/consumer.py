@@ -14,6 +14,7 @@ import select
 from Queue import Empty
 from Queue import Queue as Inbox
 from logging import getLogger
+from socket import timeout as SocketTimeout
 
 from gofer.common import utf8
 from gofer.messaging.adapter.model import BaseReader, Message
@@ -27,6 +28,9 @@ log = getLogger(__name__)
 NO_DELAY = 0
 DELIVERY_TAG = 'delivery_tag'
 
+# heartbeats checked per interval
+HEARTBEAT_RATE = 2
+
 
 class Reader(BaseReader):
     """
@@ -42,7 +46,7 @@ class Reader(BaseReader):
         :see: gofer.messaging.adapter.url.URL
         """
         BaseReader.__init__(self, node, url)
-        self.connection = Connection(url)
+        self.connection = Connection(url, heartbeat=True)
         self.channel = None
         self.receiver = None
 
@@ -109,7 +113,8 @@ class Reader(BaseReader):
         """
         try:
             impl = self.receiver.fetch(timeout or NO_DELAY)
-            return Message(self, impl, impl.body)
+            headers = impl.properties.get('application_headers')
+            return Message(self, impl, impl.body, headers)
         except Empty:
             pass
 
@@ -157,6 +162,9 @@ class Receiver(object):
         if len(channel.method_queue):
             channel.wait()
             return
+        if channel.connection.heartbeat:
+            Receiver._pump(fd, channel.connection, timeout)
+            return
         epoll = select.epoll()
         epoll.register(fd, select.EPOLLIN)
         try:
@@ -166,6 +174,42 @@ class Receiver(object):
             epoll.unregister(fd)
             epoll.close()
 
+    @staticmethod
+    def _pump(fd, connection, timeout):
+        """
+        Wait on the connection while servicing heartbeats.
+        The wait is divided into intervals (of the heartbeat rate) and
+        heartbeats are sent and checked before each.  A missed heartbeat
+        raises ConnectionForced so that the reader is repaired.
+        :param fd: The connection file descriptor.
+        :type fd: int
+        :param connection: The *real* connection.
+        :type connection: amqp.Connection
+        :param timeout: The read timeout in seconds.
+        :type timeout: int
+        """
+        interval = float(connection.heartbeat) / HEARTBEAT_RATE
+        remaining = timeout or NO_DELAY
+        epoll = select.epoll()
+        epoll.register(fd, select.EPOLLIN)
+        try:
+            while True:
+                connection.heartbeat_tick(rate=HEARTBEAT_RATE)
+                delay = min(remaining, interval)
+                if epoll.poll(delay):
+                    try:
+                        connection.drain_events(timeout=interval)
+                        return
+                    except SocketTimeout:
+                        # heartbeat (only) received
+                        pass
+                remaining -= delay
+                if remaining <= 0:
+                    return
+        finally:
+            epoll.unregister(fd)
+            epoll.close()
+
     def __init__(self, reader):
         """
         :param reader: A message reader.
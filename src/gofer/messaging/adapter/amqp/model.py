@@ -81,14 +81,19 @@ class Queue(BaseQueue):
         @reliable
         def _fn(_endpoint):
             channel = _endpoint.channel
-            if self.auto_delete and self.expiration:
+            auto_delete = self.auto_delete
+            if auto_delete and self.expiration:
                 arguments = {'x-expires': self.expiration * 1000}
+                if self.expire_unused:
+                    # an auto_delete queue is deleted when
+                    # the last consumer is cancelled.
+                    auto_delete = False
             else:
                 arguments = None
             channel.queue_declare(
                 self.name,
                 durable=self.durable,
-                auto_delete=self.auto_delete,
+                auto_delete=auto_delete,
                 exclusive=self.exclusive,
                 arguments=arguments)
         _fn(url)
@@ -99,3 +104,10 @@ class Queue(BaseQueue):
             channel = _endpoint.channel
             channel.queue_delete(self.name, nowait=True)
         _fn(url)
+
+    def purge(self, url):
+        @reliable
+        def _fn(_endpoint):
+            channel = _endpoint.channel
+            channel.queue_purge(self.name)
+        _fn(url)
@@ -10,33 +10,30 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 # Jeff Ortel (jortel@redhat.com)
 
-from time import sleep
-
 from amqp import ChannelError
 
 from gofer import Thread
 from gofer.messaging.adapter.model import Messenger, NotFound
+from gofer.messaging.adapter.connect import recover, DELAY
 from gofer.messaging.adapter.amqp.connection import Connection, CONNECTION_EXCEPTIONS
 
 
-DELAY = 10  # seconds
-
-
 def reliable(fn):
     def _fn(messenger, *args, **kwargs):
         repair = lambda: None
+        delay = DELAY
         while not Thread.aborted():
             try:
                 repair()
                 return fn(messenger, *args, **kwargs)
             except ChannelError, e:
                 if e.code != 404:
-                    sleep(DELAY)
+                    delay = recover(messenger.url, delay)
                     repair = messenger.repair
                 else:
                     raise NotFound(*e.args)
             except CONNECTION_EXCEPTIONS:
-                sleep(DELAY)
+                delay = recover(messenger.url, delay)
                 repair = messenger.repair
     return _fn
 
@@ -1,22 +1,242 @@
-from time import sleep
+from time import sleep, time
+from random import uniform
 from logging import getLogger
+from threading import RLock
 
 from gofer import Thread
+from gofer.common import synchronized
+from gofer.messaging.adapter.model import Connector, ModelError
 from gofer.messaging.adapter.reliability import YEAR
 
 
-DELAY = 10
+DELAY = 1
 MAX_DELAY = 90
 RETRIES = YEAR / MAX_DELAY
-DELAY_MULTIPLIER = 1.2
+DELAY_MULTIPLIER = 2
+JITTER = 0.5
 
 
 log = getLogger(__name__)
 
 
+class CircuitOpen(ModelError):
+    """
+    All broker endpoints are (known to be) unavailable.
+    """
+
+    DESCRIPTION = 'Circuit open: %s'
+
+    def __init__(self, url):
+        ModelError.__init__(self, CircuitOpen.DESCRIPTION % url)
+
+
+class Health(object):
+    """
+    Broker endpoint health.
+    Tracks consecutive connect failures and the connect latency.
+    The circuit is opened after THRESHOLD consecutive failures and
+    remains open for COOL_DOWN seconds.  Once cooled down, a single
+    connect is attempted (half-open) and closes the circuit when
+    it succeeds.  The half-open connect is claimed (probe) by the
+    first thread to select the endpoint and other threads treat the
+    circuit as open until it completes or (at most) COOL_DOWN seconds.
+    :cvar THRESHOLD: The consecutive failures that open the circuit.
+    :type THRESHOLD: int
+    :cvar COOL_DOWN: The time (seconds) the circuit remains open.
+    :type COOL_DOWN: int
+    :ivar failures: The consecutive failures.
+    :type failures: int
+    :ivar opened: When the circuit was opened.
+    :type opened: float
+    :ivar probed: When the half-open connect was claimed (0=none).
+    :type probed: float
+    :ivar latency: The (smoothed) connect latency (seconds).
+    :type latency: float
+    """
+
+    THRESHOLD = 3
+    COOL_DOWN = 30
+
+    def __init__(self):
+        self.failures = 0
+        self.opened = 0
+        self.probed = 0
+        self.latency = None
+
+    def available(self):
+        """
+        Get whether a connect should be attempted.
+        :return: True if the circuit is closed or half-open.
+        :rtype: bool
+        """
+        if self.failures < self.THRESHOLD:
+            return True
+        now = time()
+        if now - self.opened < self.COOL_DOWN:
+            return False
+        return now - self.probed >= self.COOL_DOWN
+
+    def probe(self):
+        """
+        Claim the half-open connect.
+        No-op when the circuit is closed.
+        """
+        if self.failures >= self.THRESHOLD:
+            self.probed = time()
+
+    def succeeded(self, latency):
+        """
+        Connect succeeded.
+        :param latency: The connect latency (seconds).
+        :type latency: float
+        """
+        self.failures = 0
+        self.probed = 0
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = (self.latency + latency) / 2
+
+    def failed(self):
+        """
+        Connect failed.
+        """
+        self.failures += 1
+        self.probed = 0
+        if self.failures >= self.THRESHOLD:
+            self.opened = time()
+
+
+class Endpoints(object):
+    """
+    Broker endpoint health by URL.
+    :ivar health: Health by (canonical) URL.
+    :type health: dict
+    """
+
+    def __init__(self):
+        self.health = {}
+        self.__mutex = RLock()
+
+    @synchronized
+    def find(self, connector):
+        """
+        Find the health of a broker endpoint.
+        :param connector: A broker endpoint.
+        :type connector: Connector
+        :return: The endpoint health.
+        :rtype: Health
+        """
+        key = connector.url.canonical
+        health = self.health.get(key)
+        if health is None:
+            health = Health()
+            self.health[key] = health
+        return health
+
+    @synchronized
+    def select(self, url):
+        """
+        Select the broker endpoints to be tried (in order).
+        Endpoints with an open circuit are excluded and the half-open
+        connect is claimed for those cooled down.  Available endpoints
+        are ordered by connect latency and endpoints not yet connected
+        follow in the configured (failover) order.
+        :param url: A broker URL.
+        :type url: str
+        :return: The list of selected endpoints.
+        :rtype: list
+        """
+        selected = []
+        connector = Connector.find(url)
+        for n, endpoint in enumerate(connector.endpoints()):
+            health = self.find(endpoint)
+            if not health.available():
+                continue
+            health.probe()
+            key = (health.latency is None, health.latency, n)
+            selected.append((key, endpoint))
+        selected.sort()
+        return [e[1] for e in selected]
+
+    @synchronized
+    def available(self, url):
+        """
+        Get whether any broker endpoint may be tried.
+        Unlike select(), the half-open connect is not claimed.
+        :param url: A broker URL.
+        :type url: str
+        :return: True if available.
+        :rtype: bool
+        """
+        connector = Connector.find(url)
+        for endpoint in connector.endpoints():
+            if self.find(endpoint).available():
+                return True
+        return False
+
+    @synchronized
+    def succeeded(self, connector, latency):
+        self.find(connector).succeeded(latency)
+
+    @synchronized
+    def failed(self, connector):
+        self.find(connector).failed()
+
+    @synchronized
+    def clear(self):
+        self.health.clear()
+
+
+endpoints = Endpoints()
+
+
+def backoff(delay):
+    """
+    Get the (jittered) time to sleep before retrying.
+    :param delay: The exponential delay (seconds).
+    :type delay: float
+    :return: The time to sleep (seconds).
+    :rtype: float
+    """
+    return delay * uniform(1 - JITTER, 1)
+
+
+def recover(url, delay):
+    """
+    Wait to repair a broken connection.
+    Used by request (reliable) threads to fail fast with CircuitOpen
+    when all broker endpoints are known to be unavailable rather than
+    waiting for the broker to come back.
+    :param url: A broker URL.
+    :type url: str
+    :param delay: The exponential delay (seconds).
+    :type delay: float
+    :return: The next delay (seconds).
+    :rtype: float
+    :raise CircuitOpen: when no broker endpoint is available.
+    """
+    if not endpoints.available(url):
+        raise CircuitOpen(url)
+    pause = backoff(delay)
+    log.info('repair in %d seconds', pause)
+    sleep(pause)
+    return min(delay * DELAY_MULTIPLIER, MAX_DELAY)
+
+
 def retry(*exception):
+    """
+    Connect (failover) retry decorator.
+    The decorated open() is called with each selected broker endpoint
+    (connector) until connected.  When all endpoints fail, the connect
+    is retried after a jittered exponential backoff.  When all endpoints
+    are known to be unavailable, CircuitOpen is raised (fail fast).
+    """
     def _fn(fn):
         def inner(connection):
+            if connection.is_open():
+                # already open
+                return
             if connection.retry:
                 retries = RETRIES
             else:
@@ -24,20 +244,30 @@ def retry(*exception):
             delay = DELAY
             url = connection.url
             while not Thread.aborted():
-                try:
-                    log.info('connecting: %s', url)
-                    impl = fn(connection)
-                    log.info('connected: %s', url)
-                    return impl
-                except exception, e:
-                    log.error('connect: %s, failed: %s', url, e)
-                    if retries > 0:
-                        log.info('retry in %d seconds', delay)
-                        sleep(delay)
-                        if delay < MAX_DELAY:
-                            delay *= DELAY_MULTIPLIER
-                        retries -= 1
-                    else:
-                        raise
+                selected = endpoints.select(url)
+                if not selected:
+                    raise CircuitOpen(url)
+                failure = None
+                for connector in selected:
+                    try:
+                        log.info('connecting: %s', connector.url)
+                        started = time()
+                        impl = fn(connection, connector)
+                        endpoints.succeeded(connector, time() - started)
+                        log.info('connected: %s', connector.url)
+                        return impl
+                    except exception, e:
+                        endpoints.failed(connector)
+                        log.error('connect: %s, failed: %s', connector.url, e)
+                        failure = e
+                if retries > 0:
+                    delay = min(delay, MAX_DELAY)
+                    pause = backoff(delay)
+                    log.info('retry in %d seconds', pause)
+                    sleep(pause)
+                    delay *= DELAY_MULTIPLIER
+                    retries -= 1
+                else:
+                    raise failure
         return inner
     return _fn
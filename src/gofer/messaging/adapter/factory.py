@@ -157,14 +157,19 @@ class Adapter(object):
         :param url: A broker URL.
         :type url: str
         :return: The requested adapter or the adapter with the
-            highest *priority*.
+            highest *priority*.  Adapters with DEFAULT=False are
+            only found by name or binding.
         :raise: AdapterNotFound
+        :raise: NoAdaptersLoaded
         """
         _list, catalog = Adapter.loader.load()
         if not _list:
             raise NoAdaptersLoaded()
         if not url:
-            return _list[0]
+            for adapter in _list:
+                if getattr(adapter, 'DEFAULT', True):
+                    return adapter
+            raise NoAdaptersLoaded()
         try:
             url = URL(url)
             if url.adapter:
@@ -0,0 +1,32 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+
+"""
+The in-memory (loopback) adapter.
+Queues, exchanges and bindings are maintained in-process so that
+peers in the same process exchange messages without a broker.
+Intended for testing and measuring gofer overhead.
+Usage: loopback+amqp://localhost
+"""
+
+from gofer.messaging.adapter.loopback.model import Exchange, Queue
+from gofer.messaging.adapter.loopback.connection import Connection
+from gofer.messaging.adapter.loopback.consumer import Reader
+from gofer.messaging.adapter.loopback.producer import Sender
+
+
+PROVIDES = [
+    'in-memory',
+]
+
+# not selected by default
+DEFAULT = False
@@ -0,0 +1,384 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+The in-memory (loopback) broker.
+"""
+
+from time import time
+from logging import getLogger
+from threading import RLock, Condition
+from collections import deque
+
+from gofer.common import Thread, synchronized
+from gofer.messaging.adapter.url import URL
+from gofer.messaging.adapter.model import NotFound
+
+
+log = getLogger(__name__)
+
+
+DIRECT = 'direct'
+TOPIC = 'topic'
+FANOUT = 'fanout'
+
+# pre-declared exchanges
+EXCHANGES = [
+    ('amq.direct', DIRECT),
+    ('amq.topic', TOPIC),
+    ('amq.fanout', FANOUT),
+]
+
+
+class Envelope(object):
+    """
+    A queued message.
+    :ivar body: The message body.
+    :type body: str
+    :ivar properties: The message (application) properties.
+    :type properties: dict
+    :ivar expiration: When the message expires.  None = never.
+    :type expiration: float
+    :ivar redelivered: The message has been redelivered.
+    :type redelivered: bool
+    """
+
+    def __init__(self, body, ttl=None, properties=None):
+        """
+        :param body: The message body.
+        :type body: str
+        :param ttl: Time to Live (seconds)
+        :type ttl: float
+        :param properties: The message (application) properties.
+        :type properties: dict
+        """
+        self.body = body
+        self.properties = properties or {}
+        if ttl:
+            self.expiration = time() + ttl
+        else:
+            self.expiration = None
+        self.redelivered = False
+
+    def expired(self):
+        """
+        Get whether the message has expired.
+        :return: True if expired.
+        :rtype: bool
+        """
+        return self.expiration is not None and time() > self.expiration
+
+    def copy(self):
+        """
+        Get a copy to be queued.
+        :return: The copy.
+        :rtype: Envelope
+        """
+        envelope = Envelope(self.body, properties=self.properties)
+        envelope.expiration = self.expiration
+        return envelope
+
+
+class Queue(object):
+    """
+    An in-memory message queue.
+    :ivar name: The queue name.
+    :type name: str
+    :ivar messages: The queued messages.
+    :type messages: deque
+    :ivar condition: Signaled when messages are queued.
+    :type condition: Condition
+    """
+
+    def __init__(self, name):
+        """
+        :param name: The queue name.
+        :type name: str
+        """
+        self.name = name
+        self.messages = deque()
+        self.condition = Condition()
+
+    def put(self, envelope):
+        """
+        Enqueue a message.
+        :param envelope: A message.
+        :type envelope: Envelope
+        """
+        self.condition.acquire()
+        try:
+            self.messages.append(envelope)
+            self.condition.notify()
+        finally:
+            self.condition.release()
+
+    def requeue(self, envelope):
+        """
+        Requeue (at the head) a message to be redelivered.
+        :param envelope: A message.
+        :type envelope: Envelope
+        """
+        self.condition.acquire()
+        try:
+            envelope.redelivered = True
+            self.messages.appendleft(envelope)
+            self.condition.notify()
+        finally:
+            self.condition.release()
+
+    def get(self, timeout=None):
+        """
+        Dequeue the next (unexpired) message.
+        :param timeout: The time (seconds) to wait for a message.
+        :type timeout: float
+        :return: The next message or None.
+        :rtype: Envelope
+        """
+        expires = time() + (timeout or 0)
+        self.condition.acquire()
+        try:
+            while True:
+                while self.messages:
+                    envelope = self.messages.popleft()
+                    if not envelope.expired():
+                        return envelope
+                remaining = expires - time()
+                if remaining <= 0 or Thread.aborted():
+                    return None
+                self.condition.wait(min(remaining, 1))
+        finally:
+            self.condition.release()
+
+    def purge(self):
+        """
+        Discard all queued messages.
+        """
+        self.condition.acquire()
+        try:
+            self.messages.clear()
+        finally:
+            self.condition.release()
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class Exchange(object):
+    """
+    An in-memory exchange.
+    Queues are bound using the queue name as the routing key.
+    :ivar name: The exchange name.
+    :type name: str
+    :ivar policy: The routing policy (direct|topic|fanout).
+    :type policy: str
+    :ivar bindings: The names of bound queues.
+    :type bindings: set
+    """
+
+    def __init__(self, name, policy=DIRECT):
+        """
+        :param name: The exchange name.
+        :type name: str
+        :param policy: The routing policy (direct|topic|fanout).
+        :type policy: str
+        """
+        self.name = name
+        self.policy = policy
+        self.bindings = set()
+
+    def route(self, key):
+        """
+        Get the names of queues matched by the routing key.
+        :param key: A routing key.
+        :type key: str
+        :return: The list of matched queue names.
+        :rtype: list
+        """
+        if self.policy == FANOUT:
+            return list(self.bindings)
+        if key in self.bindings:
+            return [key]
+        return []
+
+
+class Broker(object):
+    """
+    An in-memory broker.
+    :cvar brokers: Brokers by (canonical) URL.
+    :type brokers: dict
+    :ivar queues: Queues by name.
+    :type queues: dict
+    :ivar exchanges: Exchanges by name.
+    :type exchanges: dict
+    """
+
+    brokers = {}
+    lock = RLock()
+
+    @staticmethod
+    def find(url):
+        """
+        Find (or create) the broker for the URL.
+        :param url: A broker URL.
+        :type url: str
+        :return: The broker.
+        :rtype: Broker
+        """
+        key = URL(url).canonical
+        Broker.lock.acquire()
+        try:
+            broker = Broker.brokers.get(key)
+            if broker is None:
+                broker = Broker()
+                Broker.brokers[key] = broker
+            return broker
+        finally:
+            Broker.lock.release()
+
+    def __init__(self):
+        self.queues = {}
+        self.exchanges = dict([(n, Exchange(n, p)) for n, p in EXCHANGES])
+        self.__mutex = RLock()
+
+    @synchronized
+    def declare_queue(self, name):
+        """
+        Declare a queue.
+        :param name: The queue name.
+        :type name: str
+        """
+        if name not in self.queues:
+            self.queues[name] = Queue(name)
+
+    @synchronized
+    def delete_queue(self, name):
+        """
+        Delete a queue.
+        The queue is unbound from all exchanges.
+        :param name: The queue name.
+        :type name: str
+        """
+        self.queues.pop(name, None)
+        for exchange in self.exchanges.values():
+            exchange.bindings.discard(name)
+
+    @synchronized
+    def queue(self, name):
+        """
+        Find a queue by name.
+        :param name: The queue name.
+        :type name: str
+        :return: The queue.
+        :rtype: Queue
+        :raise NotFound: when not found.
+        """
+        try:
+            return self.queues[name]
+        except KeyError:
+            raise NotFound(name)
+
+    @synchronized
+    def declare_exchange(self, name, policy=DIRECT):
+        """
+        Declare an exchange.
+        :param name: The exchange name.
+        :type name: str
+        :param policy: The routing policy (direct|topic|fanout).
+        :type policy: str
+        """
+        if name not in self.exchanges:
+            self.exchanges[name] = Exchange(name, policy)
+
+    @synchronized
+    def delete_exchange(self, name):
+        """
+        Delete an exchange.
+        :param name: The exchange name.
+        :type name: str
+        """
+        self.exchanges.pop(name, None)
+
+    @synchronized
+    def exchange(self, name):
+        """
+        Find an exchange by name.
+        :param name: The exchange name.
+        :type name: str
+        :return: The exchange.
+        :rtype: Exchange
+        :raise NotFound: when not found.
+        """
+        try:
+            return self.exchanges[name]
+        except KeyError:
+            raise NotFound(name)
+
+    @synchronized
+    def bind(self, exchange, queue):
+        """
+        Bind a queue to an exchange.
+        :param exchange: The exchange name.
+        :type exchange: str
+        :param queue: The queue name.
+        :type queue: str
+        :raise NotFound: when either is not found.
+        """
+        self.queue(queue)
+        self.exchange(exchange).bindings.add(queue)
+
+    @synchronized
+    def unbind(self, exchange, queue):
+        """
+        Unbind a queue from an exchange.
+        :param exchange: The exchange name.
+        :type exchange: str
+        :param queue: The queue name.
+        :type queue: str
+        """
+        try:
+            self.exchange(exchange).bindings.discard(queue)
+        except NotFound:
+            pass
+
+    @synchronized
+    def route(self, address):
+        """
+        Get the queues matched by an address.
+        The address format is: <exchange>/<key> or <key> where the key
+        is the name of a queue (default exchange).
+        :param address: An AMQP address.
+        :type address: str
+        :return: The list of matched queues.
+        :rtype: list
+        :raise NotFound: when the exchange is not found.
+        """
+        parts = address.split('/')
+        key = parts[-1]
+        if len(parts) > 1:
+            names = self.exchange(parts[0]).route(key)
+        else:
+            names = [key]
+        return [self.queues[n] for n in names if n in self.queues]
+
+    def send(self, address, envelope):
+        """
+        Route and enqueue a message.
+        Messages not matched to a queue are discarded.
+        :param address: An AMQP address.
+        :type address: str
+        :param envelope: The message.
+        :type envelope: Envelope
+        """
+        matched = self.route(address)
+        if not matched:
+            log.debug('address: %s, not matched (discarded)', address)
+        for queue in matched:
+            queue.put(envelope.copy())
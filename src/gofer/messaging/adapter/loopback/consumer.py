@@ -0,0 +1,119 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+
+from logging import getLogger
+
+from gofer.messaging.adapter.model import BaseReader, Message
+from gofer.messaging.adapter.loopback.connection import Connection
+
+
+log = getLogger(__name__)
+
+
+class Reader(BaseReader):
+    """
+    An in-memory message reader.
+    Messages read and not acknowledged are redelivered when
+    the reader is closed.
+    :ivar connection: The broker connection.
+    :type connection: Connection
+    :ivar queue: The queue being read.
+    :type queue: gofer.messaging.adapter.loopback.broker.Queue
+    :ivar unacked: Messages read and not acknowledged.
+    :type unacked: dict
+    """
+
+    def __init__(self, node, url):
+        """
+        :param node: The AMQP node to read.
+        :type node: gofer.messaging.adapter.model.Node
+        :param url: The broker url.
+        :type url: str
+        :see: gofer.messaging.adapter.url.URL
+        """
+        BaseReader.__init__(self, node, url)
+        self.connection = Connection(url)
+        self.queue = None
+        self.unacked = {}
+
+    def is_open(self):
+        """
+        Get whether the messenger has been opened.
+        :return: True if open.
+        :rtype bool
+        """
+        return self.queue is not None
+
+    def open(self):
+        """
+        Open the reader.
+        :raise: NotFound
+        """
+        if self.is_open():
+            # already opened
+            return
+        self.connection.open()
+        self.queue = self.connection.broker.queue(self.node.name)
+
+    def repair(self):
+        """
+        Repair the reader.
+        :raise: NotFound
+        """
+        self.close()
+        self.open()
+
+    def close(self):
+        """
+        Close the reader.
+        Unacknowledged messages are requeued.
+        """
+        queue = self.queue
+        self.queue = None
+        unacked = self.unacked.values()
+        self.unacked = {}
+        for envelope in unacked:
+            queue.requeue(envelope)
+
+    def get(self, timeout=None):
+        """
+        Get the next message from the queue.
+        :param timeout: The read timeout in seconds.
+        :type timeout: int
+        :return: The next message or None.
+        :rtype: Message
+        """
+        envelope = self.queue.get(timeout)
+        if envelope is None:
+            return
+        self.unacked[id(envelope)] = envelope
+        return Message(self, envelope, envelope.body, envelope.properties)
+
+    def ack(self, message):
+        """
+        Ack the specified message.
+        :param message: The message to acknowledge.
+        :type message: gofer.messaging.adapter.loopback.broker.Envelope
+        """
+        self.unacked.pop(id(message), None)
+
+    def reject(self, message, requeue=True):
+        """
+        Reject the specified message.
+        :param message: The message to reject.
+        :type message: gofer.messaging.adapter.loopback.broker.Envelope
+        :param requeue: Requeue the message or discard it.
+        :type requeue: bool
+        """
+        envelope = self.unacked.pop(id(message), None)
+        if envelope is not None and requeue:
+            self.queue.requeue(envelope)
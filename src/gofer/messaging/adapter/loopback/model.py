@@ -0,0 +1,90 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+
+from gofer.messaging.adapter.model import BaseExchange, BaseQueue
+from gofer.messaging.adapter.loopback.broker import Broker
+
+
+# --- model ------------------------------------------------------------------
+
+
+class Exchange(BaseExchange):
+
+    def declare(self, url):
+        """
+        Declare the exchange.
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.declare_exchange(self.name, self.policy)
+
+    def delete(self, url):
+        """
+        Delete the exchange.
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.delete_exchange(self.name)
+
+    def bind(self, queue, url):
+        """
+        Bind the specified queue.
+        :param queue: The queue to bind.
+        :type queue: BaseQueue
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.bind(self.name, queue.name)
+
+    def unbind(self, queue, url):
+        """
+        Unbind the specified queue.
+        :param queue: The queue to unbind.
+        :type queue: BaseQueue
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.unbind(self.name, queue.name)
+
+
+class Queue(BaseQueue):
+
+    def declare(self, url):
+        """
+        Declare the queue.
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.declare_queue(self.name)
+
+    def delete(self, url):
+        """
+        Delete the queue.
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.delete_queue(self.name)
+
+    def purge(self, url):
+        """
+        Purge (discard) all queued messages.
+        :param url: The broker URL.
+        :type url: str
+        """
+        broker = Broker.find(url)
+        broker.queue(self.name).purge()
@@ -0,0 +1,77 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+
+from logging import getLogger
+
+from gofer.messaging.adapter.model import BaseSender
+from gofer.messaging.adapter.loopback.broker import Envelope
+from gofer.messaging.adapter.loopback.connection import Connection
+
+
+log = getLogger(__name__)
+
+
+class Sender(BaseSender):
+    """
+    An in-memory message sender.
+    """
+
+    def __init__(self, url):
+        """
+        :param url: The broker url.
+        :type url: str
+        """
+        BaseSender.__init__(self, url)
+        self.connection = Connection(url)
+
+    def is_open(self):
+        """
+        Get whether the sender has been opened.
+        :return: True if open.
+        :rtype bool
+        """
+        return self.connection.is_open()
+
+    def open(self):
+        """
+        Open the sender.
+        """
+        self.connection.open()
+
+    def repair(self):
+        """
+        Repair the sender.
+        """
+        self.close()
+        self.open()
+
+    def close(self):
+        """
+        Close the sender.
+        """
+        self.connection.broker = None
+
+    def send(self, address, content, ttl=None, properties=None):
+        """
+        Send a message.
+        :param address: An AMQP address.
+        :type address: str
+        :param content: The message content
+        :type content: buf
+        :param ttl: Time to Live (seconds)
+        :type ttl: float
+        :param properties: The (optional) application properties.
+        :type properties: dict
+        """
+        envelope = Envelope(content, ttl, properties)
+        self.connection.broker.send(address, envelope)
+        log.debug('sent (%s)', address)
@@ -13,16 +13,20 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 
+from time import time
 from logging import getLogger
+from threading import RLock
 
 from uuid import uuid4
 
-from gofer.common import Thread, valid_path, utf8
+from gofer.common import Thread, valid_path, utf8, synchronized
+from gofer.metrics import Latency
 from gofer.messaging.model import VERSION, Document
 from gofer.messaging.adapter.url import URL
 from gofer.messaging.adapter.factory import Adapter
 from gofer.messaging.model import ModelError, validate
 from gofer.messaging import auth as auth
+from gofer.messaging import codec
 
 
 ROUTE_ALL = '#'
@@ -123,6 +127,87 @@ class _Domain(object):
         return len(self.content)
 
 
+class Declared(object):
+    """
+    Cache of the broker model objects known to have been declared.
+    The cached keys are tuples of:
+      - (QUEUE, <name>)
+      - (EXCHANGE, <name>)
+      - (BINDING, <exchange>, <queue>)
+    The content is keyed by broker URL and is invalidated
+    when a connection to the broker is closed (or lost).
+    Auto-deleted nodes (and bindings to auto-deleted queues) are
+    not cached because they may be deleted by the broker.
+    :cvar QUEUE: Queue key.
+    :cvar EXCHANGE: Exchange key.
+    :cvar BINDING: Binding key.
+    :ivar content: Set of keys by URL.
+    :type content: dict
+    """
+
+    QUEUE = 'queue'
+    EXCHANGE = 'exchange'
+    BINDING = 'binding'
+
+    def __init__(self):
+        self.content = {}
+        self.__mutex = RLock()
+
+    @synchronized
+    def add(self, url, key):
+        """
+        Add a declared object.
+        :param url: The broker URL.
+        :type url: str
+        :param key: The object key.
+        :type key: tuple
+        """
+        self.content.setdefault(url, set()).add(key)
+
+    @synchronized
+    def discard(self, url, key):
+        """
+        Discard a deleted object.
+        Bindings for a discarded node are also discarded.
+        :param url: The broker URL.
+        :type url: str
+        :param key: The object key.
+        :type key: tuple
+        """
+        declared = self.content.get(url, set())
+        declared.discard(key)
+        if key[0] == Declared.BINDING:
+            return
+        for binding in list(declared):
+            if binding[0] == Declared.BINDING and key[1] in binding[1:]:
+                declared.discard(binding)
+
+    @synchronized
+    def invalidate(self, url):
+        """
+        Invalidate all objects declared using the URL.
+        :param url: The broker URL.
+        :type url: str
+        """
+        self.content.pop(url, None)
+
+    @synchronized
+    def contains(self, url, key):
+        """
+        Get whether the object has been declared.
+        :param url: The broker URL.
+        :type url: str
+        :param key: The object key.
+        :type key: tuple
+        :return: True if declared.
+        :rtype: bool
+        """
+        return key in self.content.get(url, ())
+
+    def __len__(self):
+        return sum([len(s) for s in self.content.values()])
+
+
 # --- node -------------------------------------------------------------------
 
 
@@ -255,11 +340,16 @@ class Exchange(BaseExchange):
         :raise: ModelError
         """
         url = url or self.url
+        key = (Declared.EXCHANGE, self.name)
+        if Domain.declared.contains(url, key):
+            return
         adapter = Adapter.find(url)
         impl = adapter.Exchange(self.name, self.policy)
         impl.durable = self.durable
         impl.auto_delete = self.auto_delete
         impl.declare(url)
+        if not self.auto_delete:
+            Domain.declared.add(url, key)
 
     @model
     def delete(self, url=None):
@@ -270,6 +360,7 @@ class Exchange(BaseExchange):
         :raise: ModelError
         """
         url = url or self.url
+        Domain.declared.discard(url, (Declared.EXCHANGE, self.name))
         adapter = Adapter.find(url)
         impl = adapter.Exchange(self.name, self.policy)
         impl.delete(url)
@@ -284,9 +375,14 @@ class Exchange(BaseExchange):
         :type url: str
         """
         url = url or self.url
+        key = (Declared.BINDING, self.name, queue.name)
+        if Domain.declared.contains(url, key):
+            return
         adapter = Adapter.find(url)
         impl = adapter.Exchange(self.name, self.policy)
         impl.bind(queue, url)
+        if not queue.auto_delete:
+            Domain.declared.add(url, key)
 
     @model
     def unbind(self, queue, url=None):
@@ -298,6 +394,7 @@ class Exchange(BaseExchange):
         :type url: str
         """
         url = url or self.url
+        Domain.declared.discard(url, (Declared.BINDING, self.name, queue.name))
         adapter = Adapter.find(url)
         impl = adapter.Exchange(self.name, self.policy)
         impl.unbind(queue, url)
@@ -312,6 +409,10 @@ class BaseQueue(Node):
     :type auto_delete: bool
     :ivar expiration: The auto delete expiration (seconds).
     :type expiration: int
+    :ivar expire_unused: An auto deleted queue with an expiration is
+        deleted only after being unused for the expiration period and
+        not when the last consumer is cancelled.
+    :type expire_unused: bool
     :ivar exclusive: Indicates the queue can only have one consumer.
     :type exclusive: bool
     """
@@ -326,6 +427,16 @@ class BaseQueue(Node):
         self.auto_delete = False
         self.exclusive = False
         self.expiration = 0
+        self.expire_unused = False
+
+    def purge(self, url):
+        """
+        Purge (discard) all queued messages.
+        :param url: The broker URL.
+        :type url: str
+        :raise NotImplementedError: when not supported.
+        """
+        raise NotImplementedError()
 
     def __eq__(self, other):
         return isinstance(other, BaseQueue) and \
@@ -359,13 +470,19 @@ class Queue(BaseQueue):
         :raise: ModelError
         """
         url = url or self.url
+        key = (Declared.QUEUE, self.name)
+        if Domain.declared.contains(url, key):
+            return
         adapter = Adapter.find(url)
         impl = adapter.Queue(self.name)
         impl.durable = self.durable
         impl.auto_delete = self.auto_delete
         impl.expiration = self.expiration
+        impl.expire_unused = self.expire_unused
         impl.exclusive = self.exclusive
         impl.declare(url)
+        if not self.auto_delete:
+            Domain.declared.add(url, key)
 
     @model
     def delete(self, url=None):
@@ -376,6 +493,7 @@ class Queue(BaseQueue):
         :raise: ModelError
         """
         url = url or self.url
+        Domain.declared.discard(url, (Declared.QUEUE, self.name))
         adapter = Adapter.find(url)
         impl = adapter.Queue(self.name)
         impl.delete(url)
@@ -383,7 +501,28 @@ class Queue(BaseQueue):
     @model
     def purge(self, url=None):
         """
-        Purge (drain) all queued messages.
+        Purge all queued messages.
+        The queue is purged by the broker when supported by the
+        adapter.  Otherwise, the queue is drained.
+        :param url: The broker URL.
+        :type url: str
+        """
+        url = url or self.url
+        adapter = Adapter.find(url)
+        impl = adapter.Queue(self.name)
+        try:
+            impl.purge(url)
+            return
+        except NotImplementedError:
+            pass
+        except Exception:
+            log.warn('queue: %s, purge failed (draining)', self.name, exc_info=True)
+        self.drain(url)
+
+    @model
+    def drain(self, url=None):
+        """
+        Drain (read and acknowledge) all queued messages.
         :param url: The broker URL.
         :type url: str
         """
@@ -463,19 +602,24 @@ class Message(Model):
     :ivar _impl: The *real* message.
     :ivar _body: The *real* message body.
     :type _body: str
+    :ivar _properties: The *real* message (application) properties.
+    :type _properties: dict
     """
 
-    def __init__(self, reader, impl, body):
+    def __init__(self, reader, impl, body, properties=None):
         """
         :ivar reader: The reader that read the message.
         :type reader: BaseReader
         :ivar impl: The *real* message.
         :ivar body: The *real* message body.
         :type body: str
+        :ivar properties: The *real* message (application) properties.
+        :type properties: dict
         """
         self._reader = reader
         self._impl = impl
         self._body = body
+        self._properties = properties or {}
 
     @property
     def body(self):
@@ -486,6 +630,15 @@ class Message(Model):
         """
         return self._body
 
+    @property
+    def properties(self):
+        """
+        Get the message (application) properties.
+        :return: The message properties.
+        :rtype: dict
+        """
+        return self._properties
+
     @model
     def ack(self):
         """
@@ -560,6 +713,8 @@ class Reader(BaseReader):
     An AMQP queue reader.
     :ivar authenticator: A message authenticator.
     :type authenticator: gofer.messaging.auth.Authenticator
+    :ivar latency: Message authentication (and validation) latency.
+    :type latency: Latency
     """
 
     def __init__(self, node, url=None):
@@ -574,6 +729,7 @@ class Reader(BaseReader):
         adapter = Adapter.find(url)
         self._impl = adapter.Reader(node, url)
         self.authenticator = None
+        self.latency = Latency()
 
     @model
     def is_open(self):
@@ -653,21 +809,55 @@ class Reader(BaseReader):
         """
         message = self.get(timeout)
         if message:
-            try:
-                document = auth.validate(self.authenticator, message.body)
-                validate(document)
-            except ModelError:
-                message.ack()
-                raise
+            document = self._document(message)
             log.debug('read next: %s', document)
             return message, document
         else:
             return None, None
 
+    def _document(self, message):
+        """
+        Authenticate, decode and validate the message body.
+        The message is acknowledged when not valid.
+        :param message: A received message.
+        :type message: Message
+        :return: The validated document.
+        :rtype: Document
+        :raises: model.InvalidDocument
+        """
+        try:
+            return self.authenticate(message)
+        except ModelError:
+            message.ack()
+            raise
+
+    def authenticate(self, message):
+        """
+        Authenticate, decode and validate the message body.
+        The message is not acknowledged so this may be called
+        by threads other than the thread that read the message.
+        :param message: A received message.
+        :type message: Message
+        :return: The validated document.
+        :rtype: Document
+        :raises: model.InvalidDocument
+        """
+        started = time()
+        try:
+            document = auth.validate(self.authenticator, message.body, message.properties)
+            validate(document)
+            return document
+        finally:
+            self.latency.add(time() - started)
+
     @model
     def search(self, sn, timeout=90):
         """
         Search for a document by serial number.
+        Messages are matched using the raw (encoded) body before being
+        decoded so that non-matching messages are discarded without
+        being authenticated and decoded.  Discarded messages are not
+        validated so invalid documents are only logged (debug).
         :param sn: A serial number.
         :type sn: str
         :param timeout: The read timeout.
@@ -677,11 +867,16 @@ class Reader(BaseReader):
         :raise: ModelError
         """
         while not Thread.aborted():
-            message, document = self.next(timeout)
-            if message:
-                message.ack()
-            else:
+            message = self.get(timeout)
+            if not message:
                 return
+            if not codec.contains(message.body, sn):
+                # not matched
+                message.ack()
+                log.debug('search: %s, not matched (discarded): %d bytes', sn, len(message.body))
+                continue
+            document = self._document(message)
+            message.ack()
             if sn == document.sn:
                 # matched
                 return document
@@ -704,7 +899,7 @@ class BaseSender(Messenger):
         Messenger.__init__(self, url)
         self.durable = True
 
-    def send(self, address, content, ttl):
+    def send(self, address, content, ttl, properties=None):
         """
         Send a message with content.
         :param address: An AMQP address.
@@ -712,6 +907,8 @@ class BaseSender(Messenger):
         :param content: The message content
         :param ttl: Time to Live (seconds)
         :type ttl: float
+        :param properties: The (optional) message (application) properties.
+        :type properties: dict
         :return: The message ID.
         :rtype: str
         """
@@ -763,7 +960,7 @@ class Sender(BaseSender):
         self._impl.close()
 
     @model
-    def send(self, address, content, ttl=None):
+    def send(self, address, content, ttl=None, properties=None):
         """
         Send a message with content.
         :param address: An AMQP address.
@@ -771,9 +968,11 @@ class Sender(BaseSender):
         :param content: The message content
         :param ttl: Time to Live (seconds)
         :type ttl: float
+        :param properties: The (optional) message (application) properties.
+        :type properties: dict
         """
         self._impl.durable = self.durable
-        self._impl.send(address, content, ttl)
+        self._impl.send(address, content, ttl, properties)
 
 
 class Producer(Messenger):
@@ -781,6 +980,14 @@ class Producer(Messenger):
     An AMQP message producer.
     :ivar authenticator: A message authenticator.
     :type authenticator: gofer.messaging.auth.Authenticator
+    :ivar codec: The (optional) name of the codec used to encode documents.
+    :type codec: str
+    :ivar compression: The (optional) size (bytes) above which sent
+        documents are compressed.  None disables compression.
+    :type compression: int
+    :ivar signing: The signing mode (nested|detached).  Detached signatures
+        are sent in the message properties.  (default: nested).
+    :type signing: str
     """
 
     def __init__(self, url=None):
@@ -792,6 +999,9 @@ class Producer(Messenger):
         adapter = Adapter.find(url)
         self._impl = adapter.Sender(url)
         self.authenticator = None
+        self.codec = None
+        self.compression = None
+        self.signing = None
 
     @model
     def is_open(self):
@@ -843,9 +1053,15 @@ class Producer(Messenger):
         routing = (None, address)
         document = Document(sn=sn, version=VERSION, routing=routing)
         document += body
-        unsigned = document.dump()
-        signed = auth.sign(self.authenticator, unsigned)
-        self._impl.send(address, signed, ttl)
+        unsigned = document.dump(self.codec)
+        if self.signing == auth.DETACHED:
+            signed = unsigned
+            properties = auth.detach(self.authenticator, unsigned)
+        else:
+            signed = auth.sign(self.authenticator, unsigned, self.codec)
+            properties = None
+        signed = codec.compress(signed, self.compression)
+        self._impl.send(address, signed, ttl, properties)
         return sn
 
 
@@ -1002,6 +1218,11 @@ class Connector(Model):
     :type url: URL
     :ivar ssl: The SSL configuration.
     :type ssl: SSL
+    :ivar heartbeat: The connection heartbeat (seconds).
+        None indicates the adapter default and 0 disables heartbeats.
+    :type heartbeat: int
+    :ivar failover: Alternate (failover) broker URLs.
+    :type failover: list
     """
 
     @staticmethod
@@ -1027,6 +1248,8 @@ class Connector(Model):
         """
         self.url = URL(url or DEFAULT_URL)
         self.ssl = SSL()
+        self.heartbeat = None
+        self.failover = []
 
     @property
     def domain_id(self):
@@ -1106,6 +1329,22 @@ class Connector(Model):
         """
         Domain.connector.add(self)
 
+    def endpoints(self):
+        """
+        Get the broker endpoints.
+        This connector followed by a connector for each failover URL.
+        The SSL and heartbeat configuration is shared.
+        :return: A list of connectors.
+        :rtype: list
+        """
+        endpoints = [self]
+        for url in self.failover:
+            endpoint = Connector(url)
+            endpoint.ssl = self.ssl
+            endpoint.heartbeat = self.heartbeat
+            endpoints.append(endpoint)
+        return endpoints
+
     def use_ssl(self):
         """
         Get whether SSL should be used.
@@ -1138,7 +1377,10 @@ class Domain(object):
     Model object domains.
     :cvar connector: Collection of connectors.
     :type connector: _Domain
+    :cvar declared: Cache of declared broker model objects.
+    :type declared: Declared
     """
     connector = _Domain()
     broker = connector  # backwards compatibility
+    declared = Declared()
 
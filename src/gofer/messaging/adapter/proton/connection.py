@@ -18,7 +18,7 @@ from proton.utils import BlockingConnection
 from proton.reactor import DynamicNodeProperties
 
 from gofer.common import ThreadSingleton, utf8
-from gofer.messaging.adapter.model import Connector, BaseConnection
+from gofer.messaging.adapter.model import BaseConnection, Domain
 from gofer.messaging.adapter.connect import retry
 
 
@@ -28,6 +28,10 @@ log = getLogger(__name__)
 class Connection(BaseConnection):
     """
     Proton connection.
+    Heartbeats are serviced only while a reader waits on the connection
+    so they are negotiated only for (distinct) reader connections.
+    :ivar heartbeat: Negotiate the configured heartbeat.
+    :type heartbeat: bool
     """
 
     __metaclass__ = ThreadSingleton
@@ -58,12 +62,15 @@ class Connection(BaseConnection):
             domain.set_peer_authentication(mode)
         return domain
 
-    def __init__(self, url):
+    def __init__(self, url, heartbeat=False):
         """
         :param url: The connector url.
         :type url: str
+        :param heartbeat: Negotiate the configured heartbeat.
+        :type heartbeat: bool
         """
         super(Connection, self).__init__(url)
+        self.heartbeat = heartbeat
         self._impl = None
 
     def is_open(self):
@@ -75,17 +82,18 @@ class Connection(BaseConnection):
         return self._impl is not None
 
     @retry(ConnectionException, SSLException)
-    def open(self):
+    def open(self, connector):
         """
         Open a connection to the broker.
+        :param connector: The (selected) broker endpoint.
+        :type connector: Connector
         """
-        if self.is_open():
-            # already open
-            return
-        connector = Connector.find(self.url)
         domain = self.ssl_domain(connector)
         log.info('open: %s', connector)
-        self._impl = BlockingConnection(connector.url.canonical, ssl_domain=domain)
+        self._impl = BlockingConnection(
+            connector.url.canonical,
+            ssl_domain=domain,
+            heartbeat=(self.heartbeat and connector.heartbeat) or None)
         log.info('opened: %s', self.url)
 
     def sender(self, address):
@@ -120,7 +128,9 @@ class Connection(BaseConnection):
     def close(self):
         """
         Close the connection.
+        Declared broker model objects are invalidated.
         """
+        Domain.declared.invalidate(self.url)
         connection = self._impl
         self._impl = None
         try:
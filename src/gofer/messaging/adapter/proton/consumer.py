@@ -50,7 +50,7 @@ class Reader(BaseReader):
         :see: gofer.messaging.adapter.url.URL
         """
         BaseReader.__init__(self, node, url)
-        self.connection = Connection(url)
+        self.connection = Connection(url, heartbeat=True)
         self.receiver = None
 
     def is_open(self):
@@ -104,7 +104,7 @@ class Reader(BaseReader):
         """
         try:
             impl = self.receiver.receive(timeout or NO_DELAY)
-            return Message(self, impl, impl.body)
+            return Message(self, impl, impl.body, impl.properties)
         except Timeout:
             pass
 
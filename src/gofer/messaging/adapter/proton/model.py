@@ -30,11 +30,17 @@ EEXIST = 7
 
 CREATE = 'create'
 DELETE = 'delete'
+PURGE = 'purge'
 
 OBJECT_ID = {
     '_object_name': 'org.apache.qpid.broker:broker:amqp-broker'
 }
 
+QUEUE_ID = 'org.apache.qpid.broker:queue:%s'
+
+# queue (auto-delete) expiration property
+AUTO_DELETE_TIMEOUT = 'qpid.auto_delete_timeout'
+
 
 class Error(Exception):
     """
@@ -63,6 +69,8 @@ class Method(Messenger):
     :type name: str
     :ivar arguments: The method arguments.
     :type arguments: dict
+    :ivar object_id: The QMF object ID.
+    :type object_id: dict
     :ivar connection: A broker connection.
     :type connection: Connection
     :ivar sender: A message sender.
@@ -71,7 +79,7 @@ class Method(Messenger):
     :type receiver: proton.utils.BlockingReceiver
     """
 
-    def __init__(self, url, name, arguments):
+    def __init__(self, url, name, arguments, object_id=OBJECT_ID):
         """
         :param url: The broker url.
         :type url: str
@@ -79,10 +87,13 @@ class Method(Messenger):
         :type name: str
         :param arguments: The method arguments.
         :type arguments: dict
+        :param object_id: The QMF object ID.  (default: the broker).
+        :type object_id: dict
         """
         super(Method, self).__init__(url)
         self.name = name
         self.arguments = arguments
+        self.object_id = object_id
         self.connection = Connection(url)
         self.sender = None
         self.receiver = None
@@ -90,7 +101,7 @@ class Method(Messenger):
     @property
     def body(self):
         return {
-            '_object_id': OBJECT_ID,
+            '_object_id': self.object_id,
             '_method_name': self.name,
             '_arguments': self.arguments
         }
@@ -290,6 +301,9 @@ class Queue(BaseQueue):
                 'durable': self.durable
             }
         }
+        if self.auto_delete and self.expiration:
+            properties = arguments['properties']
+            properties[AUTO_DELETE_TIMEOUT] = self.expiration
         method = Method(url, CREATE, arguments)
         method()
 
@@ -308,3 +322,19 @@ class Queue(BaseQueue):
         }
         method = Method(url, DELETE, arguments)
         method()
+
+    def purge(self, url):
+        """
+        Purge all queued messages.
+        :param url: The broker URL.
+        :type url: str
+        :raise: Error
+        """
+        arguments = {
+            'request': 0  # all
+        }
+        object_id = {
+            '_object_name': QUEUE_ID % self.name
+        }
+        method = Method(url, PURGE, arguments, object_id)
+        method()
@@ -21,7 +21,7 @@ from gofer.messaging.adapter.proton.reliability import reliable, resend
 log = getLogger(__name__)
 
 
-def build_message(body, ttl, durable):
+def build_message(body, ttl, durable, properties=None):
     """
     Construct a message object.
     :param body: The message body.
@@ -29,13 +29,17 @@ def build_message(body, ttl, durable):
     :type ttl: float
     :param durable: The message is durable.
     :type durable: bool
+    :param properties: The (optional) application properties.
+    :type properties: dict
     :return: The message.
     :rtype: Message
     """
+    options = dict(body=body, durable=durable)
     if ttl:
-        return Message(body=body, durable=durable, ttl=ttl)
-    else:
-        return Message(body=body, durable=durable)
+        options.update(ttl=ttl)
+    if properties:
+        options.update(properties=properties)
+    return Message(**options)
 
 
 class Sender(BaseSender):
@@ -86,7 +90,7 @@ class Sender(BaseSender):
         pass
 
     @resend
-    def send(self, address, content, ttl=None):
+    def send(self, address, content, ttl=None, properties=None):
         """
         Send a message.
         :param address: An AMQP address.
@@ -95,10 +99,12 @@ class Sender(BaseSender):
         :type content: buf
         :param ttl: Time to Live (seconds)
         :type ttl: float
+        :param properties: The (optional) application properties.
+        :type properties: dict
         """
         sender = self.connection.sender(address)
         try:
-            message = build_message(content, ttl, self.durable)
+            message = build_message(content, ttl, self.durable, properties)
             sender.send(message)
             log.debug('sent (%s)', address)
         finally:
@@ -19,14 +19,12 @@ from proton.utils import SendException, LinkDetached
 from gofer import Thread
 from gofer.messaging.adapter.model import NotFound
 from gofer.messaging.adapter.reliability import DAY
+from gofer.messaging.adapter.connect import recover, DELAY
 
 
 log = getLogger(__name__)
 
 
-# reliable settings
-DELAY = 10   # seconds
-
 # resend settings
 RESEND_DELAY = 10  # seconds
 MAX_RESEND = DAY / RESEND_DELAY
@@ -38,18 +36,19 @@ NOT_FOUND = 'amqp:not-found'
 def reliable(fn):
     def _fn(messenger, *args, **kwargs):
         repair = lambda: None
+        delay = DELAY
         while not Thread.aborted():
             try:
                 repair()
                 return fn(messenger, *args, **kwargs)
             except LinkDetached, le:
                 if le.condition != NOT_FOUND:
-                    sleep(DELAY)
+                    delay = recover(messenger.url, delay)
                     repair = messenger.repair
                 else:
                     raise NotFound(*le.args)
             except ConnectionException:
-                sleep(DELAY)
+                delay = recover(messenger.url, delay)
                 repair = messenger.repair
     return _fn
 
@@ -23,8 +23,8 @@ from qpid.messaging import Connection as RealConnection
 from qpid.messaging.transports import TRANSPORTS
 from qpid.messaging import ConnectionError
 
-from gofer.common import ThreadSingleton
-from gofer.messaging.adapter.model import Connector, BaseConnection
+from gofer.common import ThreadSingleton, nvl
+from gofer.messaging.adapter.model import BaseConnection, Domain
 from gofer.messaging.adapter.connect import retry
 
 
@@ -36,6 +36,9 @@ AMQPS = 'amqps'
 TCP = 'tcp'
 SSL = 'ssl'
 
+# heartbeat (seconds)
+HEARTBEAT = 10
+
 
 class Connection(BaseConnection):
     """
@@ -93,14 +96,12 @@ class Connection(BaseConnection):
         return self._impl is not None
 
     @retry(ConnectionError)
-    def open(self):
+    def open(self, connector):
         """
         Open a connection to the broker.
+        :param connector: The (selected) broker endpoint.
+        :type connector: Connector
         """
-        if self.is_open():
-            # already open
-            return
-        connector = Connector.find(self.url)
         Connection.add_transports()
         domain = self.ssl_domain(connector)
         log.info('open: %s', connector)
@@ -111,7 +112,7 @@ class Connection(BaseConnection):
             transport=connector.url.scheme,
             username=connector.userid,
             password=connector.password,
-            heartbeat=10,
+            heartbeat=nvl(connector.heartbeat, HEARTBEAT),
             **domain)
         impl.open()
         self._impl = impl
@@ -128,7 +129,9 @@ class Connection(BaseConnection):
     def close(self):
         """
         Close the connection.
+        Declared broker model objects are invalidated.
         """
+        Domain.declared.invalidate(self.url)
         connection = self._impl
         self._impl = None
         try:
@@ -11,21 +11,18 @@
 #
 # Jeff Ortel (jortel@redhat.com)
 
-from time import sleep
-
 from qpid.messaging import NotFound as _NotFound
 from qpid.messaging import ConnectionError, LinkError
 
 from gofer.common import Thread
 from gofer.messaging.adapter.model import NotFound
-
-
-DELAY = 10   # seconds
+from gofer.messaging.adapter.connect import recover, DELAY
 
 
 def reliable(fn):
     def _fn(thing, *args, **kwargs):
         repair = lambda: None
+        delay = DELAY
         while not Thread.aborted():
             try:
                 repair()
@@ -33,9 +30,9 @@ def reliable(fn):
             except _NotFound, e:
                 raise NotFound(*e.args)
             except LinkError:
-                sleep(DELAY)
+                delay = recover(thing.url, delay)
                 repair = thing.repair
             except ConnectionError:
-                sleep(DELAY)
+                delay = recover(thing.url, delay)
                 repair = thing.repair
     return _fn
\ No newline at end of file
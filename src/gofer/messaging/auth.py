@@ -22,11 +22,20 @@ from base64 import b64encode, b64decode
 
 from gofer.common import utf8
 from gofer.messaging.model import Document, InvalidDocument
+from gofer.messaging.codec import decompress
 
 
 log = getLogger(__name__)
 
 
+# signing modes
+NESTED = 'nested'
+DETACHED = 'detached'
+
+# the message property containing a detached signature
+SIGNATURE = 'gofer.signature'
+
+
 class ValidationFailed(InvalidDocument):
     """
     Message validation failed.
@@ -77,7 +86,7 @@ class Authenticator(object):
         raise NotImplementedError()
 
 
-def sign(authenticator, message):
+def sign(authenticator, message, codec=None):
     """
     Sign the message using the specified validator.
     signed document:
@@ -87,28 +96,52 @@ def sign(authenticator, message):
       }
     :param authenticator: A message authenticator.
     :type authenticator: Authenticator
-    :param message: A (signed) json encoded AMQP message.
+    :param message: A (signed) encoded AMQP message.
     :rtype message: str
+    :param codec: The (optional) codec name used to encode the signed document.
+    :type codec: str
     """
     if not authenticator:
         return message
     try:
-        h = sha256()
-        h.update(message)
-        digest = h.hexdigest()
-        signature = authenticator.sign(digest)
+        signature = authenticator.sign(digest(message))
         signed = Document(message=message, signature=encode(signature))
-        message = signed.dump()
+        message = signed.dump(codec)
     except Exception, e:
         log.info(utf8(e))
         log.debug(message, exc_info=True)
     return message
 
 
-def validate(authenticator, message):
+def detach(authenticator, message):
+    """
+    Sign the message using the specified validator.
+    The signature is detached and returned as message properties
+    so the message is sent unchanged.
+    :param authenticator: A message authenticator.
+    :type authenticator: Authenticator
+    :param message: An encoded AMQP message.
+    :rtype message: str
+    :return: The message properties containing the signature.
+    :rtype: dict
+    """
+    properties = {}
+    if not authenticator:
+        return properties
+    try:
+        signature = authenticator.sign(digest(message))
+        properties[SIGNATURE] = encode(signature)
+    except Exception, e:
+        log.info(utf8(e))
+        log.debug(message, exc_info=True)
+    return properties
+
+
+def validate(authenticator, message, properties=None):
     """
     Validate the document using the specified validator.
-    signed document:
+    The signature is either detached and contained in the
+    message properties or the message is a signed document:
       {
         message: <message>,
         signature: <signature>
@@ -117,19 +150,24 @@ def validate(authenticator, message):
     :type authenticator: Authenticator
     :param message: A json encoded AMQP message.
     :rtype message: str
+    :param properties: The (optional) message properties.
+    :type properties: dict
     :return: The authenticated document.
     :rtype: Document
     :raises ValidationFailed: when message is not valid.
     """
     if not message:
         return
-    document, original, signature = peal(message)
+    signature = (properties or {}).get(SIGNATURE)
+    if signature:
+        original = decompress(message)
+        document = Document()
+        document.load(original)
+    else:
+        document, original, signature = peal(message)
     try:
         if authenticator:
-            h = sha256()
-            h.update(original)
-            digest = h.hexdigest()
-            authenticator.validate(document, digest, decode(signature))
+            authenticator.validate(document, digest(original), decode(signature))
         return document
     except ValidationFailed, failed:
         failed.document = original
@@ -152,6 +190,7 @@ def peal(message):
           signature: <signature>
         }
      - A plain (unsigned) RMI request.
+    The message is decompressed as needed.
     Returns:
     - The document to be passed along.
     - The original (signed) AMQP message to be validated.
@@ -161,6 +200,7 @@ def peal(message):
     :return: tuple of: (document, original, signature)
     :rtype: tuple
     """
+    message = decompress(message)
     document = Document()
     document.load(message)
     signature = document.signature
@@ -173,6 +213,19 @@ def peal(message):
     return document, original, signature
 
 
+def digest(message):
+    """
+    Get the digest of the message.
+    :param message: An encoded AMQP message.
+    :rtype message: str
+    :return: The hex digest.
+    :rtype: str
+    """
+    h = sha256()
+    h.update(message)
+    return h.hexdigest()
+
+
 def encode(signature):
     if signature:
         return b64encode(signature)
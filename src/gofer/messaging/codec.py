@@ -0,0 +1,343 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Document (wire) codecs.
+The codec used to encode a document is detected using the leading
+byte of the encoded document so that readers decode documents
+produced by peers using any of the supported codecs.
+Encoded documents larger than a threshold may be (zlib) compressed.
+Compressed documents are detected using the zlib header and are
+transparently decompressed.
+"""
+
+import zlib
+
+from uuid import uuid4
+
+from gofer.common import json, Options
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# --- constants --------------------------------------------------------------
+
+JSON = 'json'
+COMPACT = 'compact'
+MSGPACK = 'msgpack'
+
+# compression level (favors speed)
+LEVEL = 1
+
+
+# --- exceptions -------------------------------------------------------------
+
+
+class CodecNotFound(ValueError):
+    """
+    Codec not found or not supported.
+    """
+
+    DESCRIPTION = 'Codec: %s, not-found'
+
+    def __init__(self, name):
+        ValueError.__init__(self, CodecNotFound.DESCRIPTION % name)
+        self.name = name
+
+
+# --- utils ------------------------------------------------------------------
+
+
+def default(thing):
+    """
+    Encoder hook used to encode objects not natively supported.
+    Options are encoded as their underlying dictionary so that
+    the (nested) document need not be copied before encoding.
+    Objects with __slots__ are encoded as a dictionary of the slots.
+    :param thing: An object.
+    :return: The encoded object.
+    :raise TypeError: when not supported.
+    """
+    if isinstance(thing, Options):
+        return thing.__dict__
+    slots = getattr(thing, '__slots__', None)
+    if slots is not None:
+        return dict([(n, getattr(thing, n, None)) for n in slots])
+    raise TypeError('%r is not serializable' % thing)
+
+
+class Splice(object):
+    """
+    Splice pre-encoded (JSON) objects into an encoded document.
+    Objects having a pre-encoded form (__encoded__) are encoded as a
+    placeholder that is replaced by the pre-encoded form so the
+    object is not encoded again.
+    :ivar token: A (unique) token used to build placeholders.
+    :type token: str
+    :ivar encoded: The pre-encoded objects to be spliced.
+    :type encoded: list
+    """
+
+    __slots__ = ('token', 'encoded')
+
+    def __init__(self):
+        self.token = None
+        self.encoded = []
+
+    def default(self, thing):
+        """
+        Encoder hook.
+        :param thing: An object.
+        :return: The encoded object or placeholder.
+        :raise TypeError: when not supported.
+        """
+        encoded = getattr(thing, '__encoded__', None)
+        if not encoded:
+            return default(thing)
+        if self.token is None:
+            self.token = uuid4().hex
+        self.encoded.append(encoded)
+        return '%s:%d' % (self.token, len(self.encoded) - 1)
+
+    def __call__(self, s):
+        """
+        Replace the placeholders with the pre-encoded objects.
+        :param s: An encoded string.
+        :type s: str
+        :return: The spliced string.
+        :rtype: str
+        """
+        for n, encoded in enumerate(self.encoded):
+            s = s.replace('"%s:%d"' % (self.token, n), encoded, 1)
+        return s
+
+
+# --- codecs -----------------------------------------------------------------
+
+
+class Codec(object):
+    """
+    A document codec.
+    :cvar NAME: The codec name.
+    :type NAME: str
+    """
+
+    NAME = None
+
+    def detected(self, s):
+        """
+        Get whether the encoded string was encoded by this codec.
+        :param s: An encoded string.
+        :type s: str
+        :return: True if detected.
+        :rtype: bool
+        """
+        raise NotImplementedError()
+
+    def encode(self, thing):
+        """
+        Encode the object.
+        :param thing: An object.
+        :return: The encoded string.
+        :rtype: str
+        """
+        raise NotImplementedError()
+
+    def decode(self, s):
+        """
+        Decode the string.
+        :param s: An encoded string.
+        :type s: str
+        :return: The decoded object.
+        """
+        raise NotImplementedError()
+
+
+class Json(Codec):
+    """
+    The (default) JSON codec.
+    Keys are sorted to provide a canonical encoding.
+    """
+
+    NAME = JSON
+
+    def detected(self, s):
+        return s.lstrip()[:1] in ('{', '[')
+
+    def encode(self, thing):
+        splice = Splice()
+        return splice(json.dumps(thing, sort_keys=True, default=splice.default))
+
+    def decode(self, s):
+        return json.loads(s)
+
+
+class Compact(Json):
+    """
+    Compact JSON codec.
+    Keys are not sorted and whitespace is omitted.  Decoded as JSON
+    so documents are compatible with peers using the JSON codec.
+    """
+
+    NAME = COMPACT
+
+    def encode(self, thing):
+        splice = Splice()
+        return splice(json.dumps(thing, separators=(',', ':'), default=splice.default))
+
+
+class MsgPack(Codec):
+    """
+    The (binary) msgpack codec.
+    Requires the (optional) msgpack package.
+    Documents are always encoded as a map.
+    """
+
+    NAME = MSGPACK
+
+    def detected(self, s):
+        if not s:
+            return False
+        n = ord(s[0])
+        return 0x80 <= n <= 0x8f or n in (0xde, 0xdf)
+
+    def encode(self, thing):
+        if msgpack is None:
+            raise CodecNotFound(self.NAME)
+        return msgpack.packb(thing, default=default)
+
+    def decode(self, s):
+        if msgpack is None:
+            raise CodecNotFound(self.NAME)
+        return msgpack.unpackb(s)
+
+
+CODECS = [
+    Json(),
+    Compact(),
+    MsgPack(),
+]
+
+
+def find(name=None):
+    """
+    Find a codec by name.
+    :param name: A codec name.  (default: json).
+    :type name: str
+    :return: The codec.
+    :rtype: Codec
+    :raise CodecNotFound: when not found.
+    """
+    name = name or JSON
+    for codec in CODECS:
+        if codec.NAME == name:
+            return codec
+    raise CodecNotFound(name)
+
+
+def detect(s):
+    """
+    Detect the codec used to encode the specified string.
+    Defaults to JSON when not detected.
+    :param s: An encoded string.
+    :type s: str
+    :return: The codec.
+    :rtype: Codec
+    """
+    for codec in CODECS:
+        if codec.detected(s):
+            return codec
+    return CODECS[0]
+
+
+def contains(s, value):
+    """
+    Get whether the (possibly compressed) encoded string contains
+    the value without decoding.  All of the supported codecs encode
+    (ascii) strings verbatim, including documents nested in signed
+    documents.  Used to cheaply filter documents by envelope values
+    such as the serial number.  A negative result is definitive and
+    a positive result must be verified using the decoded document.
+    :param s: An encoded string.
+    :type s: str
+    :param value: An (ascii) value.
+    :type value: str
+    :return: True if (possibly) contained.
+    :rtype: bool
+    """
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return value in decompress(s)
+
+
+# --- compression ------------------------------------------------------------
+
+
+def compressed(s):
+    """
+    Get whether the string is zlib compressed.
+    The zlib header is: CMF (deflate with 32K window) and FLG
+    where (CMF * 256 + FLG) is a multiple of 31.  This cannot be
+    confused with the leading bytes of documents encoded by any
+    of the supported codecs.
+    :param s: An encoded string.
+    :type s: str
+    :return: True if compressed.
+    :rtype: bool
+    """
+    if len(s) < 2 or s[0] != 'x':
+        return False
+    return (ord(s[0]) * 256 + ord(s[1])) % 31 == 0
+
+
+def compress(s, threshold=None):
+    """
+    Compress the encoded string when larger than the threshold.
+    The string is returned unchanged when compression is disabled,
+    the string is smaller than the threshold or compression does
+    not reduce the size.
+    :param s: An encoded string.
+    :type s: str
+    :param threshold: The size (bytes) above which the string is
+        compressed.  None (or 0) disables compression.
+    :type threshold: int
+    :return: The (possibly) compressed string.
+    :rtype: str
+    """
+    if not threshold or len(s) <= threshold:
+        return s
+    if isinstance(s, unicode):
+        s = s.encode('utf-8')
+    z = zlib.compress(s, LEVEL)
+    if len(z) < len(s):
+        return z
+    else:
+        return s
+
+
+def decompress(s):
+    """
+    Decompress the string when compressed.
+    :param s: A (possibly) compressed string.
+    :type s: str
+    :return: The decompressed string.
+    :rtype: str
+    :raise ValueError: when not valid compressed data.
+    """
+    if not compressed(s):
+        return s
+    try:
+        return zlib.decompress(s)
+    except zlib.error, e:
+        raise ValueError(str(e))
@@ -9,10 +9,16 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+
 from time import sleep
+from hashlib import sha1
 from logging import getLogger
+from threading import Event
+from collections import deque
 
-from gofer.common import Thread, released
+from gofer.common import Thread, released, mkdir
+from gofer.threadpool import ThreadPool
 from gofer.messaging.model import InvalidDocument
 from gofer.messaging.adapter.model import Reader
 
@@ -20,9 +26,228 @@ from gofer.messaging.adapter.model import Reader
 log = getLogger(__name__)
 
 
+class Job(object):
+    """
+    A message authentication job.
+    :ivar message: The message to be authenticated.
+    :type message: gofer.messaging.adapter.model.Message
+    :ivar document: The authenticated document.
+    :type document: gofer.messaging.model.Document
+    :ivar error: The exception raised by authentication.
+    :type error: Exception
+    :ivar done: Set when the job has completed.
+    :type done: Event
+    """
+
+    def __init__(self, message):
+        """
+        :param message: The message to be authenticated.
+        :type message: gofer.messaging.adapter.model.Message
+        """
+        self.message = message
+        self.document = None
+        self.error = None
+        self.done = Event()
+
+    def __call__(self, reader):
+        """
+        Authenticate and validate the message.
+        :param reader: The reader used to authenticate.
+        :type reader: Reader
+        """
+        try:
+            self.document = reader.authenticate(self.message)
+        except Exception, e:
+            self.error = e
+        self.done.set()
+
+
+class Pipeline(object):
+    """
+    An ordered message authentication pipeline.
+    Read messages are authenticated (and validated) concurrently using
+    a thread pool and completed in the order in which they were read.
+    :ivar reader: The reader used to authenticate messages.
+    :type reader: Reader
+    :ivar pool: The thread pool.
+    :type pool: ThreadPool
+    :ivar backlog: The maximum number of messages in the pipeline.
+    :type backlog: int
+    :ivar jobs: The queued jobs in the order read.
+    :type jobs: deque
+    """
+
+    def __init__(self, reader, threads):
+        """
+        :param reader: The reader used to authenticate messages.
+        :type reader: Reader
+        :param threads: The number of authentication threads.
+        :type threads: int
+        """
+        self.reader = reader
+        self.pool = ThreadPool(threads)
+        self.backlog = threads * 2
+        self.jobs = deque()
+
+    def full(self):
+        """
+        Get whether the pipeline is full.
+        :return: True if full.
+        :rtype: bool
+        """
+        return len(self.jobs) >= self.backlog
+
+    def put(self, message):
+        """
+        Add a message to be authenticated.
+        :param message: A read message.
+        :type message: gofer.messaging.adapter.model.Message
+        """
+        job = Job(message)
+        self.jobs.append(job)
+        self.pool.run(job, self.reader)
+
+    def get(self, block=True):
+        """
+        Get completed jobs in the order in which they were read.
+        :param block: Wait for the oldest job to complete.
+        :type block: bool
+        :return: The list of completed jobs.
+        :rtype: list
+        """
+        completed = []
+        while self.jobs:
+            job = self.jobs[0]
+            while block and not completed and not job.done.isSet():
+                if Thread.aborted():
+                    return completed
+                job.done.wait(1)
+            if not job.done.isSet():
+                break
+            completed.append(self.jobs.popleft())
+        return completed
+
+    def clear(self):
+        """
+        Discard queued jobs.
+        The unacknowledged messages are redelivered by the broker.
+        """
+        self.jobs.clear()
+
+    def shutdown(self):
+        """
+        Shutdown the pipeline.
+        """
+        self.clear()
+        self.pool.shutdown()
+
+    def __len__(self):
+        return len(self.jobs)
+
+
+class Quarantine(object):
+    """
+    Poison message accounting.
+    Messages are identified by a digest of the body.  A message that
+    fails to be processed is rejected (requeued) to be redelivered until
+    it has failed LIMIT times.  It is then quarantined: written to the
+    quarantine directory (when specified) and discarded.
+    :cvar LIMIT: The failures after which a message is quarantined.
+    :type LIMIT: int
+    :cvar CAPACITY: The max number of messages tracked.
+    :type CAPACITY: int
+    :ivar path: The (optional) quarantine directory.
+    :type path: str
+    :ivar failures: Failure count by digest.
+    :type failures: dict
+    :ivar history: The tracked digests (oldest first).
+    :type history: deque
+    """
+
+    LIMIT = 3
+    CAPACITY = 1000
+
+    @staticmethod
+    def digest(message):
+        """
+        Get the digest used to identify a message.
+        :param message: A message.
+        :type message: gofer.messaging.adapter.model.Message
+        :return: The hex digest.
+        :rtype: str
+        """
+        body = message.body
+        if isinstance(body, unicode):
+            body = body.encode('utf-8')
+        return sha1(body).hexdigest()
+
+    def __init__(self, path=None):
+        """
+        :param path: The (optional) quarantine directory.
+        :type path: str
+        """
+        self.path = path
+        self.failures = {}
+        self.history = deque()
+
+    def failed(self, message):
+        """
+        Record that the message failed to be processed.
+        :param message: The failed message.
+        :type message: gofer.messaging.adapter.model.Message
+        :return: True when the message has been quarantined and should be
+            discarded.  False when the message should be redelivered.
+        :rtype: bool
+        """
+        digest = self.digest(message)
+        count = self.failures.get(digest, 0) + 1
+        if count < self.LIMIT:
+            if digest not in self.failures:
+                self.history.append(digest)
+            self.failures[digest] = count
+            while len(self.history) > self.CAPACITY:
+                self.failures.pop(self.history.popleft(), None)
+            return False
+        self.failures.pop(digest, None)
+        self.write(digest, message)
+        return True
+
+    def write(self, digest, message):
+        """
+        Write the message to the quarantine directory.
+        :param digest: The message digest.
+        :type digest: str
+        :param message: The message to quarantine.
+        :type message: gofer.messaging.adapter.model.Message
+        """
+        if not self.path:
+            log.error('message: %s, discarded', digest)
+            return
+        try:
+            mkdir(self.path)
+            path = os.path.join(self.path, digest)
+            fp = open(path, 'w')
+            try:
+                body = message.body
+                if isinstance(body, unicode):
+                    body = body.encode('utf-8')
+                fp.write(body)
+            finally:
+                fp.close()
+            log.error('message: %s, quarantined', path)
+        except Exception:
+            log.exception('message: %s, discarded', digest)
+
+
 class ConsumerThread(Thread):
     """
     An AMQP (abstract) consumer.
+    :ivar auth_threads: The number of threads used to authenticate and
+        validate read documents.  Documents are dispatched in the order
+        read.  0 = authenticated by the consumer thread.
+    :type auth_threads: int
+    :ivar quarantine: Poison message accounting.
+    :type quarantine: Quarantine
     """
 
     def __init__(self, node, url, wait=3):
@@ -39,7 +264,10 @@ class ConsumerThread(Thread):
         self.node = node
         self.wait = wait
         self.authenticator = None
+        self.auth_threads = 0
+        self.quarantine = Quarantine()
         self.reader = None
+        self.pipeline = None
         self.setDaemon(True)
 
     def shutdown(self):
@@ -55,12 +283,16 @@ class ConsumerThread(Thread):
         """
         self.reader = Reader(self.node, self.url)
         self.reader.authenticator = self.authenticator
+        if self.auth_threads:
+            self.pipeline = Pipeline(self.reader, self.auth_threads)
         self.open()
         try:
             while not Thread.aborted():
                 self.read()
         finally:
             self.close()
+            if self.pipeline is not None:
+                self.pipeline.shutdown()
 
     def open(self):
         """
@@ -87,6 +319,9 @@ class ConsumerThread(Thread):
         """
         Read and process incoming documents.
         """
+        if self.pipeline is not None:
+            self.read_pipelined()
+            return
         try:
             wait = self.wait
             reader = self.reader
@@ -95,8 +330,7 @@ class ConsumerThread(Thread):
                 # wait expired
                 return
             log.debug('{%s} read: %s', self.getName(), document)
-            self.dispatch(document)
-            message.ack()
+            self.process(message, document)
         except InvalidDocument, invalid:
             self.rejected(invalid.code, invalid.description, invalid.document, invalid.details)
         except Exception:
@@ -105,6 +339,77 @@ class ConsumerThread(Thread):
             self.close()
             self.open()
 
+    def read_pipelined(self):
+        """
+        Read and process incoming documents using the authentication pipeline.
+        Messages are read without waiting while authentication is pending and
+        completed documents are dispatched in the order read.  Messages are
+        only acknowledged by this thread.
+        """
+        pipeline = self.pipeline
+        try:
+            message = None
+            if not pipeline.full():
+                if len(pipeline):
+                    wait = 0
+                else:
+                    wait = self.wait
+                message = self.reader.get(wait)
+                if message is not None:
+                    pipeline.put(message)
+            block = message is None or pipeline.full()
+            completed = pipeline.get(block)
+            for job in completed:
+                if job.error is None:
+                    log.debug('{%s} read: %s', self.getName(), job.document)
+                    self.process(job.message, job.document)
+                    continue
+                if isinstance(job.error, InvalidDocument):
+                    job.message.ack()
+                    invalid = job.error
+                    self.rejected(invalid.code, invalid.description, invalid.document, invalid.details)
+                    continue
+                log.error('{%s} authenticate failed: %s', self.getName(), job.error)
+                self.failed(job.message)
+            if completed:
+                log.debug('{%s} authentication: %s', self.getName(), self.reader.latency)
+        except Exception:
+            log.exception(self.getName())
+            pipeline.clear()
+            sleep(60)
+            self.close()
+            self.open()
+
+    def process(self, message, document):
+        """
+        Dispatch the document and acknowledge the message.
+        A failed dispatch is a message (not a messaging) failure so
+        the message is set aside and consumption continues.
+        :param message: The read message.
+        :type message: gofer.messaging.adapter.model.Message
+        :param document: The read document.
+        :type document: gofer.messaging.model.Document
+        """
+        try:
+            self.dispatch(document)
+        except Exception:
+            log.exception('{%s} dispatch failed', self.getName())
+            self.failed(message)
+            return
+        message.ack()
+
+    def failed(self, message):
+        """
+        Set aside a message that failed to be processed.
+        The message is requeued to be redelivered until quarantined.
+        :param message: The failed message.
+        :type message: gofer.messaging.adapter.model.Message
+        """
+        if self.quarantine.failed(message):
+            message.ack()
+        else:
+            message.reject(True)
+
     def rejected(self, code, description, document, details):
         """
         Called to process the received (invalid) document.
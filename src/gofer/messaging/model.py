@@ -12,6 +12,7 @@
 from logging import getLogger
 
 from gofer.common import json, Options, utf8
+from gofer.messaging import codec
 
 
 log = getLogger(__name__)
@@ -103,34 +104,24 @@ class Document(Options):
 
     def load(self, s):
         """
-        Load using a json string.
-        :param s: A json encoded string.
+        Load using an encoded string.
+        The codec is detected and compressed strings
+        are decompressed.
+        :param s: An encoded string.
         :type s: str
         """
-        d = json.loads(s)
+        s = codec.decompress(s)
+        d = codec.detect(s).decode(s)
         self.__dict__.update(d)
         return self
 
-    def dump(self):
+    def dump(self, name=None):
         """
-        Dump to a json string.
-        :return: A json encoded string.
+        Dump to an encoded string.
+        :param name: The (optional) codec name.  (default: json).
+        :type name: str
+        :return: An encoded string.
         :rtype: str
+        :raise CodecNotFound: when codec not found.
         """
-        def fn(thing):
-            if isinstance(thing, Options):
-                thing = dict(thing.__dict__)
-                for k, v in thing.items():
-                    thing[k] = fn(v)
-                return thing
-            if isinstance(thing, dict):
-                thing = dict(thing)
-                for k, v in thing.items():
-                    thing[k] = fn(v)
-                return thing
-            if isinstance(thing, (tuple, list)):
-                thing = [fn(e) for e in thing]
-                return thing
-            return thing
-        d = fn(self)
-        return json.dumps(d, sort_keys=True)
+        return codec.find(name).encode(self)
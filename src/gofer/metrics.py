@@ -22,8 +22,9 @@ import time
 
 from math import modf
 from datetime import datetime
+from threading import RLock
 
-from gofer.common import utf8
+from gofer.common import utf8, synchronized
 
 
 def timestamp():
@@ -68,3 +69,58 @@ class Timer:
 
     def __str__(self):
         return utf8(self)
+
+
+class Latency:
+    """
+    Thread safe latency statistics.
+    :ivar count: The number of samples.
+    :type count: int
+    :ivar total: The sum of all samples (seconds).
+    :type total: float
+    :ivar max: The largest sample (seconds).
+    :type max: float
+    :ivar last: The last sample (seconds).
+    :type last: float
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.__mutex = RLock()
+
+    @synchronized
+    def add(self, seconds):
+        """
+        Add a sample.
+        :param seconds: The measured latency in seconds.
+        :type seconds: float
+        """
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+
+    @synchronized
+    def mean(self):
+        """
+        Get the mean latency.
+        :return: The mean latency in seconds.
+        :rtype: float
+        """
+        if self.count:
+            return self.total / self.count
+        else:
+            return 0.0
+
+    def __unicode__(self):
+        return 'count: %d mean: %d (ms) max: %d (ms) last: %d (ms)' % (
+            self.count,
+            self.mean() * 1000,
+            self.max * 1000,
+            self.last * 1000)
+
+    def __str__(self):
+        return utf8(self)
@@ -17,13 +17,21 @@
 PAM module for python
 """
 
-__all__ = ['authenticate']
+__all__ = ['authenticate', 'invalidate']
 
+import os
+import hmac
+
+from hashlib import sha256
+from time import time
+from threading import RLock
 from ctypes import CDLL, POINTER, Structure, CFUNCTYPE, cast, byref, sizeof
 from ctypes import c_void_p, c_uint, c_char_p, c_char, c_int
 from ctypes.util import find_library
 from logging import getLogger
 
+from gofer.common import synchronized
+
 
 libc = CDLL(find_library('c'))
 libpam = CDLL(find_library('pam'))
@@ -108,9 +116,124 @@ pam_end.restype = c_int
 pam_end.argtypes = [PamHandle, c_int]
 
 
+class Cache(object):
+    """
+    Cache of successful authentications.
+    Entries are keyed by (user, salted password hash, service) and
+    expire after TTL seconds.  Failed authentications are not cached.
+    Disabled when the TTL is 0 (default).
+    :ivar ttl: The time (seconds) an entry is valid.  0 = disabled.
+    :type ttl: int
+    :ivar size: The max number of entries.
+    :type size: int
+    :ivar entries: Expiration by key.
+    :type entries: dict
+    :ivar salt: The (random) salt used to hash passwords.
+    :type salt: str
+    """
+
+    def __init__(self, ttl=0, size=100):
+        """
+        :param ttl: The time (seconds) an entry is valid.  0 = disabled.
+        :type ttl: int
+        :param size: The max number of entries.
+        :type size: int
+        """
+        self.ttl = ttl
+        self.size = size
+        self.entries = {}
+        self.salt = os.urandom(16)
+        self.__mutex = RLock()
+
+    def key(self, user, password, service):
+        """
+        Get the key for an authentication.
+        :param user: The username.
+        :type user: str
+        :param password: The password.
+        :type password: str
+        :param service: The PAM service.
+        :type service: str
+        :return: tuple of: (user, hash, service)
+        :rtype: tuple
+        """
+        if isinstance(password, unicode):
+            password = password.encode('utf-8')
+        digest = hmac.new(self.salt, password, sha256).hexdigest()
+        return user, digest, service
+
+    @synchronized
+    def valid(self, user, password, service):
+        """
+        Get whether the authentication is cached (and not expired).
+        :param user: The username.
+        :type user: str
+        :param password: The password.
+        :type password: str
+        :param service: The PAM service.
+        :type service: str
+        :return: True if cached.
+        :rtype: bool
+        """
+        if not self.ttl:
+            return False
+        key = self.key(user, password, service)
+        expiration = self.entries.get(key)
+        if expiration is None:
+            return False
+        if time() < expiration:
+            return True
+        del self.entries[key]
+        return False
+
+    @synchronized
+    def add(self, user, password, service):
+        """
+        Cache a successful authentication.
+        When full, expired entries are evicted followed by the
+        entry that expires first.
+        :param user: The username.
+        :type user: str
+        :param password: The password.
+        :type password: str
+        :param service: The PAM service.
+        :type service: str
+        """
+        if not self.ttl:
+            return
+        now = time()
+        key = self.key(user, password, service)
+        if key not in self.entries and len(self.entries) >= self.size:
+            for k, expiration in self.entries.items():
+                if expiration <= now:
+                    del self.entries[k]
+            if len(self.entries) >= self.size:
+                oldest = min(self.entries, key=self.entries.get)
+                del self.entries[oldest]
+        self.entries[key] = now + self.ttl
+
+    @synchronized
+    def invalidate(self, user=None):
+        """
+        Invalidate cached authentications.
+        :param user: The (optional) username.  All when not specified.
+        :type user: str
+        """
+        if user is None:
+            self.entries.clear()
+            return
+        for key in self.entries.keys():
+            if key[0] == user:
+                del self.entries[key]
+
+
+cache = Cache()
+
+
 def authenticate(user, password, service=None):
     """
     Authenticate using PAM.
+    Successful authentications are cached when the cache is enabled.
     :param user: The username to authenticate.
     :type user: str
     :param password: The password to authenticate.
@@ -119,11 +242,26 @@ def authenticate(user, password, service=None):
     :return: True if authentication succeeds.
     :rtype: bool
     """
+    service = service or SERVICE
+    if cache.valid(user, password, service):
+        return True
     try:
-        return _authenticate(user, password, service or SERVICE)
+        authenticated = _authenticate(user, password, service)
     except Exception:
         log.exception('PAM authentication failed')
         return False
+    if authenticated:
+        cache.add(user, password, service)
+    return authenticated
+
+
+def invalidate(user=None):
+    """
+    Invalidate cached authentications.
+    :param user: The (optional) username.  All when not specified.
+    :type user: str
+    """
+    cache.invalidate(user)
 
 
 def _authenticate(user, password, service):
@@ -17,11 +17,14 @@
 Provides async AMQP message consumer classes.
 """
 
+from threading import Event, RLock
+from collections import deque
 from logging import getLogger
 
-from gofer.common import utf8
-from gofer.messaging import Document, Consumer
+from gofer.common import synchronized, utf8
+from gofer.messaging import Document, Consumer, InvalidDocument
 from gofer.rmi.dispatcher import Reply, Return, RemoteException
+from gofer.rmi.policy import RequestTimeout
 
 
 log = getLogger(__name__)
@@ -279,15 +282,34 @@ class Accepted(AsyncReply):
 class Rejected(AsyncReply):
     """
     An asynchronous operation rejected.
+    :ivar code: The rejection code.
+    :type code: str
+    :ivar description: The rejection description.
+    :type description: str
+    :ivar details: The rejection details.
+    :type details: str
     :see: Failed.throw
     """
 
+    def __init__(self, document):
+        """
+        :param document: The received document.
+        :type document: Document
+        """
+        AsyncReply.__init__(self, document)
+        self.code = document.code
+        self.description = document.description
+        self.details = document.details
+
     def notify(self, listener):
         if callable(listener):
             listener(self)
         else:
             listener.rejected(self)
 
+    def throw(self):
+        raise InvalidDocument(self.code, self.description, '{}', self.details)
+
     def __unicode__(self):
         s = list()
         s.append(AsyncReply.__unicode__(self))
@@ -412,3 +434,193 @@ class Listener:
         :type reply: Progress.
         """
         pass
+
+
+class Future(object):
+    """
+    The (future) result of an asynchronous request.
+    :ivar sn: The request serial number.
+    :type sn: str
+    :ivar reply: The final reply.
+    :type reply: FinalReply|Rejected
+    :ivar progress: An (optional) progress callback.
+    :type progress: callable
+    """
+
+    def __init__(self, sn, progress=None):
+        """
+        :param sn: The request serial number.
+        :type sn: str
+        :param progress: An (optional) progress callback.
+        :type progress: callable
+        """
+        self.sn = sn
+        self.reply = None
+        self.progress = progress
+        self.__event = Event()
+
+    def done(self):
+        """
+        Get whether the final reply has been received.
+        :return: True if received.
+        :rtype: bool
+        """
+        return self.__event.isSet()
+
+    def set(self, reply):
+        """
+        Set the final reply.
+        :param reply: The final reply.
+        :type reply: FinalReply|Rejected
+        """
+        self.reply = reply
+        self.__event.set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the final reply.
+        :param timeout: The wait timeout (seconds).
+        :type timeout: float
+        :return: The final reply.
+        :rtype: FinalReply|Rejected
+        :raise RequestTimeout: when not received within the timeout.
+        """
+        self.__event.wait(timeout)
+        if self.done():
+            return self.reply
+        else:
+            raise RequestTimeout(self.sn, timeout)
+
+    def result(self, timeout=None):
+        """
+        Wait for the final reply and get the returned value.
+        :param timeout: The wait timeout (seconds).
+        :type timeout: float
+        :return: The returned value.
+        :raise RequestTimeout: when not received within the timeout.
+        :raise Exception: raised by the remote method.
+        """
+        reply = self.wait(timeout)
+        reply.throw()
+        return reply.retval
+
+    def __unicode__(self):
+        return '%s done=%s' % (self.sn, self.done())
+
+    def __str__(self):
+        return utf8(self)
+
+
+class Futures(object):
+    """
+    A reply listener that correlates replies to futures.
+    Used to drive many outstanding asynchronous requests using
+    a single reply consumer.  Final replies received before the
+    associated future has been added are held (orphaned) until
+    the future is added.
+    :cvar MAX_ORPHANS: The maximum number of orphaned replies held.
+    :type MAX_ORPHANS: int
+    :ivar futures: Pending futures by serial number.
+    :type futures: dict
+    :ivar orphans: Orphaned replies by serial number.
+    :type orphans: dict
+    :ivar order: Orphaned serial numbers in order received.  Serial
+        numbers of orphans already adopted are skipped when evicting.
+    :type order: deque
+    """
+
+    MAX_ORPHANS = 10000
+
+    def __init__(self):
+        self.__mutex = RLock()
+        self.futures = {}
+        self.orphans = {}
+        self.order = deque()
+
+    @synchronized
+    def add(self, sn, progress=None):
+        """
+        Add a future for the specified request.
+        :param sn: The request serial number.
+        :type sn: str
+        :param progress: An (optional) progress callback.
+        :type progress: callable
+        :return: The future.
+        :rtype: Future
+        """
+        future = Future(sn, progress)
+        reply = self.orphans.pop(sn, None)
+        if reply is not None:
+            future.set(reply)
+        else:
+            self.futures[sn] = future
+        return future
+
+    @synchronized
+    def discard(self, sn):
+        """
+        Discard the future for the specified request.
+        :param sn: The request serial number.
+        :type sn: str
+        """
+        self.futures.pop(sn, None)
+
+    @synchronized
+    def _final(self, reply):
+        """
+        Process a final reply.
+        :param reply: A final reply.
+        :type reply: FinalReply|Rejected
+        """
+        future = self.futures.pop(reply.sn, None)
+        if future is not None:
+            future.set(reply)
+            return
+        if reply.sn in self.orphans:
+            return
+        self.orphans[reply.sn] = reply
+        self.order.append(reply.sn)
+        while len(self.orphans) > self.MAX_ORPHANS:
+            sn = self.order.popleft()
+            self.orphans.pop(sn, None)
+        if len(self.order) > self.MAX_ORPHANS * 2:
+            # discard adopted
+            self.order = deque([sn for sn in self.order if sn in self.orphans])
+
+    @synchronized
+    def _find(self, sn):
+        """
+        Find a pending future.
+        :param sn: The request serial number.
+        :type sn: str
+        :return: The future or None when not found.
+        :rtype: Future
+        """
+        return self.futures.get(sn)
+
+    def _progress(self, reply):
+        """
+        Process a progress report.
+        The callback is called without holding the mutex.
+        :param reply: A progress report.
+        :type reply: Progress
+        """
+        future = self._find(reply.sn)
+        if future is None or not callable(future.progress):
+            return
+        try:
+            future.progress(reply)
+        except Exception:
+            log.exception(future.sn)
+
+    def __call__(self, reply):
+        if isinstance(reply, (FinalReply, Rejected)):
+            self._final(reply)
+            return
+        if isinstance(reply, Progress):
+            self._progress(reply)
+            return
+
+    @synchronized
+    def __len__(self):
+        return len(self.futures)
@@ -13,19 +13,29 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 
+import os
+
 from logging import getLogger
 
+from gofer import NAME
 from gofer.messaging import Consumer, Producer, Document
+from gofer.rmi.dispatcher import Call
 from gofer.metrics import timestamp
 
 log = getLogger(__name__)
 
 
+# poison (request) messages
+QUARANTINE = '/var/lib/%s/messaging/quarantine' % NAME
+
+
 class RequestConsumer(Consumer):
     """
     Request consumer.
     Reads messages from AMQP, sends the accepted status then writes
     to local pending queue to be consumed by the scheduler.
+    Messages that repeatedly fail to be dispatched are quarantined
+    in a directory named for the plugin.
     """
 
     def __init__(self, node, plugin):
@@ -37,6 +47,10 @@ class RequestConsumer(Consumer):
         """
         super(RequestConsumer, self).__init__(node, plugin.url)
         self.scheduler = plugin.scheduler
+        self.codec = plugin.codec
+        self.compression = plugin.compression
+        self.signing = plugin.signing
+        self.quarantine.path = os.path.join(QUARANTINE, plugin.name)
 
     def rejected(self, code, description, document, details):
         """
@@ -73,6 +87,9 @@ class RequestConsumer(Consumer):
         try:
             producer = Producer(self.url)
             producer.authenticator = self.authenticator
+            producer.codec = self.codec
+            producer.compression = self.compression
+            producer.signing = self.signing
             producer.open()
             try:
                 producer.send(
@@ -90,9 +107,10 @@ class RequestConsumer(Consumer):
     def dispatch(self, request):
         """
         Dispatch received request.
-        Update the request: inject the inbound_url.
+        The RMI request is parsed (once) and passed by reference.
         :param request: The received request.
         :type request: Document
         """
+        request.request = Call.parse(request.request)
         self.send(request, 'accepted')
         self.scheduler.add(request)
@@ -36,8 +36,16 @@ class Container(object):
           (int) Seconds to wait for a synchronous reply (default:90).
       - authenticator
           (Authenticator) A message authenticator.
+      - codec
+          (str) The document codec (json|compact|msgpack) (default:json).
+      - compression
+          (int) Compress requests larger than (bytes) (default:disabled).
+      - signing
+          (str) The signing mode (nested|detached) (default:nested).
       - progress
           (callable) A progress callback.
+      - status
+          (callable) A (accepted|started) status callback.
       - secret
           (str) A shared secret.
       - user
@@ -46,6 +54,9 @@ class Container(object):
           (str) A password used for authentication.
       - exchange
           (str) An optional AMQP exchange used for synchronous replies.
+      - reply_queue
+          (str) The synchronous reply queue strategy (temporary|pooled)
+          (default:temporary).
       - reply
           (str) An AMQP reply address.
       - trigger
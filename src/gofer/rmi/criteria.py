@@ -14,16 +14,34 @@ class InvalidOperator(Exception):
     pass
 
 
+# missing (dictionary) value
+MISSING = object()
+
+
+def false(locator):
+    """
+    The (constant) predicate that never matches.
+    """
+    return False
+
+
 class Criteria(object):
     """
     The criteria used to match on an RMI locator.
+    :cvar SELECTIVITY: The estimated fraction of locators matched.
+    :type SELECTIVITY: float
+    :ivar compiled: The compiled predicate (see: compile()).
+    :type compiled: callable
     """
 
+    SELECTIVITY = 0.5
+
     def __init__(self, criteria):
         """
         :param criteria: The data used for matching.
         """
         self.criteria = criteria
+        self.compiled = None
 
     def match(self, locator):
         """
@@ -35,12 +53,53 @@ class Criteria(object):
         """
         raise NotImplementedError()
 
+    def compile(self):
+        """
+        Compile the criteria into a predicate.
+        :return: A function: fn(locator) that returns True on match.
+        :rtype: callable
+        """
+        return self.match
+
+    def predicate(self):
+        """
+        Get the compiled predicate.
+        Compiled (once) on demand.
+        :return: A function: fn(locator) that returns True on match.
+        :rtype: callable
+        """
+        if self.compiled is None:
+            self.compiled = self.compile()
+        return self.compiled
+
+    def selectivity(self):
+        """
+        Get the estimated fraction of locators matched.
+        Used to order evaluation.
+        :rtype: float
+        """
+        return self.SELECTIVITY
+
+    def evaluate(self, snapshot):
+        """
+        Match on the locators in the snapshot.
+        :param snapshot: A snapshot of locators.
+        :type snapshot: Snapshot
+        :return: The list of matched flags (ordered as the locators).
+        :rtype: list
+        """
+        fn = self.predicate()
+        return [fn(locator) for locator in snapshot.locators]
+
     def __call__(self, locator):
-        return self.match(locator)
+        fn = self.predicate()
+        return fn(locator)
 
 
 class Match(Criteria):
 
+    SELECTIVITY = 0.1
+
     def match(self, locator):
         if not self._valid(locator):
             return False
@@ -49,6 +108,37 @@ class Match(Criteria):
                 return False
         return True
 
+    def compile(self):
+        if not isinstance(self.criteria, dict) or not self.criteria:
+            return false
+        items = self.criteria.items()
+        if len(items) == 1:
+            key, value = items[0]
+
+            def fn(locator):
+                if not locator or not isinstance(locator, dict):
+                    return False
+                return not (value != locator.get(key, value))
+        else:
+            def fn(locator):
+                if not locator or not isinstance(locator, dict):
+                    return False
+                get = locator.get
+                for k, v in items:
+                    if v != get(k, v):
+                        return False
+                return True
+        return fn
+
+    def evaluate(self, snapshot):
+        if not isinstance(self.criteria, dict) or not self.criteria:
+            return [False] * len(snapshot)
+        mask = snapshot.dicts()
+        for k, v in self.criteria.items():
+            column = snapshot.column(k)
+            mask = [m and (c is MISSING or not (v != c)) for m, c in zip(mask, column)]
+        return mask
+
     def _valid(self, locator):
         if not isinstance(self.criteria, dict):
             return False
@@ -63,33 +153,78 @@ class Match(Criteria):
 
 class Equal(Criteria):
 
+    SELECTIVITY = 0.1
+
     def match(self, locator):
         return locator == self.criteria
 
+    def compile(self):
+        value = self.criteria
+        return lambda locator: locator == value
+
 
 class NotEqual(Criteria):
 
+    SELECTIVITY = 0.9
+
     def match(self, locator):
         return locator != self.criteria
 
+    def compile(self):
+        value = self.criteria
+        return lambda locator: locator != value
+
 
 class Greater(Criteria):
 
     def match(self, locator):
         return locator > self.criteria
 
+    def compile(self):
+        value = self.criteria
+        return lambda locator: locator > value
+
 
 class Less(Criteria):
 
     def match(self, locator):
         return locator < self.criteria
 
+    def compile(self):
+        value = self.criteria
+        return lambda locator: locator < value
+
 
 class In(Criteria):
 
     def match(self, locator):
         return locator in self.criteria
 
+    def compile(self):
+        values = self.criteria
+        if not isinstance(values, (list, tuple)):
+            return self.match
+        if not values:
+            return false
+        try:
+            hashed = frozenset(values)
+        except TypeError:
+            return self.match
+
+        def fn(locator):
+            try:
+                return locator in hashed
+            except TypeError:
+                # not hashable
+                return locator in values
+        return fn
+
+    def selectivity(self):
+        try:
+            return min(1.0, Equal.SELECTIVITY * len(self.criteria))
+        except TypeError:
+            return self.SELECTIVITY
+
 
 class And(Criteria):
 
@@ -97,6 +232,35 @@ class And(Criteria):
         left, right = self.criteria
         return left.match(locator) and right.match(locator)
 
+    def compile(self):
+        predicates = []
+        for criteria in self.ordered():
+            fn = criteria.predicate()
+            if fn is false:
+                return false
+            predicates.append(fn)
+        if len(predicates) == 1:
+            return predicates[0]
+        first, second = predicates
+        return lambda locator: first(locator) and second(locator)
+
+    def selectivity(self):
+        left, right = self.criteria
+        return left.selectivity() * right.selectivity()
+
+    def ordered(self):
+        """
+        Get the criteria ordered (most selective first) for short-circuit.
+        :rtype: list
+        """
+        return sorted(self.criteria, key=lambda c: c.selectivity())
+
+    def evaluate(self, snapshot):
+        first, second = self.ordered()
+        mask = first.evaluate(snapshot)
+        fn = second.predicate()
+        return [m and fn(locator) for m, locator in zip(mask, snapshot.locators)]
+
 
 class Or(Criteria):
 
@@ -104,6 +268,99 @@ class Or(Criteria):
         left, right = self.criteria
         return left.match(locator) or right.match(locator)
 
+    def compile(self):
+        predicates = []
+        for criteria in self.ordered():
+            fn = criteria.predicate()
+            if fn is false:
+                continue
+            predicates.append(fn)
+        if not predicates:
+            return false
+        if len(predicates) == 1:
+            return predicates[0]
+        first, second = predicates
+        return lambda locator: first(locator) or second(locator)
+
+    def selectivity(self):
+        left, right = self.criteria
+        return 1.0 - (1.0 - left.selectivity()) * (1.0 - right.selectivity())
+
+    def ordered(self):
+        """
+        Get the criteria ordered (least selective first) for short-circuit.
+        :rtype: list
+        """
+        return sorted(self.criteria, key=lambda c: -c.selectivity())
+
+    def evaluate(self, snapshot):
+        first, second = self.ordered()
+        mask = first.evaluate(snapshot)
+        fn = second.predicate()
+        return [m or fn(locator) for m, locator in zip(mask, snapshot.locators)]
+
+
+class Snapshot(object):
+    """
+    A (columnar) snapshot of many locators used to evaluate
+    criteria in batch.  Columns of dictionary values are built
+    on demand.
+    :ivar keys: The (serial number) keys.
+    :type keys: list
+    :ivar locators: The locators (ordered as the keys).
+    :type locators: list
+    :ivar columns: Dictionary values (or MISSING) by key.
+    :type columns: dict
+    """
+
+    def __init__(self, items):
+        """
+        :param items: List of: (key, locator).
+        :type items: list
+        """
+        self.keys = [k for k, l in items]
+        self.locators = [l for k, l in items]
+        self.columns = {}
+
+    def dicts(self):
+        """
+        Get the flags of (non-empty) dictionary locators.
+        :rtype: list
+        """
+        return [bool(l) and isinstance(l, dict) for l in self.locators]
+
+    def column(self, key):
+        """
+        Get the column of dictionary values.
+        :param key: A dictionary key.
+        :return: List of values or MISSING.
+        :rtype: list
+        """
+        column = self.columns.get(key)
+        if column is None:
+            column = []
+            for locator in self.locators:
+                if isinstance(locator, dict):
+                    column.append(locator.get(key, MISSING))
+                else:
+                    column.append(MISSING)
+            self.columns[key] = column
+        return column
+
+    def select(self, criteria):
+        """
+        Select the keys of locators matched by the criteria.
+        :param criteria: The criteria.
+        :type criteria: Criteria
+        :return: The list of matched keys.
+        :rtype: list
+        """
+        mask = criteria.evaluate(self)
+        return [k for k, m in zip(self.keys, mask) if m]
+
+    def __len__(self):
+        return len(self.locators)
+
 
 class Builder:
     """
@@ -119,6 +376,7 @@ class Builder:
       {'and':({'gt':1},{'lt':10})}
       {'or':({'eq':10},{'in':[1,2]})}
       {'or':({'eq':10},{'or':({'eq':1},{'eq':2})}
+    The built criteria are compiled (see: Criteria.predicate()).
     """
 
     METHODS = {
@@ -146,7 +404,9 @@ class Builder:
                 v = self._resolve(v)
             m = self.METHODS.get(k)
             if m:
-                return m(self._resolve(v))
+                criteria = m(self._resolve(v))
+                criteria.predicate()
+                return criteria
             else:
                 raise InvalidOperator('%s not supported' % k)
 
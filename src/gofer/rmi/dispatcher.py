@@ -18,11 +18,16 @@ Provides RMI dispatcher classes.
 """
 
 import sys
+import json
 import inspect
 import traceback as tb
 
+from time import time
+from types import MethodType
+from threading import RLock
+
 from gofer import NAME
-from gofer.common import Options, utf8
+from gofer.common import Options, synchronized, utf8
 from gofer.messaging import Document
 from gofer.pam import authenticate as pam_authenticate
 
@@ -58,6 +63,16 @@ class MethodNotFound(DispatchError):
         DispatchError.__init__(self, message)
 
 
+class RequestCancelled(DispatchError):
+    """
+    The request was cancelled before it was started.
+    """
+
+    def __init__(self, sn):
+        message = 'request: %s, cancelled' % sn
+        DispatchError.__init__(self, message)
+
+
 class NotPermitted(DispatchError):
     """
     Called method not decorated as *remote*.
@@ -246,8 +261,15 @@ class Reply(Document):
 class Return(Document):
     """
     Return document.
+    The return is encoded (JSON) once when created.  This validates
+    that it can be encoded and the encoded form is spliced into the
+    reply by the JSON codecs.
+    :ivar __encoded__: The pre-encoded (JSON) return.
+    :type __encoded__: str
     """
 
+    __slots__ = ('__encoded__',)
+
     @classmethod
     def succeed(cls, x):
         """
@@ -258,7 +280,7 @@ class Return(Document):
         :rtype: Return
         """
         inst = Return(retval=x)
-        inst.dump()  # validate
+        inst.__encoded__ = inst.dump()  # validate
         return inst
 
     @classmethod
@@ -313,7 +335,7 @@ class Return(Document):
                       xclass=xclass.__name__,
                       xstate=state,
                       xargs=args)
-        inst.dump()  # validate
+        inst.__encoded__ = inst.dump()  # validate
         return inst
 
 
@@ -324,6 +346,91 @@ class Request(Document):
     pass
 
 
+class Call(object):
+    """
+    The parsed RMI request.
+    The request is parsed once when received and replaces the (dict)
+    request in the document so it is passed by reference (not copied)
+    through the pipeline.  Encoded as a dictionary.
+    :ivar classname: The target class name.
+    :type classname: str
+    :ivar method: The target method name.
+    :type method: str
+    :ivar args: The method arguments.
+    :type args: list
+    :ivar kws: The method keyword arguments.
+    :type kws: dict
+    :ivar cntr: The (optional) constructor arguments: ([], {}).
+    :type cntr: list
+    """
+
+    __slots__ = ('classname', 'method', 'args', 'kws', 'cntr')
+
+    @staticmethod
+    def parse(request):
+        """
+        Parse the (dict) request.
+        :param request: The request (dict) contained in the document.
+        :type request: dict
+        :return: The parsed request.
+        :rtype: Call
+        """
+        if isinstance(request, Call):
+            return request
+        if isinstance(request, Options):
+            request = request.__dict__
+        if not isinstance(request, dict):
+            request = {}
+        return Call(
+            classname=request.get('classname'),
+            method=request.get('method'),
+            args=request.get('args') or [],
+            kws=request.get('kws') or {},
+            cntr=request.get('cntr'))
+
+    def __init__(self, classname=None, method=None, args=None, kws=None, cntr=None):
+        """
+        :param classname: The target class name.
+        :type classname: str
+        :param method: The target method name.
+        :type method: str
+        :param args: The method arguments.
+        :type args: list
+        :param kws: The method keyword arguments.
+        :type kws: dict
+        :param cntr: The (optional) constructor arguments: ([], {}).
+        :type cntr: list
+        """
+        self.classname = classname
+        self.method = method
+        self.args = args
+        self.kws = kws
+        self.cntr = cntr
+
+    def dict(self):
+        """
+        Get a dictionary representation.
+        :return: The request as a dictionary.
+        :rtype: dict
+        """
+        return dict([(n, getattr(self, n)) for n in self.__slots__])
+
+    def __eq__(self, other):
+        return isinstance(other, Call) and self.dict() == other.dict()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __unicode__(self):
+        return unicode(self.dict())
+
+    def __str__(self):
+        return utf8(self)
+
+    def __repr__(self):
+        return repr(self.dict())
+
+
 class RMI(object):
     """
     The RMI object performs the invocation.
@@ -333,7 +440,7 @@ class RMI(object):
     :type catalog: dict
     """
 
-    def __init__(self, request, auth, catalog):
+    def __init__(self, request, auth, catalog, target=None):
         """
         :param request: The request document.
         :type request: Request
@@ -341,12 +448,22 @@ class RMI(object):
         :type auth: Options
         :param catalog: A dict of class mappings.
         :type catalog: dict
+        :param target: The (resolved) dispatch table entry.
+            When not specified, the class and method are found using the catalog.
+        :type target: Target
         """
         self.name = '.'.join((request.classname, request.method))
         self.request = request
         self.auth = auth
-        self.inst = self.find_class(request, catalog)
-        self.method = self.find_method(request, self.inst)
+        if target is None:
+            self.inst = self.find_class(request, catalog)
+            self.method = self.find_method(request, self.inst)
+            self.info = RMI.fninfo(self.method)
+        else:
+            self.inst = target.construct(request)
+            self.method = target.bind(self.inst)
+            self.info = target.fninfo
+        self.target = target
         self.args = request.args
         self.kwargs = request.kws
 
@@ -437,10 +554,15 @@ class RMI(object):
         Check whether remote invocation of the specified method is permitted.
         Applies security model using Security.
         """
-        fninfo = RMI.fninfo(self.method)
+        fninfo = self.info
         if fninfo is None:
             raise NotPermitted(self)
-        security = Security(self, fninfo)
+        if not fninfo.security:
+            return
+        if self.target is not None:
+            security = self.target.security
+        else:
+            security = Security(self, fninfo)
         security.apply(self.auth)
 
     def __call__(self):
@@ -449,13 +571,20 @@ class RMI(object):
         :return: The invocation result.
         :rtype: Return
         """
+        failed = False
         try:
-            self.permitted()
-            retval = self.method(*self.args, **self.kwargs)
-            return Return.succeed(retval)
-        except Exception:
-            log.exception(utf8(self.method))
-            return Return.exception()
+            try:
+                self.permitted()
+                failed = True
+                retval = self.method(*self.args, **self.kwargs)
+                failed = False
+                return Return.succeed(retval)
+            except Exception:
+                log.exception(utf8(self.method))
+                return Return.exception()
+        finally:
+            if self.target is not None:
+                self.target.release(self.request, self.inst, failed)
 
     def __unicode__(self):
         return unicode(self.request)
@@ -473,16 +602,17 @@ class RMI(object):
 class Security:
     """
     Layered Security.
-    :ivar method: The method name.
-    :type method: str
+    Built once for each dispatch table entry and applied to each request.
+    :ivar method: The method (named) used in exceptions.
+    :type method: (RMI|Target)
     :ivar stack: The security stack; list of auth specifications defined by decorators.
     :type stack: list
     """
     
     def __init__(self, method, fninfo):
         """
-        :param method: The method name.
-        :type method: RMI
+        :param method: The method (named) used in exceptions.
+        :type method: (RMI|Target)
         :param fninfo: The decorated function info.
         :type fninfo: Options
         """
@@ -575,14 +705,407 @@ class Security:
             raise NotAuthenticated(self.method, passed.user)
 
 
+# --- Lifecycle --------------------------------------------------------------
+
+
+REQUEST = 'request'
+SINGLETON = 'singleton'
+POOLED = 'pooled'
+
+LIFECYCLES = (REQUEST, SINGLETON, POOLED)
+
+# pooled defaults
+POOL_SIZE = 10
+POOL_IDLE = 300
+
+
+def lifecycle(cls):
+    """
+    Get the instance lifecycle policy for a remote class.
+    The lifecycle is specified by decorating the class with @remote.
+    :param cls: A remote class.
+    :type cls: class
+    :return: The policy.
+    :rtype: PerRequest
+    """
+    opt = getattr(cls, NAME, None)
+    if not isinstance(opt, Options) or not opt.lifecycle:
+        return PerRequest(cls)
+    policy = opt.lifecycle
+    if policy.name == SINGLETON:
+        return Shared(cls, policy.size, policy.idle)
+    if policy.name == POOLED:
+        return Pooled(cls, policy.size, policy.idle)
+    return PerRequest(cls)
+
+
+class PerRequest(object):
+    """
+    Per-request instance lifecycle (default).
+    An instance of the class is constructed for each request.
+    :ivar cls: A remote class.
+    :type cls: class
+    """
+
+    @staticmethod
+    def key(cntr):
+        """
+        Get the key for constructor arguments.
+        :param cntr: Constructor arguments: ([], {})
+        :type cntr: tuple
+        :return: The key.
+        :rtype: str
+        """
+        try:
+            return json.dumps(cntr, sort_keys=True)
+        except (TypeError, ValueError):
+            return repr(cntr)
+
+    def __init__(self, cls):
+        """
+        :param cls: A remote class.
+        :type cls: class
+        """
+        self.cls = cls
+
+    def construct(self, cntr):
+        """
+        Construct an instance.
+        :param cntr: Constructor arguments: ([], {})
+        :type cntr: tuple
+        :return: The instance.
+        """
+        args, keywords = cntr
+        return self.cls(*args, **keywords)
+
+    def acquire(self, cntr):
+        """
+        Get an instance to be used for a request.
+        :param cntr: Constructor arguments: ([], {})
+        :type cntr: tuple
+        :return: The instance.
+        """
+        return self.construct(cntr)
+
+    def release(self, cntr, inst, failed=False):
+        """
+        The request using the instance has completed.
+        :param cntr: Constructor arguments: ([], {})
+        :type cntr: tuple
+        :param inst: An instance returned by acquire().
+        :param failed: The invoked method raised an exception.
+        :type failed: bool
+        """
+        pass
+
+
+class Shared(PerRequest):
+    """
+    Singleton instance lifecycle.
+    An instance is constructed for the first request (for each set of
+    constructor arguments) and used for all requests.  The instance may
+    be used by concurrent requests.  At most *size* instances (sets of
+    constructor arguments) are kept and the least recently used is evicted
+    to make room.  When *idle* is specified, instances unused for longer
+    than *idle* seconds are evicted.  By default, they are not.
+    :ivar size: The max instances kept.
+    :type size: int
+    :ivar idle: Time (seconds) an unused instance is kept (None=forever).
+    :type idle: float
+    :ivar instances: Instances by key: [inst, used].
+    :type instances: dict
+    """
+
+    def __init__(self, cls, size=None, idle=None):
+        """
+        :param cls: A remote class.
+        :type cls: class
+        :param size: The max instances kept.
+        :type size: int
+        :param idle: Time (seconds) an unused instance is kept (None=forever).
+        :type idle: float
+        """
+        PerRequest.__init__(self, cls)
+        self.size = size or POOL_SIZE
+        self.idle = idle
+        self.instances = {}
+        self.__mutex = RLock()
+
+    @synchronized
+    def acquire(self, cntr):
+        self.evict()
+        key = self.key(cntr)
+        entry = self.instances.get(key)
+        if entry is None:
+            if len(self.instances) >= self.size:
+                lru = sorted(self.instances.items(), key=lambda e: e[1][1])
+                del self.instances[lru[0][0]]
+            entry = [self.construct(cntr), 0]
+            self.instances[key] = entry
+        entry[1] = time()
+        return entry[0]
+
+    @synchronized
+    def release(self, cntr, inst, failed=False):
+        entry = self.instances.get(self.key(cntr))
+        if entry is not None and entry[0] is inst:
+            entry[1] = time()
+
+    @synchronized
+    def evict(self):
+        """
+        Evict instances unused longer than allowed.
+        """
+        if not self.idle:
+            return
+        now = time()
+        for key, entry in self.instances.items():
+            if now - entry[1] > self.idle:
+                del self.instances[key]
+
+
+class Pooled(PerRequest):
+    """
+    Pooled instance lifecycle.
+    Instances are reused by requests having the same constructor
+    arguments.  Each instance is used by one request at a time and
+    is constructed when no idle instance is pooled.  At most *size*
+    idle instances are pooled for each set of constructor arguments
+    and instances idle longer than *idle* seconds are evicted.
+    The number of instances in use is not limited by *size*; it is
+    bounded by the number of concurrent requests (plugin threads).
+    Instances used by requests for which the method raised an
+    exception are discarded.
+    :ivar size: The max idle instances pooled (per key).
+    :type size: int
+    :ivar idle: Time (seconds) an idle instance is pooled.
+    :type idle: float
+    :ivar pool: Idle instances by key: [(inst, released)].
+    :type pool: dict
+    """
+
+    def __init__(self, cls, size=None, idle=None):
+        """
+        :param cls: A remote class.
+        :type cls: class
+        :param size: The max idle instances pooled (per key).
+        :type size: int
+        :param idle: Time (seconds) an idle instance is pooled.
+        :type idle: float
+        """
+        PerRequest.__init__(self, cls)
+        self.size = size or POOL_SIZE
+        self.idle = idle or POOL_IDLE
+        self.pool = {}
+        self.__mutex = RLock()
+
+    def acquire(self, cntr):
+        inst = self.__pop(self.key(cntr))
+        if inst is None:
+            inst = self.construct(cntr)
+        return inst
+
+    @synchronized
+    def release(self, cntr, inst, failed=False):
+        if failed:
+            return
+        stack = self.pool.setdefault(self.key(cntr), [])
+        if len(stack) < self.size:
+            stack.append((inst, time()))
+        self.evict()
+
+    @synchronized
+    def evict(self):
+        """
+        Evict instances idle longer than allowed.
+        """
+        now = time()
+        for key, stack in self.pool.items():
+            while stack and now - stack[0][1] > self.idle:
+                stack.pop(0)
+            if not stack:
+                del self.pool[key]
+
+    @synchronized
+    def __pop(self, key):
+        self.evict()
+        stack = self.pool.get(key)
+        if stack:
+            return stack.pop()[0]
+
+
+# --- Dispatch table ---------------------------------------------------------
+
+
+class Target(object):
+    """
+    A dispatch table entry.
+    A remote method resolved when the table is built.
+    :ivar inst: The cataloged class, module or object.
+    :type inst: (class|module|object)
+    :ivar method: The method (function) as found on the cataloged object.
+        For classes, the unbound function when the method must be bound
+        to the instance constructed for each request.
+    :type method: (method|function)
+    :ivar constructed: An instance of the class is constructed for each request.
+    :type constructed: bool
+    :ivar bound: The method is bound to the constructed instance.
+    :type bound: bool
+    :ivar fninfo: The *gofer* metadata embedded by the @remote decorator.
+    :type fninfo: Options
+    :ivar lifecycle: The instance lifecycle policy (constructed only).
+    :type lifecycle: PerRequest
+    :ivar name: The method name: <classname>.<method>.
+    :type name: str
+    :ivar security: The security stack (secured methods only).
+    :type security: Security
+    """
+
+    def __init__(self, inst, method, fninfo, lifecycle=None, name=None):
+        """
+        :param inst: The cataloged class, module or object.
+        :type inst: (class|module|object)
+        :param method: The method (function).
+        :type method: (method|function)
+        :param fninfo: The *gofer* metadata.
+        :type fninfo: Options
+        :param lifecycle: The instance lifecycle policy (shared by
+            all methods of the class).
+        :type lifecycle: PerRequest
+        :param name: The method name: <classname>.<method>.
+        :type name: str
+        """
+        self.name = name or method.__name__
+        self.inst = inst
+        self.constructed = inspect.isclass(inst)
+        if self.constructed and lifecycle is None:
+            lifecycle = PerRequest(inst)
+        self.lifecycle = lifecycle
+        self.bound = self.constructed and inspect.ismethod(method) and method.im_self is None
+        if self.bound:
+            self.method = method.im_func
+        else:
+            self.method = method
+        self.fninfo = fninfo
+        if fninfo.security:
+            self.security = Security(self, fninfo)
+        else:
+            self.security = None
+
+    def construct(self, request):
+        """
+        Get the object on which the method is invoked.
+        :param request: The request document.
+        :type request: Request
+        :return: An instance of the class when constructed.
+        :rtype: (class|module|object)
+        """
+        if self.constructed:
+            return self.lifecycle.acquire(RMI.constructor(request))
+        else:
+            return self.inst
+
+    def release(self, request, inst, failed=False):
+        """
+        The request has completed.
+        :param request: The request document.
+        :type request: Request
+        :param inst: The object returned by construct().
+        :type inst: (class|module|object)
+        :param failed: The invoked method raised an exception.
+        :type failed: bool
+        """
+        if self.constructed:
+            self.lifecycle.release(RMI.constructor(request), inst, failed)
+
+    def bind(self, inst):
+        """
+        Get the method to be invoked.
+        :param inst: The object returned by construct().
+        :type inst: (class|module|object)
+        :return: The method.
+        :rtype: (method|function)
+        """
+        if self.bound:
+            return MethodType(self.method, inst, self.inst)
+        else:
+            return self.method
+
+
+class Table(object):
+    """
+    The dispatch table.
+    Maps (classname, method) to the resolved remote method so that
+    dispatching a request does not involve inspecting the cataloged
+    classes.  Only methods decorated by @remote are included.
+    :ivar targets: Table entries keyed by (classname, method).
+    :type targets: dict
+    :ivar lifecycles: Instance lifecycle policies keyed by classname.
+    :type lifecycles: dict
+    """
+
+    def __init__(self, catalog, previous=None):
+        """
+        :param catalog: A dict of class mappings.
+        :type catalog: dict
+        :param previous: The table being replaced.  The lifecycle policies
+            (and the instances they hold) of unchanged classes are kept.
+        :type previous: Table
+        """
+        self.targets = {}
+        self.lifecycles = {}
+        for classname, inst in catalog.items():
+            if inspect.isclass(inst):
+                policy = None
+                if previous is not None:
+                    policy = previous.lifecycles.get(classname)
+                if policy is None or policy.cls is not inst:
+                    policy = lifecycle(inst)
+                self.lifecycles[classname] = policy
+            else:
+                policy = None
+            for name in dir(inst):
+                try:
+                    method = getattr(inst, name)
+                except Exception:
+                    continue
+                if not inspect.isroutine(method):
+                    continue
+                fninfo = RMI.fninfo(method)
+                if fninfo is None:
+                    continue
+                target = Target(inst, method, fninfo, policy, '.'.join((classname, name)))
+                self.targets[(classname, name)] = target
+
+    def find(self, classname, method):
+        """
+        Find a table entry.
+        :param classname: The requested class name.
+        :type classname: str
+        :param method: The requested method name.
+        :type method: str
+        :return: The entry or None when not found.
+        :rtype: Target
+        """
+        return self.targets.get((classname, method))
+
+    def __len__(self):
+        return len(self.targets)
+
+
 # --- Dispatcher -------------------------------------------------------------
 
 
 class Dispatcher:
     """
     The remote invocation dispatcher.
+    The dispatch table is rebuilt whenever the catalog is changed
+    using the dispatcher.  Requests for methods not in the table are
+    resolved using the catalog so that the appropriate error is raised.
     :ivar catalog: The (catalog) of target classes.
     :type catalog: dict
+    :ivar table: The dispatch table.
+    :type table: Table
     """
 
     @staticmethod
@@ -593,8 +1116,24 @@ class Dispatcher:
             pam=document.pam,)
 
     @staticmethod
-    def log(document):
-        request = Options(document.request)
+    def classname(document):
+        """
+        Get the requested class name without copying the request.
+        :param document: A request document.
+        :type document: Document
+        :return: The class name or None when not specified.
+        :rtype: str
+        """
+        request = document.request
+        if isinstance(request, Call):
+            return request.classname
+        try:
+            return request['classname']
+        except (KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def log(document, request):
         log.info(
             'call: %s.%s() sn=%s data=%s',
             request.classname,
@@ -608,6 +1147,15 @@ class Dispatcher:
         :type classes: list
         """
         self.catalog = dict([(c.__name__, c) for c in classes or []])
+        self.table = Table(self.catalog)
+
+    def build(self):
+        """
+        Rebuild the dispatch table.
+        Must be called when the catalog is changed directly.
+        The instances of unchanged (singleton|pooled) classes are kept.
+        """
+        self.table = Table(self.catalog, self.table)
 
     def provides(self, name):
         """
@@ -628,11 +1176,12 @@ class Dispatcher:
         :rtype: any
         """
         try:
-            self.log(document)
+            request = Call.parse(document.request)
+            self.log(document, request)
             auth = self.auth(document)
-            request = Request(document.request)
             log.debug('request: %s', request)
-            method = RMI(request, auth, self.catalog)
+            target = self.table.find(request.classname, request.method)
+            method = RMI(request, auth, self.catalog, target)
             log.debug('method: %s', method)
             return method()
         except Exception:
@@ -642,10 +1191,12 @@ class Dispatcher:
     def __iadd__(self, other):
         if isinstance(other, Dispatcher):
             self.catalog.update(other.catalog)
+            self.build()
             return self
         if isinstance(other, list):
             other = dict([(c.__name__, c) for c in other])
             self.catalog.update(other)
+            self.build()
             return self
         return self
 
@@ -654,6 +1205,7 @@ class Dispatcher:
 
     def __setitem__(self, key, value):
         self.catalog[key] = value
+        self.build()
 
     def __iter__(self):
         _list = []
@@ -17,10 +17,12 @@
 Contains request delivery policies.
 """
 
+from time import time
 from logging import getLogger
+from threading import RLock
 from uuid import uuid4
 
-from gofer.common import Thread, Options, nvl, utf8
+from gofer.common import Thread, Options, nvl, utf8, synchronized
 from gofer.messaging import Document, InvalidDocument
 from gofer.messaging import Producer, Reader, Queue, Exchange
 from gofer.rmi.dispatcher import Return, RemoteException
@@ -30,6 +32,11 @@ from gofer.metrics import Timer
 log = getLogger(__name__)
 
 
+# synchronous reply queue strategies
+TEMPORARY = 'temporary'
+POOLED = 'pooled'
+
+
 class Timeout:
     """
     Policy timeout.
@@ -153,10 +160,26 @@ class Policy(object):
     def progress(self):
         return self.options.progress
 
+    @property
+    def status(self):
+        return self.options.status
+
     @property
     def authenticator(self):
         return self.options.authenticator
 
+    @property
+    def codec(self):
+        return self.options.codec
+
+    @property
+    def compression(self):
+        return self.options.compression
+
+    @property
+    def signing(self):
+        return self.options.signing
+
     @property
     def reply(self):
         return self.options.reply
@@ -184,6 +207,10 @@ class Policy(object):
     def exchange(self):
         return self.options.exchange
 
+    @property
+    def reply_queue(self):
+        return self.options.reply_queue or TEMPORARY
+
     def get_reply(self, sn, reader):
         """
         Get the reply matched by serial number.
@@ -194,6 +221,23 @@ class Policy(object):
         :return: The matched reply document.
         :rtype: Document
         """
+        document = self.read_reply(sn, reader)
+        if document:
+            return self.on_reply(document)
+
+    def read_reply(self, sn, reader):
+        """
+        Read the reply document matched by serial number.
+        Status documents are processed while waiting.
+        :param sn: The request serial number.
+        :type sn: str
+        :param reader: A reader.
+        :type reader: gofer.messaging.consumer.Reader
+        :return: The matched reply document or None when aborted.
+        :rtype: Document
+        :raise RequestTimeout: when the reply is not received.
+        :raise InvalidDocument: when the request is rejected.
+        """
         timer = Timer()
         timeout = float(self.wait)
 
@@ -220,6 +264,7 @@ class Policy(object):
 
             # accepted | started
             if document.status in ('accepted', 'started'):
+                self.on_status(document)
                 continue
 
             # progress reported
@@ -228,7 +273,7 @@ class Policy(object):
                 continue
 
             # reply
-            return self.on_reply(document)
+            return document
         
     def on_reply(self, document):
         """
@@ -244,6 +289,23 @@ class Policy(object):
         else:
             raise RemoteException.instance(reply)
         
+    def on_status(self, document):
+        """
+        Handle the (accepted|started) status report.
+        :param document: The status document.
+        :type document: Document
+        """
+        try:
+            reporter = self.status
+            if callable(reporter):
+                report = dict(
+                    sn=document.sn,
+                    data=document.data,
+                    status=document.status)
+                reporter(report)
+        except Exception:
+            log.error('status callback failed', exc_info=1)
+
     def on_progress(self, document):
         """
         Handle the progress report.
@@ -278,6 +340,76 @@ class Policy(object):
             return trigger()
 
 
+class ReplyPool(object):
+    """
+    A pool of reusable synchronous reply queues by URL and exchange.
+    Pooled queues are deleted by the broker after being unused for
+    the expiration period (rather than when the reader closes) so
+    that queues are not leaked when the process exits.  Idle queues
+    are discarded well before expired.
+    Late replies to prior requests left in a queue are skipped by
+    serial number when the queue is reused.
+    :cvar CAPACITY: The max number of idle queues by URL and exchange.
+    :type CAPACITY: int
+    :cvar EXPIRATION: The queue expiration (seconds).
+    :type EXPIRATION: int
+    :ivar idle: Idle (queue, last-used) by (URL, exchange).
+    :type idle: dict
+    """
+
+    CAPACITY = 10
+    EXPIRATION = 600
+
+    def __init__(self):
+        self.idle = {}
+        self.__mutex = RLock()
+
+    @synchronized
+    def get(self, url, exchange=None):
+        """
+        Get an idle queue.
+        :param url: The broker URL.
+        :type url: str
+        :param exchange: The (optional) reply exchange.
+        :type exchange: str
+        :return: An idle queue or None when not available.
+        :rtype: Queue
+        """
+        idle = self.idle.get((url, exchange), [])
+        now = time()
+        while idle:
+            queue, used = idle.pop()
+            if now - used < self.EXPIRATION / 2:
+                return queue
+        return None
+
+    @synchronized
+    def put(self, url, exchange, queue):
+        """
+        Return a queue to the pool.
+        Queues in excess of capacity are left to expire.
+        :param url: The broker URL.
+        :type url: str
+        :param exchange: The (optional) reply exchange.
+        :type exchange: str
+        :param queue: A queue to be reused.
+        :type queue: Queue
+        """
+        idle = self.idle.setdefault((url, exchange), [])
+        if len(idle) < self.CAPACITY:
+            idle.append((queue, time()))
+
+    @synchronized
+    def clear(self):
+        """
+        Discard all idle queues.
+        """
+        self.idle.clear()
+
+    def __len__(self):
+        return sum([len(q) for q in self.idle.values()])
+
+
 class Trigger:
     """
     Asynchronous trigger.
@@ -289,11 +421,17 @@ class Trigger:
     :type _policy: Policy
     :ivar _request: A request to send.
     :type _request: object
+    :ivar _replied: The reply has been received.
+    :type _replied: bool
+    :cvar pool: Pooled reply queues.
+    :type pool: ReplyPool
     """
 
     MANUAL = 1  # trigger
     NOWAIT = 0  # wait (seconds)
 
+    pool = ReplyPool()
+
     def __init__(self, policy, request):
         """
         :param policy: The policy object.
@@ -305,6 +443,7 @@ class Trigger:
         self._policy = policy
         self._request = request
         self._pending = True
+        self._replied = False
 
     @property
     def sn(self):
@@ -321,6 +460,9 @@ class Trigger:
         """
         producer = Producer(self._policy.url)
         producer.authenticator = self._policy.authenticator
+        producer.codec = self._policy.codec
+        producer.compression = self._policy.compression
+        producer.signing = self._policy.signing
         producer.open()
 
         try:
@@ -349,10 +491,14 @@ class Trigger:
 
         try:
             policy = self._policy
-            return policy.get_reply(self.sn, reader)
+            document = policy.read_reply(self.sn, reader)
         finally:
             reader.close()
 
+        if document:
+            self._replied = True
+            return policy.on_reply(document)
+
     def __call__(self):
         """
         Trigger pulled.
@@ -369,6 +515,9 @@ class Trigger:
             return self._send()
 
         # synchronous
+        if self._policy.reply_queue == POOLED:
+            return self._pooled()
+
         queue = Queue()
         queue.durable = False
         queue.declare(self._policy.url)
@@ -385,6 +534,34 @@ class Trigger:
             queue.purge(self._policy.url)
             queue.delete(self._policy.url)
 
+    def _pooled(self):
+        """
+        Send the request and read the reply using a pooled reply queue.
+        The queue is declared (and bound) only when created and is
+        returned to the pool only when the reply has been received.
+        :return: The reply.
+        """
+        url = self._policy.url
+        exchange = self._policy.exchange
+        queue = Trigger.pool.get(url, exchange)
+        if queue is None:
+            queue = Queue()
+            queue.durable = False
+            queue.auto_delete = True
+            queue.expiration = ReplyPool.EXPIRATION
+            queue.expire_unused = True
+            queue.declare(url)
+            if exchange:
+                Exchange(exchange).bind(queue, url)
+        reply = queue.name
+        if exchange:
+            reply = '/'.join((exchange, queue.name))
+        try:
+            return self._send(reply=reply, queue=queue)
+        finally:
+            if self._replied:
+                Trigger.pool.put(url, exchange, queue)
+
     def __unicode__(self):
         return self._sn
 
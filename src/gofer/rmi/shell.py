@@ -64,25 +64,29 @@ class Shell(object):
         }
         context = Context.current()
         p = Popen(command, stdout=PIPE, stderr=PIPE)
+        context.cancelled.watch(p.terminate)
         try:
-            while True:
-                n_read = 0
-                if context.cancelled():
-                    p.terminate()
-                    break
-                for fp, key in ((p.stdout, STDOUT), (p.stderr, STDERR)):
-                    line = fp.readline()
-                    if line:
-                        n_read += len(line)
-                        details[key] = line
-                        result[key] += line
-                        self.report(details)
-                if not n_read:
-                    #  EOF
-                    break
-            p.stdout.close()
-            p.stderr.close()
-            status = p.wait()
-            return status, result
-        except OSError, e:
-            return -1, utf8(e)
+            try:
+                while True:
+                    n_read = 0
+                    if context.cancelled():
+                        p.terminate()
+                        break
+                    for fp, key in ((p.stdout, STDOUT), (p.stderr, STDERR)):
+                        line = fp.readline()
+                        if line:
+                            n_read += len(line)
+                            details[key] = line
+                            result[key] += line
+                            self.report(details)
+                    if not n_read:
+                        #  EOF
+                        break
+                p.stdout.close()
+                p.stderr.close()
+                status = p.wait()
+                return status, result
+            except OSError, e:
+                return -1, utf8(e)
+        finally:
+            context.cancelled.unwatch(p.terminate)
@@ -24,8 +24,10 @@ from logging import getLogger
 from Queue import Queue, Empty
 
 from gofer import NAME, Thread
-from gofer.common import mkdir, rmdir, unlink
+from gofer.common import mkdir, rmdir, unlink, purge
 from gofer.messaging import Document
+from gofer.messaging.codec import compress
+from gofer.rmi.dispatcher import Call
 from gofer.rmi.tracker import Tracker
 
 
@@ -35,9 +37,13 @@ log = getLogger(__name__)
 class Pending(object):
     """
     Persistent store and queuing for pending requests.
+    :cvar COMPRESSION: The size (bytes) above which journal
+        entries are compressed.
+    :type COMPRESSION: int
     """
 
     PENDING = '/var/lib/%s/messaging/pending' % NAME
+    COMPRESSION = 4096
 
     @staticmethod
     def _write(request, path):
@@ -51,7 +57,7 @@ class Pending(object):
         fp = open(path, 'w+')
         try:
             body = request.dump()
-            fp.write(body)
+            fp.write(compress(body, Pending.COMPRESSION))
             log.debug('wrote [%s]: %s', path, body)
         finally:
             fp.close()
@@ -89,12 +95,16 @@ class Pending(object):
         paths = [os.path.join(path, name) for name in os.listdir(path)]
         return sorted(paths)
 
-    def __init__(self, stream):
+    def __init__(self, stream, cancelled=None):
         """
         :param stream: The stream name.
         :type stream: str
+        :param cancelled: An (optional) function called with
+            a queued request when it is cancelled.
+        :type cancelled: callable
         """
         self.stream = stream
+        self.cancelled = cancelled
         self.queue = Queue(maxsize=100)
         self.is_open = False
         self.sequential = Sequential()
@@ -108,6 +118,8 @@ class Pending(object):
         Open for operations.
         Load journal(ed) requests. These are requests were in the queuing pipeline
         when the process was terminated. put() is blocked until this has completed.
+        Requests cancelled before the process was terminated are restored and
+        dropped (with a cancelled reply) by the scheduler when dequeued.
         """
         path = os.path.join(Pending.PENDING, self.stream)
         mkdir(path)
@@ -118,6 +130,7 @@ class Pending(object):
             if not request:
                 # read failed
                 continue
+            request.request = Call.parse(request.request)
             self._put(request, path)
         self.is_open = True
 
@@ -163,6 +176,18 @@ class Pending(object):
         except KeyError:
             log.warn('%s not found for commit', sn)
 
+    def remove(self, sn):
+        """
+        Remove a queued (not yet dispatched) request.
+        The request is not committed.
+        :param sn: A request serial number.
+        :param sn: str
+        :return: The removed request or None when not queued.
+        :rtype: Document
+        """
+        for request in purge(self.queue, lambda r: r.sn == sn):
+            return request
+
     def delete(self):
         """
         Drain the queue and delete the store.
@@ -200,6 +225,8 @@ class Pending(object):
         tracker.add(request.sn, request.data)
         self.journal[request.sn] = jnl_path
         self.queue.put(request)
+        if self.cancelled and not tracker.cancelled(request.sn):
+            tracker.watch(request.sn, lambda: self.cancelled(request))
 
 
 class Sequential(object):
@@ -13,21 +13,40 @@
 Request tracker classes.
 """
 import os
+import errno
 
+from time import time
+from bisect import bisect_left, bisect_right
 from threading import RLock
+from logging import getLogger
 
 from gofer import Singleton, synchronized, NAME
-from gofer.common import mkdir
+from gofer.common import mkdir, unlink
+from gofer.rmi.criteria import Snapshot, Match, Equal, In, Greater, Less, And, Or
+
+
+log = getLogger(__name__)
 
 
 class Tracker:
     """
     Request tracker used to track information about
     active RMI requests.
+    Locators are indexed and find() matches the criteria only against
+    the candidates selected using the index.  Cancellation is tracked
+    using a separate lock so that checking for cancellation is not
+    blocked by find().  Functions may watch for the cancellation of a
+    request and are called when it is cancelled.
     :ivar __all: All known requests by serial number.
     :type __all: dict
+    :ivar __index: The locator index.
+    :type __index: Index
     :ivar __cancelled: Cancelled requests.
     :type __cancelled: Canceled
+    :ivar __started: Started requests.
+    :type __started: set
+    :ivar __watchers: Cancellation watchers by serial number.
+    :type __watchers: dict
     :ivar __mutex: The object mutex.
     :type __mutex: RLock
     """
@@ -36,7 +55,10 @@ class Tracker:
 
     def __init__(self):
         self.__all = dict()
+        self.__index = Index()
         self.__cancelled = Canceled()
+        self.__started = set()
+        self.__watchers = {}
         self.__mutex = RLock()
 
     @synchronized
@@ -49,40 +71,94 @@ class Tracker:
             on RMI requests.
         :type locator: object
         """
+        if sn in self.__all:
+            self.__index.remove(sn, self.__all[sn])
         self.__all[sn] = locator
+        self.__index.add(sn, locator)
 
-    @synchronized
     def find(self, criteria):
         """
         Find serial numbers matching user defined (any) data.
+        The criteria is evaluated (without holding the mutex) against
+        a snapshot of the locators selected using the index.
         :param criteria: The object used to match RMI requests.
         :type criteria: gofer.rmi.criteria.Criteria
         :return: The list of matching serial numbers.
         :rtype: list
         """
-        matched = []
-        for sn, locator in self.__all.items():
-            if criteria.match(locator):
-                matched.append(sn)
-        return matched
+        snapshot = Snapshot(self.__candidates(criteria))
+        return snapshot.select(criteria)
 
-    @synchronized
     def cancel(self, sn):
         """
         Notify the tracker that an RMI request has been cancelled.
+        The functions watching the request are called.
         :param sn: An RMI serial number.
         :type sn: str
         :return: The cancelled serial number (if not already cancelled).
         :rtype: str
         """
-        if sn in self.__all:
-            if sn not in self.__cancelled:
-                self.__cancelled.add(sn)
-                return sn
-        else:
-            raise Exception('serial number (%s), not-found' % sn)
+        cancelled, watchers = self.__cancel(sn)
+        for fn in watchers:
+            try:
+                fn()
+            except Exception:
+                log.exception(sn)
+        return cancelled
+
+    def watch(self, sn, fn):
+        """
+        Watch for the cancellation of an RMI request.
+        The function is called (once) when the request is cancelled
+        and is called immediately when already cancelled.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :param fn: A function called without arguments.
+        :type fn: callable
+        """
+        if self.__watch(sn, fn):
+            return
+        fn()
 
     @synchronized
+    def unwatch(self, sn, fn):
+        """
+        Discontinue watching for the cancellation of an RMI request.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :param fn: A watching function.
+        :type fn: callable
+        """
+        watchers = self.__watchers.get(sn, [])
+        if fn in watchers:
+            watchers.remove(fn)
+
+    @synchronized
+    def start(self, sn):
+        """
+        Notify the tracker that an RMI request is starting.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :return: False when the request has been cancelled and
+            must not be started.
+        :rtype: bool
+        """
+        if sn in self.__cancelled:
+            return False
+        self.__started.add(sn)
+        return True
+
+    @synchronized
+    def started(self, sn):
+        """
+        Get whether an RMI request has been started.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :return: True if started.
+        :rtype: bool
+        """
+        return sn in self.__started
+
     def cancelled(self, sn):
         """
         Get whether an RMI request has been cancelled.
@@ -100,50 +176,418 @@ class Tracker:
         :param sn: An RMI serial number.
         :type sn: str
         """
-        self.__all.pop(sn, 0)
+        if sn in self.__all:
+            self.__index.remove(sn, self.__all.pop(sn))
+        self.__started.discard(sn)
+        self.__watchers.pop(sn, None)
         self.__cancelled.delete(sn)
 
+    @synchronized
+    def __cancel(self, sn):
+        """
+        Mark an RMI request cancelled.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :return: tuple of: (cancelled sn, watchers)
+        :rtype: tuple
+        """
+        if sn in self.__all:
+            if sn not in self.__cancelled:
+                self.__cancelled.add(sn)
+                return sn, self.__watchers.pop(sn, [])
+            return None, []
+        else:
+            raise Exception('serial number (%s), not-found' % sn)
+
+    @synchronized
+    def __watch(self, sn, fn):
+        """
+        Add a cancellation watcher.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :param fn: A function called without arguments.
+        :type fn: callable
+        :return: False when already cancelled.
+        :rtype: bool
+        """
+        if sn in self.__cancelled:
+            return False
+        self.__watchers.setdefault(sn, []).append(fn)
+        return True
+
+    @synchronized
+    def __candidates(self, criteria):
+        """
+        Select the candidates to be matched using the index.
+        :param criteria: The object used to match RMI requests.
+        :type criteria: gofer.rmi.criteria.Criteria
+        :return: List of: (sn, locator).
+        :rtype: list
+        """
+        selected = self.__index.select(criteria)
+        if selected is None:
+            return self.__all.items()
+        return [(sn, self.__all[sn]) for sn in selected]
+
+
+def hashable(thing):
+    """
+    Get whether the object can be used as a dictionary key.
+    :param thing: An object.
+    :return: True if hashable.
+    :rtype: bool
+    """
+    try:
+        hash(thing)
+        return True
+    except TypeError:
+        return False
+
+
+def numeric(thing):
+    """
+    Get whether the object is a number.
+    :param thing: An object.
+    :return: True if a number.
+    :rtype: bool
+    """
+    return isinstance(thing, (int, long, float))
+
+
+class Index(object):
+    """
+    Tracked request locator index.
+    Used to select the candidates matched by criteria.  The selection
+    is a superset of the requests matched by the criteria.
+    :ivar values: Serial numbers by (hashable) locator.
+    :type values: dict
+    :ivar numbers: Sorted numeric locators.
+    :type numbers: list
+    :ivar numbered: Serial numbers of numeric locators (ordered as numbers).
+    :type numbered: list
+    :ivar other: Serial numbers of unhashable locators other
+        than dictionaries.
+    :type other: set
+    :ivar dicts: Serial numbers of dictionary locators.
+    :type dicts: set
+    :ivar keys: Serial numbers by dictionary key.  Only keys with
+        hashable values are indexed.
+    :type keys: dict
+    :ivar items: Serial numbers by dictionary (key, value).
+    :type items: dict
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.numbers = []
+        self.numbered = []
+        self.other = set()
+        self.dicts = set()
+        self.keys = {}
+        self.items = {}
+
+    def add(self, sn, locator):
+        """
+        Index a locator.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :param locator: The locator.
+        :type locator: object
+        """
+        if numeric(locator):
+            n = bisect_right(self.numbers, locator)
+            self.numbers.insert(n, locator)
+            self.numbered.insert(n, sn)
+        if hashable(locator):
+            self.values.setdefault(locator, set()).add(sn)
+        elif isinstance(locator, dict):
+            self.dicts.add(sn)
+        else:
+            self.other.add(sn)
+        if isinstance(locator, dict):
+            for k, v in locator.items():
+                if not hashable(v):
+                    continue
+                self.keys.setdefault(k, set()).add(sn)
+                self.items.setdefault((k, v), set()).add(sn)
+
+    def remove(self, sn, locator):
+        """
+        Remove a locator from the index.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :param locator: The (indexed) locator.
+        :type locator: object
+        """
+        if numeric(locator):
+            first = bisect_left(self.numbers, locator)
+            last = bisect_right(self.numbers, locator)
+            for n in range(first, last):
+                if self.numbered[n] == sn:
+                    del self.numbers[n]
+                    del self.numbered[n]
+                    break
+        if hashable(locator):
+            self._discard(self.values, locator, sn)
+        elif isinstance(locator, dict):
+            self.dicts.discard(sn)
+        else:
+            self.other.discard(sn)
+        if isinstance(locator, dict):
+            for k, v in locator.items():
+                if not hashable(v):
+                    continue
+                self._discard(self.keys, k, sn)
+                self._discard(self.items, (k, v), sn)
+
+    def select(self, criteria):
+        """
+        Select the candidates matched by the criteria.
+        :param criteria: The criteria.
+        :type criteria: gofer.rmi.criteria.Criteria
+        :return: The selected serial numbers or None when all
+            must be matched.
+        :rtype: set
+        """
+        for cls, method in (
+                (Match, self._match),
+                (Equal, self._equal),
+                (In, self._in),
+                (Greater, self._greater),
+                (Less, self._less),
+                (And, self._and),
+                (Or, self._or)):
+            if type(criteria) is cls:
+                return method(criteria.criteria)
+        return None
+
+    def _match(self, criteria):
+        if not isinstance(criteria, dict) or not criteria:
+            return set()
+        selected = set(self.dicts)
+        for k, v in criteria.items():
+            if not hashable(v):
+                continue
+            # locators without the key are matched
+            keyed = self.keys.get(k, set())
+            selected &= self.items.get((k, v), set()) | (self.dicts - keyed)
+        return selected
+
+    def _equal(self, criteria):
+        if not hashable(criteria):
+            return None
+        return self.values.get(criteria, set()) | self.other
+
+    def _in(self, criteria):
+        if not isinstance(criteria, (list, tuple, set, frozenset)):
+            return None
+        selected = set(self.other)
+        for value in criteria:
+            if not hashable(value):
+                return None
+            selected |= self.values.get(value, set())
+        return selected
+
+    def _greater(self, criteria):
+        if not numeric(criteria):
+            return None
+        n = bisect_right(self.numbers, criteria)
+        return set(self.numbered[n:]) | self._not_numbers()
+
+    def _less(self, criteria):
+        if not numeric(criteria):
+            return None
+        n = bisect_left(self.numbers, criteria)
+        return set(self.numbered[:n]) | self._not_numbers()
+
+    def _and(self, criteria):
+        left, right = [self.select(c) for c in criteria]
+        if left is None:
+            return right
+        if right is None:
+            return left
+        return left & right
+
+    def _or(self, criteria):
+        left, right = [self.select(c) for c in criteria]
+        if left is None or right is None:
+            return None
+        return left | right
+
+    def _not_numbers(self):
+        # locators of other types are ordered (by python) relative to numbers
+        # and must be matched
+        selected = self.other | self.dicts
+        for value, sns in self.values.items():
+            if not numeric(value):
+                selected |= sns
+        return selected
+
+    @staticmethod
+    def _discard(index, key, sn):
+        sns = index.get(key)
+        if sns is None:
+            return
+        sns.discard(sn)
+        if not sns:
+            del index[key]
+
 
 class Canceled(object):
     """
     Persistent collection of canceled requests by serial number.
-    :ivar collection: The set canceled requests (serial number).
-    :type collection: set
+    Cancellations are recorded in an append-only log which is
+    compacted when loaded and once the obsolete records exceed
+    the live entries.  Entries expire after TTL seconds so that
+    entries for requests that never ran are eventually discarded.
+    The log records are:
+      + <sn> <expiration>
+      - <sn>
+    :cvar TTL: The time (seconds) an entry is retained.
+    :type TTL: int
+    :cvar COMPACT: The minimum number of obsolete records that
+        triggers compaction.
+    :type COMPACT: int
+    :ivar collection: The canceled requests: {sn: expiration}.
+    :type collection: dict
+    :ivar obsolete: The number of obsolete records in the log.
+    :type obsolete: int
+    :ivar fp: The open log.
+    :type fp: file
     """
 
     PATH = '/var/lib/%s/messaging/canceled' % NAME
+    LOG = 'canceled.log'
+    TTL = 604800
+    COMPACT = 1000
 
     def __init__(self):
         mkdir(Canceled.PATH)
-        self.collection = set(os.listdir(Canceled.PATH))
+        self.collection = {}
+        self.obsolete = 0
+        self.fp = None
+        self.__mutex = RLock()
+        self.load()
+
+    @property
+    def path(self):
+        return os.path.join(Canceled.PATH, Canceled.LOG)
 
+    @synchronized
+    def load(self):
+        """
+        Load the log and compact.
+        Entries recorded as files (one per serial number) by
+        earlier versions are imported and the files deleted.
+        """
+        now = time()
+        try:
+            fp = open(self.path)
+            try:
+                for line in fp:
+                    self._replay(line.split())
+            finally:
+                fp.close()
+        except IOError, e:
+            if e.errno != errno.ENOENT:
+                raise
+        for sn, expiration in self.collection.items():
+            if expiration <= now:
+                del self.collection[sn]
+        for sn in os.listdir(Canceled.PATH):
+            path = os.path.join(Canceled.PATH, sn)
+            if sn.startswith(Canceled.LOG) or not os.path.isfile(path):
+                continue
+            self.collection[sn] = now + Canceled.TTL
+            unlink(path)
+        self.compact()
+
+    @synchronized
     def add(self, sn):
         """
         Add a serial number.
         :param sn: A canceled request serial number.
         :rtype: str
         """
-        self.collection.add(sn)
-        fp = open(os.path.join(Canceled.PATH, sn), 'w+')
-        try:
-            fp.write(sn)
-        finally:
-            fp.close()
+        expiration = time() + Canceled.TTL
+        if sn in self.collection:
+            self.obsolete += 1
+        self.collection[sn] = expiration
+        self._write('+ %s %f\n' % (sn, expiration))
 
+    @synchronized
     def delete(self, sn):
         """
         Delete a serial number.
         :param sn: A canceled request serial number.
         :rtype: str
         """
+        if sn not in self.collection:
+            return
+        del self.collection[sn]
+        self.obsolete += 2
+        self._write('- %s\n' % sn)
+        if self.obsolete >= max(Canceled.COMPACT, len(self.collection)):
+            self.compact()
+
+    @synchronized
+    def compact(self):
+        """
+        Rewrite the log containing only the (unexpired) entries.
+        """
+        now = time()
+        path = self.path
+        tmp = path + '.tmp'
+        fp = open(tmp, 'w')
         try:
-            self.collection.remove(sn)
-        except KeyError:
-            pass
+            for sn, expiration in self.collection.items():
+                if expiration <= now:
+                    del self.collection[sn]
+                    continue
+                fp.write('+ %s %f\n' % (sn, expiration))
+        finally:
+            fp.close()
+        self.close()
+        os.rename(tmp, path)
+        self.obsolete = 0
+
+    @synchronized
+    def close(self):
+        """
+        Close the log.
+        """
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+    def _replay(self, record):
+        """
+        Replay a log record.
+        Malformed records are ignored.
+        :param record: The (split) record.
+        :type record: list
+        """
         try:
-            os.unlink(os.path.join(Canceled.PATH, sn))
-        except OSError:
+            if record[0] == '+':
+                self.collection[record[1]] = float(record[2])
+                return
+            if record[0] == '-':
+                self.collection.pop(record[1], None)
+        except (IndexError, ValueError):
             pass
 
+    def _write(self, record):
+        """
+        Append a record to the log.
+        :param record: A log record.
+        :type record: str
+        """
+        if self.fp is None:
+            self.fp = open(self.path, 'a')
+        self.fp.write(record)
+        self.fp.flush()
+
+    @synchronized
     def __contains__(self, sn):
-        return sn in self.collection
+        expiration = self.collection.get(sn)
+        return expiration is not None and expiration > time()
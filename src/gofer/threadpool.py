@@ -21,7 +21,7 @@ from uuid import uuid4
 from Queue import Queue, Empty
 from logging import getLogger
 
-from gofer.common import Thread, released, utf8
+from gofer.common import Thread, released, utf8, purge
 
 
 log = getLogger(__name__)
@@ -92,6 +92,17 @@ class Worker(Thread):
                 break
         return pending
 
+    def purge(self, fn):
+        """
+        Remove queued (not started) calls.
+        :param fn: A function called with the function/method of
+            each queued call.  Returns True when the call is to be removed.
+        :type fn: callable
+        :return: A list of: Call.
+        :rtype: list
+        """
+        return purge(self.queue, lambda call: isinstance(call, Call) and fn(call.fn))
+
     def backlog(self):
         """
         Get the number of call already queued to this worker.
@@ -220,6 +231,20 @@ class ThreadPool:
             orphans += t.drain()
         return orphans
 
+    def purge(self, fn):
+        """
+        Remove queued (not started) calls.
+        :param fn: A function called with the function/method of
+            each queued call.  Returns True when the call is to be removed.
+        :type fn: callable
+        :return: List of removed calls.  List of: Call.
+        :rtype: list
+        """
+        removed = []
+        for t in self.threads:
+            removed += t.purge(fn)
+        return removed
+
     def __add(self):
         """
         Add a thread to the pool.
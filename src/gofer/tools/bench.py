@@ -0,0 +1,562 @@
+#
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+#
+
+"""
+RMI load generator.
+Concurrent clients send a mix of requests to one or more agents and
+the latency of each request phase is reported as percentiles.  When
+the URL specifies the (in-memory) loopback adapter, in-process agents
+are started for each address as a stand-in for real agents.  These
+schedule, journal and track requests the same as real agents and also
+provide the Bench.echo target which reports progress.
+"""
+
+import sys
+
+from shutil import rmtree
+from tempfile import mkdtemp
+from math import ceil
+from time import time
+from uuid import uuid4
+from random import Random
+from threading import RLock, Condition
+from optparse import OptionParser
+from logging import basicConfig, CRITICAL
+
+from gofer.common import Thread, synchronized
+from gofer.decorators import remote
+from gofer.messaging import Connection, Queue, URL
+from gofer.messaging.adapter.model import DEFAULT_URL
+from gofer.rmi.async import ReplyConsumer
+from gofer.rmi.consumer import RequestConsumer
+from gofer.rmi.dispatcher import Dispatcher
+from gofer.rmi.store import Pending
+from gofer.threadpool import ThreadPool
+from gofer.agent.rmi import Scheduler, Context
+from gofer.proxy import Agent
+
+
+USAGE = '[options]'
+
+LOOPBACK = 'loopback'
+
+# request kinds
+SYNC = 'sync'
+ASYNC = 'async'
+PROGRESS = 'progress'
+LARGE = 'large'
+
+KINDS = (SYNC, ASYNC, PROGRESS, LARGE)
+
+# request phases
+ACCEPTED = 'accepted'
+STARTED = 'started'
+COMPLETED = 'completed'
+
+PHASES = (ACCEPTED, STARTED, PROGRESS, COMPLETED)
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+parser = OptionParser(description='RMI load generator')
+parser.add_option('-u', '--url', default=DEFAULT_URL, help='url')
+parser.add_option('-a', '--address', help='agent (amqp) address(es), comma separated')
+parser.add_option('-t', '--target', default='Admin.echo', help='RMI target (default: Admin.echo)')
+parser.add_option('-c', '--clients', type='int', default=4, help='concurrent clients (default: 4)')
+parser.add_option('-n', '--requests', type='int', default=100, help='requests per client (default: 100)')
+parser.add_option(
+    '-m', '--mix', default=SYNC,
+    help='request mix: <kind>=<weight>,... kind: (sync|async|progress|large) (default: sync)')
+parser.add_option('-s', '--size', type='int', default=65536, help='large argument size (bytes)')
+parser.add_option('-w', '--wait', type='int', default=90, help='seconds to wait for a reply')
+parser.add_option('-T', '--threads', type='int', default=3, help='in-process agent threads (default: 3)')
+
+
+# --- latency ----------------------------------------------------------------
+
+
+def percentile(samples, p):
+    """
+    Get the (nearest rank) percentile.
+    :param samples: A sorted list of samples.
+    :type samples: list
+    :param p: The percentile (0-100).
+    :type p: float
+    :return: The sample at the percentile.
+    :rtype: float
+    """
+    if not samples:
+        return 0.0
+    n = int(ceil(p / 100.0 * len(samples)))
+    return samples[max(n, 1) - 1]
+
+
+class Latency(object):
+    """
+    Latency samples by request kind and phase.
+    Each sample is the time (seconds) from when the request was
+    sent until the phase was reported.
+    :ivar samples: Samples by: (kind, phase).
+    :type samples: dict
+    :ivar errors: Failed requests by kind.
+    :type errors: dict
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.__mutex = RLock()
+
+    @synchronized
+    def add(self, kind, phase, seconds):
+        """
+        Add a sample.
+        :param kind: The request kind.
+        :type kind: str
+        :param phase: The request phase.
+        :type phase: str
+        :param seconds: The latency (seconds).
+        :type seconds: float
+        """
+        self.samples.setdefault((kind, phase), []).append(seconds)
+
+    @synchronized
+    def failed(self, kind):
+        """
+        Count a failed request.
+        :param kind: The request kind.
+        :type kind: str
+        """
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    @synchronized
+    def completed(self):
+        """
+        Get the number of completed requests.
+        :rtype: int
+        """
+        n = 0
+        for key, samples in self.samples.items():
+            if key[1] == COMPLETED:
+                n += len(samples)
+        return n
+
+    @synchronized
+    def report(self):
+        """
+        Get the percentiles.
+        :return: List of: (kind, phase, count, [percentile,..]) in
+            milliseconds ordered by kind and phase.
+        :rtype: list
+        """
+        report = []
+        for kind in KINDS:
+            for phase in PHASES:
+                samples = sorted(self.samples.get((kind, phase), []))
+                if not samples:
+                    continue
+                measured = [percentile(samples, p) * 1000 for p in PERCENTILES]
+                report.append((kind, phase, len(samples), measured))
+        return report
+
+
+# --- clients ----------------------------------------------------------------
+
+
+class Mix(object):
+    """
+    A weighted request mix.
+    :ivar weights: List of: (kind, weight).
+    :type weights: list
+    """
+
+    @staticmethod
+    def parse(s):
+        """
+        Parse the mix.
+        :param s: A mix: <kind>=<weight>,...  The weight defaults to 1.
+        :type s: str
+        :return: The mix.
+        :rtype: Mix
+        :raise ValueError: on invalid kind or weight.
+        """
+        weights = []
+        for part in s.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            kind, _, weight = part.partition('=')
+            if kind not in KINDS:
+                raise ValueError('kind: %s, must be: (%s)' % (kind, '|'.join(KINDS)))
+            weights.append((kind, int(weight or 1)))
+        if not sum([w for k, w in weights]) > 0:
+            raise ValueError('mix: %s, not valid' % s)
+        return Mix(weights)
+
+    def __init__(self, weights):
+        """
+        :param weights: List of: (kind, weight).
+        :type weights: list
+        """
+        self.weights = weights
+
+    def select(self, random):
+        """
+        Select the kind of the next request.
+        :param random: A random number generator.
+        :type random: Random
+        :return: The selected kind.
+        :rtype: str
+        """
+        n = random.uniform(0, sum([w for k, w in self.weights]))
+        for kind, weight in self.weights:
+            n -= weight
+            if n <= 0:
+                return kind
+        return self.weights[-1][0]
+
+
+class Outstanding(object):
+    """
+    Tracks asynchronous requests not yet completed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.condition = Condition()
+
+    def add(self):
+        self.condition.acquire()
+        try:
+            self.count += 1
+        finally:
+            self.condition.release()
+
+    def done(self):
+        self.condition.acquire()
+        try:
+            self.count -= 1
+            self.condition.notifyAll()
+        finally:
+            self.condition.release()
+
+    def wait(self, timeout):
+        """
+        Wait for all outstanding requests to complete.
+        :param timeout: The time (seconds) to wait.
+        :type timeout: float
+        :return: The number still outstanding.
+        :rtype: int
+        """
+        expires = time() + timeout
+        self.condition.acquire()
+        try:
+            while self.count > 0:
+                remaining = expires - time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.count
+        finally:
+            self.condition.release()
+
+
+class Listener(object):
+    """
+    Asynchronous reply listener.
+    The request kind and sent time are round-tripped as user data.
+    """
+
+    def __init__(self, latency, outstanding):
+        """
+        :param latency: The latency samples.
+        :type latency: Latency
+        :param outstanding: The outstanding requests.
+        :type outstanding: Outstanding
+        """
+        self.latency = latency
+        self.outstanding = outstanding
+
+    def add(self, reply, phase):
+        self.latency.add(reply.data['kind'], phase, time() - reply.data['sent'])
+
+    def accepted(self, reply):
+        self.add(reply, ACCEPTED)
+
+    def rejected(self, reply):
+        self.latency.failed(reply.data['kind'])
+        self.outstanding.done()
+
+    def started(self, reply):
+        self.add(reply, STARTED)
+
+    def progress(self, reply):
+        self.add(reply, PROGRESS)
+
+    def succeeded(self, reply):
+        self.add(reply, COMPLETED)
+        self.outstanding.done()
+
+    def failed(self, reply):
+        self.latency.failed(reply.data['kind'])
+        self.outstanding.done()
+
+
+class Client(Thread):
+    """
+    A client sending a mix of requests.
+    Requests are distributed (round-robin) to the agents.
+    :ivar options: The command options.
+    :ivar mix: The request mix.
+    :type mix: Mix
+    :ivar reply: The asynchronous reply queue name.
+    :type reply: str
+    :ivar latency: The latency samples.
+    :type latency: Latency
+    :ivar outstanding: The outstanding (asynchronous) requests.
+    :type outstanding: Outstanding
+    """
+
+    def __init__(self, n, options, mix, reply, latency, outstanding):
+        Thread.__init__(self, name='client:%d' % n)
+        self.options = options
+        self.mix = mix
+        self.reply = reply
+        self.latency = latency
+        self.outstanding = outstanding
+        self.random = Random(n)
+        self.setDaemon(True)
+
+    def method(self, address, kind, sent):
+        """
+        Get the RMI method for the request kind.
+        """
+        options = self.options
+
+        def status(report):
+            self.latency.add(kind, report['status'], time() - sent)
+
+        if kind == ASYNC:
+            agent = Agent(options.url, address, reply=self.reply, wait=0, data=dict(kind=kind, sent=sent))
+        elif kind == PROGRESS:
+            def progress(report):
+                self.latency.add(kind, PROGRESS, time() - sent)
+            agent = Agent(options.url, address, wait=options.wait, status=status, progress=progress)
+        else:
+            agent = Agent(options.url, address, wait=options.wait, status=status)
+        target = options.target.split('.', 1)
+        stub = getattr(agent, target[0])
+        return getattr(stub, target[1])
+
+    def call(self, address, kind):
+        """
+        Send a request and measure the latency.
+        :param address: The agent address.
+        :type address: str
+        :param kind: The request kind.
+        :type kind: str
+        """
+        if kind == LARGE:
+            argument = 'X' * self.options.size
+        else:
+            argument = kind
+        sent = time()
+        method = self.method(address, kind, sent)
+        if kind == ASYNC:
+            self.outstanding.add()
+        try:
+            method(argument)
+            if kind != ASYNC:
+                self.latency.add(kind, COMPLETED, time() - sent)
+        except Exception:
+            self.latency.failed(kind)
+            if kind == ASYNC:
+                self.outstanding.done()
+
+    def run(self):
+        options = self.options
+        addresses = options.address.split(',')
+        with Connection(options.url, retry=False):
+            for n in range(options.requests):
+                address = addresses[n % len(addresses)]
+                kind = self.mix.select(self.random)
+                self.call(address, kind)
+
+
+# --- in-process agent -------------------------------------------------------
+
+
+class Bench(object):
+    """
+    The in-process agent RMI target.
+    """
+
+    @remote
+    def echo(self, text):
+        """
+        Report progress and echo the specified text.
+        :param text: Any text.
+        :type text: str
+        :return: The specified text.
+        :rtype: str
+        """
+        progress = Context.current().progress
+        progress.details = 'echo'
+        progress.report()
+        return text
+
+
+class StandIn(object):
+    """
+    An in-process agent (plugin) used as a stand-in for a real
+    agent.  Requests are scheduled and dispatched to the thread
+    pool by the agent scheduler.
+    :ivar queue: The agent queue.
+    :type queue: Queue
+    :ivar pool: The thread pool.
+    :type pool: ThreadPool
+    :ivar dispatcher: The RMI dispatcher.
+    :type dispatcher: Dispatcher
+    :ivar scheduler: The request scheduler.
+    :type scheduler: Scheduler
+    :ivar consumer: The request consumer.
+    :type consumer: RequestConsumer
+    """
+
+    def __init__(self, url, address, threads):
+        """
+        :param url: The broker URL.
+        :type url: str
+        :param address: The agent queue name.
+        :type address: str
+        :param threads: The number of threads in the pool.
+        :type threads: int
+        """
+        self.name = address
+        self.url = url
+        self.container = None
+        self.authenticator = None
+        self.codec = None
+        self.compression = None
+        self.signing = None
+        self.queue = Queue(address)
+        self.pool = ThreadPool(threads)
+        self.dispatcher = Dispatcher([Bench])
+        self.scheduler = Scheduler(self)
+        self.consumer = RequestConsumer(self.queue, self)
+
+    def dispatch(self, request):
+        return self.dispatcher.dispatch(request)
+
+    def start(self):
+        self.queue.declare(self.url)
+        self.scheduler.start()
+        self.consumer.start()
+
+    def shutdown(self):
+        self.consumer.shutdown()
+        self.consumer.join()
+        self.pool.shutdown()
+        self.scheduler.shutdown()
+
+    def join(self):
+        self.scheduler.join()
+        self.scheduler.pending.delete()
+
+
+# --- main -------------------------------------------------------------------
+
+
+def validate(options):
+    if not options.address:
+        print 'Address must be specified'
+        parser.print_help()
+        sys.exit(1)
+    if '.' not in options.target:
+        print 'Target must be: <class>.<method>'
+        parser.print_help()
+        sys.exit(1)
+    if options.clients < 1 or options.requests < 1:
+        print 'Clients and requests must be > 0'
+        parser.print_help()
+        sys.exit(1)
+    try:
+        return Mix.parse(options.mix)
+    except ValueError, e:
+        print e
+        parser.print_help()
+        sys.exit(1)
+
+
+def report(options, latency, elapsed):
+    completed = latency.completed()
+    errors = sum(latency.errors.values())
+    print 'clients: %d, requests: %d, completed: %d, errors: %d' % (
+        options.clients, options.clients * options.requests, completed, errors)
+    print 'elapsed: %.3f (seconds), throughput: %.1f (requests/second)' % (
+        elapsed, completed / elapsed)
+    print ''
+    header = ['kind', 'phase', 'count'] + ['p%s' % p for p in PERCENTILES]
+    print '%-10s %-10s %8s %10s %10s %10s %10s  (ms)' % tuple(header)
+    for kind, phase, count, measured in latency.report():
+        row = [kind, phase, count] + measured
+        print '%-10s %-10s %8d %10.2f %10.2f %10.2f %10.2f' % tuple(row)
+
+
+def main():
+    options, arguments = parser.parse_args()
+    basicConfig(level=CRITICAL)
+    mix = validate(options)
+
+    agents = []
+    journal = None
+    if URL(options.url).adapter == LOOPBACK:
+        journal = mkdtemp(prefix='gofer-bench-')
+        Pending.PENDING = journal
+        for address in options.address.split(','):
+            agent = StandIn(options.url, address, options.threads)
+            agent.start()
+            agents.append(agent)
+
+    latency = Latency()
+    outstanding = Outstanding()
+    reply = Queue('gofer.bench.%s' % uuid4())
+    reply.durable = False
+    reply.auto_delete = True
+    reply.declare(options.url)
+    listener = ReplyConsumer(reply, options.url)
+    listener.start(Listener(latency, outstanding))
+
+    try:
+        started = time()
+        clients = []
+        for n in range(options.clients):
+            client = Client(n, options, mix, reply.name, latency, outstanding)
+            client.start()
+            clients.append(client)
+        for client in clients:
+            client.join()
+        lost = outstanding.wait(options.wait)
+        elapsed = time() - started
+        for n in range(lost):
+            latency.failed(ASYNC)
+        report(options, latency, elapsed)
+    finally:
+        listener.shutdown()
+        listener.join()
+        for agent in agents:
+            agent.shutdown()
+        for agent in agents:
+            agent.join()
+        if journal:
+            rmtree(journal, ignore_errors=True)
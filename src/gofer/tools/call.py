@@ -40,6 +40,9 @@ parser.add_option('-d', '--data', help='user (json) data')
 parser.add_option('-S', '--secret', help='shared secret')
 parser.add_option('-T', '--ttl', help='shared secret')
 parser.add_option('-A', '--authenticator', help='authenticator python package')
+parser.add_option('-c', '--codec', help='document codec (json|compact|msgpack)')
+parser.add_option('-z', '--compression', help='compress requests larger than (bytes)')
+parser.add_option('-D', '--detached', action='store_true', help='detached message signatures')
 parser.add_option('-U', '--user', help='user')
 parser.add_option('-P', '--password', help='password')
 
@@ -146,6 +149,12 @@ def main():
         name = parts[-1]
         mod = __import__(path, {}, {}, [name])
         g_opt['authenticator'] = getattr(mod, name)()
+    if options.codec:
+        g_opt['codec'] = options.codec
+    if options.compression:
+        g_opt['compression'] = int(options.compression)
+    if options.detached:
+        g_opt['signing'] = 'detached'
     if options.user:
         g_opt['user'] = options.user
     if options.password:
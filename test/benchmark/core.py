@@ -0,0 +1,260 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Benchmark timing, results and baseline comparison.
+Results (JSON) format:
+  {
+    version: 1,
+    python: <version>,
+    timestamp: <float>,
+    results: {
+      <name>: {
+        iterations: <int>,
+        best: <seconds per operation>,
+        mean: <seconds per operation>,
+        ops: <operations per second>
+      }
+    }
+  }
+"""
+
+import sys
+import json
+
+from time import time
+
+
+VERSION = 1
+
+# default iterations (per round)
+ITERATIONS = 1000
+
+# default rounds
+ROUNDS = 5
+
+# default regression tolerance
+TOLERANCE = 0.10
+
+
+class Benchmark(object):
+    """
+    A benchmark.
+    :ivar name: The benchmark name.
+    :type name: str
+    :ivar fn: The function being measured.  Called with the
+        value returned by setup() and the iteration number.
+    :type fn: callable
+    :ivar setup: Called (once) before measuring.
+    :type setup: callable
+    :ivar teardown: Called (once) after measuring with
+        the value returned by setup().
+    :type teardown: callable
+    """
+
+    def __init__(self, name, fn, setup=None, teardown=None):
+        """
+        :param name: The benchmark name.
+        :type name: str
+        :param fn: The function being measured.
+        :type fn: callable
+        :param setup: Called (once) before measuring.
+        :type setup: callable
+        :param teardown: Called (once) after measuring.
+        :type teardown: callable
+        """
+        self.name = name
+        self.fn = fn
+        self.setup = setup or (lambda: None)
+        self.teardown = teardown or (lambda context: None)
+
+    def __call__(self, iterations=ITERATIONS, rounds=ROUNDS):
+        """
+        Run the benchmark.
+        :param iterations: The number of iterations per round.
+        :type iterations: int
+        :param rounds: The number of (timed) rounds.
+        :type rounds: int
+        :return: The result.
+        :rtype: Result
+        """
+        fn = self.fn
+        context = self.setup()
+        try:
+            timings = []
+            for r in range(rounds):
+                started = time()
+                for n in xrange(iterations):
+                    fn(context, n)
+                timings.append((time() - started) / iterations)
+            return Result(iterations, min(timings), sum(timings) / len(timings))
+        finally:
+            self.teardown(context)
+
+
+class Result(object):
+    """
+    A benchmark result.
+    :ivar iterations: The number of iterations per round.
+    :type iterations: int
+    :ivar best: The best (seconds) per operation.
+    :type best: float
+    :ivar mean: The mean (seconds) per operation.
+    :type mean: float
+    """
+
+    @staticmethod
+    def load(d):
+        """
+        Load a result from its dictionary representation.
+        :param d: A dictionary.
+        :type d: dict
+        :return: The result.
+        :rtype: Result
+        """
+        return Result(d['iterations'], d['best'], d['mean'])
+
+    def __init__(self, iterations, best, mean):
+        self.iterations = iterations
+        self.best = best
+        self.mean = mean
+
+    @property
+    def ops(self):
+        """
+        Operations per second (best).
+        """
+        if self.best:
+            return 1.0 / self.best
+        else:
+            return 0.0
+
+    def dump(self):
+        """
+        Get the dictionary representation.
+        :rtype: dict
+        """
+        return dict(
+            iterations=self.iterations,
+            best=self.best,
+            mean=self.mean,
+            ops=self.ops)
+
+    def __str__(self):
+        return '%10.2f usec  %12.0f ops/sec' % (self.best * 1e6, self.ops)
+
+
+class Results(dict):
+    """
+    Benchmark results by name.
+    """
+
+    @staticmethod
+    def read(path):
+        """
+        Read results from a (JSON) file.
+        :param path: The file path.
+        :type path: str
+        :return: The results.
+        :rtype: Results
+        :raise ValueError: on unsupported version.
+        """
+        fp = open(path)
+        try:
+            d = json.load(fp)
+        finally:
+            fp.close()
+        if d.get('version') != VERSION:
+            raise ValueError('%s: version %s not supported' % (path, d.get('version')))
+        results = Results()
+        for name, result in d['results'].items():
+            results[name] = Result.load(result)
+        return results
+
+    def write(self, path):
+        """
+        Write results to a (JSON) file.
+        :param path: The file path.
+        :type path: str
+        """
+        d = dict(
+            version=VERSION,
+            python=sys.version.split()[0],
+            timestamp=time(),
+            results=dict([(n, r.dump()) for n, r in self.items()]))
+        fp = open(path, 'w')
+        try:
+            json.dump(d, fp, indent=2, sort_keys=True)
+        finally:
+            fp.close()
+
+    def compare(self, baseline, tolerance=TOLERANCE):
+        """
+        Compare to a baseline.
+        A benchmark has regressed when the best time per operation
+        exceeds the baseline by more than the tolerance.  Benchmarks
+        not in the baseline are ignored.
+        :param baseline: The baseline results.
+        :type baseline: Results
+        :param tolerance: The tolerated slowdown (ratio).
+        :type tolerance: float
+        :return: List of: (name, change, regressed) sorted by name where
+            the change is the ratio of the difference to the baseline.
+            Positive is slower.
+        :rtype: list
+        """
+        compared = []
+        for name, result in sorted(self.items()):
+            base = baseline.get(name)
+            if base is None or not base.best:
+                continue
+            change = (result.best - base.best) / base.best
+            compared.append((name, change, change > tolerance))
+        return compared
+
+
+class Suite(object):
+    """
+    A benchmark suite.
+    :ivar benchmarks: List of: Benchmark.
+    :type benchmarks: list
+    """
+
+    def __init__(self, benchmarks):
+        """
+        :param benchmarks: List of: Benchmark.
+        :type benchmarks: list
+        """
+        self.benchmarks = benchmarks
+
+    def __call__(self, iterations=ITERATIONS, rounds=ROUNDS, selected=None, report=None):
+        """
+        Run the suite.
+        :param iterations: The number of iterations per round.
+        :type iterations: int
+        :param rounds: The number of (timed) rounds.
+        :type rounds: int
+        :param selected: Name prefixes of the benchmarks to be run.
+        :type selected: list
+        :param report: Called with (name, result) as each benchmark completes.
+        :type report: callable
+        :return: The results.
+        :rtype: Results
+        """
+        results = Results()
+        for benchmark in self.benchmarks:
+            if selected and not [s for s in selected if benchmark.name.startswith(s)]:
+                continue
+            result = benchmark(iterations, rounds)
+            results[benchmark.name] = result
+            if report:
+                report(benchmark.name, result)
+        return results
@@ -0,0 +1,72 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+The benchmark runner.
+Exits 1 when compared to a baseline and any benchmark has regressed.
+"""
+
+import os
+import sys
+
+from optparse import OptionParser
+from logging import basicConfig, CRITICAL
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.core import Suite, Results, ITERATIONS, ROUNDS, TOLERANCE
+from benchmark.cases import BENCHMARKS
+
+
+USAGE = '[options] [<name>...]'
+
+
+parser = OptionParser(usage='%prog ' + USAGE, description='Run micro-benchmarks')
+parser.add_option('-n', '--iterations', type='int', default=ITERATIONS, help='iterations per round')
+parser.add_option('-r', '--rounds', type='int', default=ROUNDS, help='(timed) rounds')
+parser.add_option('-o', '--output', help='write results (json) to file')
+parser.add_option('-b', '--baseline', help='compare to baseline results (json) file')
+parser.add_option(
+    '-t', '--tolerance', type='float', default=TOLERANCE * 100, help='tolerated slowdown (percent)')
+
+
+def report(name, result):
+    print '%-24s %s' % (name, result)
+
+
+def compare(results, path, tolerance):
+    regressed = False
+    baseline = Results.read(path)
+    print '\ncompared to: %s' % path
+    for name, change, failed in results.compare(baseline, tolerance):
+        if failed:
+            regressed = True
+            status = 'REGRESSED'
+        else:
+            status = ''
+        print '%-24s %+8.1f%%  %s' % (name, change * 100, status)
+    return regressed
+
+
+def main():
+    basicConfig(level=CRITICAL)
+    options, selected = parser.parse_args()
+    suite = Suite(BENCHMARKS)
+    results = suite(options.iterations, options.rounds, selected, report)
+    if options.output:
+        results.write(options.output)
+    if options.baseline:
+        if compare(results, options.baseline, options.tolerance / 100.0):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -111,6 +111,35 @@ class TestContainer(TestCase):
         plugins = cnt.all()
         self.assertEqual(plugins, [1, 2])
 
+    def test_build(self):
+        def plugin(name, catalog, forward, accept):
+            p = Mock(forward=set(forward), accept=set(accept))
+            p.name = name
+            p.dispatcher.catalog = dict([(n, None) for n in catalog])
+            p.provides.side_effect = p.dispatcher.catalog.__contains__
+            return p
+        a = plugin('a', ['Dog'], ['*'], [])
+        b = plugin('b', ['Dog', 'Cat'], [], ['a'])
+        c = plugin('c', ['Bird'], ['a'], ['*'])
+        d = plugin('d', ['Fish'], [], ['b'])
+        cnt = Container()
+        for p in (a, b, c, d):
+            cnt.add(p)
+        cnt.build()
+        self.assertEqual(
+            cnt.routes[a],
+            {
+                'Cat': b.dispatcher,
+                'Bird': c.dispatcher,
+            })
+        self.assertEqual(cnt.routes[b], {})
+        self.assertEqual(cnt.routes[c], {})
+        self.assertEqual(cnt.routes[d], {})
+        self.assertEqual(cnt.route(a, 'Cat'), b.dispatcher)
+        self.assertEqual(cnt.route(a, 'Dog'), None)
+        self.assertEqual(cnt.route(a, 'Fish'), None)
+        self.assertEqual(cnt.route(Mock(), 'Dog'), None)
+
 
 class TestPlugin(TestCase):
 
@@ -158,7 +187,9 @@ class TestPlugin(TestCase):
                 accept='d, e, f'),
             messaging=Mock(
                 uuid='x99',
-                url='amqp://localhost')
+                url='amqp://localhost',
+                compression='1024',
+                auth_threads='4')
         )
         plugin = Plugin(descriptor, '')
         plugin.scheduler = Mock()
@@ -170,6 +201,14 @@ class TestPlugin(TestCase):
         self.assertEqual(plugin.uuid, descriptor.messaging.uuid)
         # url
         self.assertEqual(plugin.url, descriptor.messaging.url)
+        # codec
+        self.assertEqual(plugin.codec, descriptor.messaging.codec)
+        # compression
+        self.assertEqual(plugin.compression, 1024)
+        # signing
+        self.assertEqual(plugin.signing, descriptor.messaging.signing)
+        # auth_threads
+        self.assertEqual(plugin.auth_threads, 4)
         # enabled
         self.assertTrue(plugin.enabled)
         # connector
@@ -274,7 +313,9 @@ class TestPlugin(TestCase):
                 url='amqp://localhost',
                 cacert='ca',
                 clientkey='key',
-                clientcert='crt')
+                clientcert='crt',
+                heartbeat='15',
+                failover='amqp://b, amqp://c')
         )
 
         # test
@@ -289,6 +330,8 @@ class TestPlugin(TestCase):
         self.assertEqual(connector.ssl.client_key, descriptor.messaging.clientkey)
         self.assertEqual(connector.ssl.client_certificate, descriptor.messaging.clientcert)
         self.assertEqual(connector.ssl.host_validation, descriptor.messaging.host_validation)
+        self.assertEqual(connector.heartbeat, 15)
+        self.assertEqual(connector.failover, ['amqp://b', 'amqp://c'])
 
     @patch('gofer.agent.plugin.Node')
     @patch('gofer.agent.plugin.RequestConsumer')
@@ -298,7 +341,7 @@ class TestPlugin(TestCase):
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_attach(self, pool, model, consumer, node):
         queue = 'test'
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4), messaging=Mock(auth_threads='2'))
         pool.return_value.run.side_effect = lambda fn: fn()
         model.return_value.queue = queue
 
@@ -318,6 +361,7 @@ class TestPlugin(TestCase):
         consumer = consumer.return_value
         consumer.start.assert_called_once_with()
         self.assertEqual(consumer.authenticator, plugin.authenticator)
+        self.assertEqual(consumer.auth_threads, 2)
         self.assertEqual(plugin.consumer, consumer)
 
     @patch('gofer.agent.plugin.BrokerModel')
@@ -374,6 +418,25 @@ class TestPlugin(TestCase):
         self.assertFalse(model.teardown.called)
         self.assertEqual(plugin.consumer, None)
 
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_dispatch(self, container):
+        descriptor = Mock(main=Mock(threads=4))
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(descriptor, '')
+        plugin.dispatcher = Mock()
+        # routed
+        routed = container.route.return_value
+        self.assertEqual(plugin.dispatch(request), routed.dispatch.return_value)
+        container.route.assert_called_once_with(plugin, 'Dog')
+        routed.dispatch.assert_called_once_with(request)
+        # local
+        container.route.return_value = None
+        self.assertEqual(plugin.dispatch(request), plugin.dispatcher.dispatch.return_value)
+        plugin.dispatcher.dispatch.assert_called_once_with(request)
+
     @patch('gofer.agent.plugin.ThreadPool', Mock())
     @patch('gofer.agent.plugin.Scheduler', Mock())
     @patch('gofer.agent.plugin.Whiteboard', Mock())
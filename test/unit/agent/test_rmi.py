@@ -13,7 +13,7 @@ from unittest import TestCase
 
 from mock import patch, Mock
 
-from gofer.agent.rmi import Scheduler
+from gofer.agent.rmi import Scheduler, Task
 from gofer.messaging import Document
 
 
@@ -24,8 +24,16 @@ class TestScheduler(TestCase):
     @patch('gofer.agent.rmi.Builtin')
     def test_init(self, builtin, pending, set_daemon):
         plugin = Mock()
-        scheduler = Scheduler(plugin)
-        pending.assert_called_once_with(plugin.name)
+
+        def _pending(*unused, **unused_kw):
+            # builtin assigned before the journal is restored
+            self.assertEqual(scheduler.builtin, builtin.return_value)
+            return pending.return_value
+
+        pending.side_effect = _pending
+        scheduler = Scheduler.__new__(Scheduler)
+        Scheduler.__init__(scheduler, plugin)
+        pending.assert_called_once_with(plugin.name, cancelled=scheduler.cancelled)
         builtin.assert_called_once_with(plugin)
         set_daemon.assert_called_with(True)
         self.assertEqual(scheduler.plugin, plugin)
@@ -126,6 +134,147 @@ class TestScheduler(TestCase):
         scheduler.add(request)
         pending.return_value.put.assert_called_once_with(request)
 
+    @patch('gofer.agent.rmi.timestamp')
+    @patch('gofer.agent.rmi.Task._producer')
+    @patch('gofer.agent.rmi.Scheduler.select_plugin')
+    @patch('gofer.agent.rmi.Tracker')
+    @patch('gofer.agent.rmi.Pending')
+    @patch('gofer.agent.rmi.Builtin', Mock())
+    @patch('threading.Thread.setDaemon', Mock())
+    def test_cancelled(self, pending, tracker, select_plugin, producer, timestamp):
+        plugin = Mock()
+        request = Document(sn='123', replyto='xyz', data=18)
+        tracker.return_value.started.return_value = False
+        pending.return_value.remove.return_value = request
+        scheduler = Scheduler(plugin)
+        scheduler.cancelled(request)
+        tracker.return_value.started.assert_called_once_with(request.sn)
+        pending.return_value.remove.assert_called_once_with(request.sn)
+        self.assertFalse(select_plugin.return_value.pool.purge.called)
+        pending.return_value.commit.assert_called_once_with(request.sn)
+        tracker.return_value.remove.assert_called_once_with(request.sn)
+        producer.assert_called_once_with(select_plugin.return_value)
+        producer.return_value.open.assert_called_once_with()
+        call = producer.return_value.send.call_args
+        self.assertEqual(call[0], (request.replyto,))
+        self.assertEqual(call[1]['sn'], request.sn)
+        self.assertEqual(call[1]['data'], request.data)
+        self.assertEqual(call[1]['status'], 'cancelled')
+        self.assertEqual(call[1]['timestamp'], timestamp.return_value)
+        self.assertEqual(call[1]['result']['xclass'], 'RequestCancelled')
+        producer.return_value.close.assert_called_once_with()
+
+    @patch('gofer.agent.rmi.Task._producer')
+    @patch('gofer.agent.rmi.Tracker')
+    @patch('gofer.agent.rmi.Pending')
+    @patch('gofer.agent.rmi.Builtin', Mock())
+    @patch('threading.Thread.setDaemon', Mock())
+    def test_cancelled_started(self, pending, tracker, producer):
+        plugin = Mock()
+        request = Document(sn='123', replyto='xyz')
+        tracker.return_value.started.return_value = True
+        scheduler = Scheduler(plugin)
+        scheduler.cancelled(request)
+        self.assertFalse(pending.return_value.remove.called)
+        self.assertFalse(pending.return_value.commit.called)
+        self.assertFalse(producer.called)
+
+    @patch('gofer.agent.rmi.Task._producer')
+    @patch('gofer.agent.rmi.Scheduler.select_plugin')
+    @patch('gofer.agent.rmi.Tracker')
+    @patch('gofer.agent.rmi.Pending')
+    @patch('gofer.agent.rmi.Builtin', Mock())
+    @patch('threading.Thread.setDaemon', Mock())
+    def test_cancelled_pooled(self, pending, tracker, select_plugin, producer):
+        plugin = Mock()
+        request = Document(sn='123', replyto='xyz')
+        tracker.return_value.started.return_value = False
+        pending.return_value.remove.return_value = None
+        pool = select_plugin.return_value.pool
+        pool.purge.return_value = [Mock()]
+        scheduler = Scheduler(plugin)
+        scheduler.cancelled(request)
+        fn = pool.purge.call_args[0][0]
+        self.assertTrue(fn(Task(plugin, request, None)))
+        self.assertFalse(fn(Task(plugin, Document(sn='456'), None)))
+        self.assertFalse(fn(Mock(request=request)))
+        pending.return_value.commit.assert_called_once_with(request.sn)
+        self.assertEqual(producer.return_value.send.call_args[1]['status'], 'cancelled')
+
+    @patch('gofer.agent.rmi.Task._producer')
+    @patch('gofer.agent.rmi.Scheduler.select_plugin')
+    @patch('gofer.agent.rmi.Tracker')
+    @patch('gofer.agent.rmi.Pending')
+    @patch('gofer.agent.rmi.Builtin', Mock())
+    @patch('threading.Thread.setDaemon', Mock())
+    def test_cancelled_in_transit(self, pending, tracker, select_plugin, producer):
+        plugin = Mock()
+        request = Document(sn='123', replyto='xyz')
+        tracker.return_value.started.return_value = False
+        pending.return_value.remove.return_value = None
+        select_plugin.return_value.pool.purge.return_value = []
+        scheduler = Scheduler(plugin)
+        scheduler.cancelled(request)
+        # dropped when dequeued
+        self.assertFalse(pending.return_value.commit.called)
+        self.assertFalse(tracker.return_value.remove.called)
+        self.assertFalse(producer.called)
+
+    @patch('gofer.common.Thread.aborted')
+    @patch('gofer.agent.rmi.Task')
+    @patch('gofer.agent.rmi.Tracker')
+    @patch('gofer.agent.rmi.Pending')
+    @patch('gofer.agent.rmi.Builtin')
+    @patch('threading.Thread.setDaemon', Mock())
+    def test_run_cancelled(self, builtin, pending, tracker, task, aborted):
+        plugin = Mock()
+        request = Document(sn=1, request={'classname': 'A'})
+        aborted.side_effect = [False, True]
+        pending.return_value.get.return_value = request
+        builtin.return_value.provides.return_value = False
+        tracker.return_value.cancelled.return_value = True
+
+        # test
+        scheduler = Scheduler(plugin)
+        scheduler.run()
+
+        # validation
+        tracker.return_value.cancelled.assert_called_once_with(request.sn)
+        task.cancelled.assert_called_once_with(plugin, request, pending.return_value.commit)
+        self.assertFalse(task.called)
+        self.assertFalse(plugin.pool.run.called)
+
+
+class TestTask(TestCase):
+
+    @patch('gofer.agent.rmi.Task._producer')
+    @patch('gofer.agent.rmi.Tracker')
+    def test_call_cancelled(self, tracker, producer):
+        plugin = Mock()
+        commit = Mock()
+        request = Document(sn='123', replyto='xyz', data=18)
+        tracker.return_value.start.return_value = False
+        task = Task(plugin, request, commit)
+        task()
+        tracker.return_value.start.assert_called_once_with(request.sn)
+        commit.assert_called_once_with(request.sn)
+        tracker.return_value.remove.assert_called_once_with(request.sn)
+        self.assertFalse(plugin.dispatch.called)
+        producer.assert_called_once_with(plugin)
+        call = producer.return_value.send.call_args
+        self.assertEqual(call[0], (request.replyto,))
+        self.assertEqual(call[1]['status'], 'cancelled')
+        self.assertEqual(call[1]['result']['xclass'], 'RequestCancelled')
+
+    @patch('gofer.agent.rmi.Task._producer')
+    @patch('gofer.agent.rmi.Tracker', Mock())
+    def test_cancelled_no_reply(self, producer):
+        commit = Mock()
+        request = Document(sn='123', replyto=None)
+        Task.cancelled(Mock(), request, commit)
+        commit.assert_called_once_with(request.sn)
+        self.assertFalse(producer.called)
+
     @patch('gofer.agent.rmi.Builtin')
     @patch('gofer.common.Thread.abort')
     @patch('gofer.agent.rmi.Pending', Mock())
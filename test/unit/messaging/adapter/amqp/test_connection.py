@@ -40,7 +40,7 @@ class TestConnection(TestCase):
         self.assertTrue(isinstance(c, BaseConnection))
         self.assertEqual(c.url, url)
 
-    @patch('gofer.messaging.adapter.amqp.connection.Connector.find')
+    @patch('gofer.messaging.adapter.connect.Connector.find')
     @patch('gofer.messaging.adapter.amqp.connection.Connection.ssl_domain')
     @patch('gofer.messaging.adapter.amqp.connection.RealConnection')
     def test_open(self, connection, ssl_domain, find):
@@ -49,6 +49,7 @@ class TestConnection(TestCase):
         connector.ssl.ca_certificate = 'test-ca'
         connector.ssl.client_key = 'test-key'
         connector.ssl.client_certificate = 'test-crt'
+        connector.heartbeat = 30
         find.return_value = connector
 
         # test
@@ -64,10 +65,34 @@ class TestConnection(TestCase):
             userid=connector.userid,
             password=connector.password,
             ssl=ssl_domain.return_value,
+            heartbeat=0,
             confirm_publish=True)
 
         self.assertEqual(c._impl, connection.return_value)
 
+    @patch('gofer.messaging.adapter.connect.Connector.find')
+    @patch('gofer.messaging.adapter.amqp.connection.Connection.ssl_domain')
+    @patch('gofer.messaging.adapter.amqp.connection.RealConnection')
+    def test_open_reader_after_sender(self, connection, ssl_domain, find):
+        url = TEST_URL
+        connector = Connector(url)
+        connector.heartbeat = 30
+        find.return_value = connector
+        connection.side_effect = lambda **unused: Mock()
+
+        # test
+        sender = Connection(url)
+        sender.open()
+        reader = Connection(url, heartbeat=True)
+        reader.open()
+
+        # validation
+        self.assertFalse(sender is reader)
+        self.assertTrue(Connection(url, heartbeat=True) is reader)
+        heartbeats = [c[1]['heartbeat'] for c in connection.call_args_list]
+        self.assertEqual(heartbeats, [0, 30])
+        self.assertFalse(sender._impl is reader._impl)
+
     def test_open_already(self):
         url = TEST_URL
         c = Connection(url)
@@ -133,7 +158,8 @@ class TestConnection(TestCase):
         # validation
         self.assertEqual(ssl, None)
 
-    def test_close(self):
+    @patch('gofer.messaging.adapter.amqp.connection.Domain')
+    def test_close(self, domain):
         url = 'test-url'
         c = Connection(url)
         impl = Mock()
@@ -141,6 +167,7 @@ class TestConnection(TestCase):
         c.close()
         impl.close.assert_called_once_with()
         self.assertEqual(c._impl, None)
+        domain.declared.invalidate.assert_called_once_with(url)
 
     def test_close_failed(self):
         url = 'test-url'
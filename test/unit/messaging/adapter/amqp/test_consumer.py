@@ -11,18 +11,22 @@
 
 import select
 
+from socket import timeout as SocketTimeout
+
 from unittest import TestCase
 
 from mock import Mock, patch
 
 from gofer.devel import ipatch
 
+from gofer.common import ThreadSingleton
 from gofer.messaging.adapter.model import Message
 
 with ipatch('amqp'):
+    from gofer.messaging.adapter.amqp.producer import Sender
     from gofer.messaging.adapter.amqp.consumer import Receiver, Inbox, Empty
     from gofer.messaging.adapter.amqp.consumer import Reader, BaseReader
-    from gofer.messaging.adapter.amqp.consumer import DELIVERY_TAG
+    from gofer.messaging.adapter.amqp.consumer import DELIVERY_TAG, HEARTBEAT_RATE
 
 
 class Queue(object):
@@ -48,7 +52,7 @@ class TestReader(TestCase):
         reader = Reader(node, url=url)
 
         # validation
-        connection.assert_called_once_with(url)
+        connection.assert_called_once_with(url, heartbeat=True)
         self.assertTrue(isinstance(reader, BaseReader))
         self.assertEqual(reader.url, url)
         self.assertEqual(reader.connection, connection.return_value)
@@ -56,6 +60,18 @@ class TestReader(TestCase):
         self.assertEqual(reader.channel, None)
         self.assertEqual(reader.receiver, None)
 
+    def test_sender_first(self):
+        url = 'amqp://localhost'
+        ThreadSingleton.all().clear()
+        try:
+            sender = Sender(url)
+            reader = Reader(Queue('test'), url)
+            self.assertFalse(reader.connection is sender.connection)
+            self.assertTrue(reader.connection.heartbeat)
+            self.assertFalse(sender.connection.heartbeat)
+        finally:
+            ThreadSingleton.all().clear()
+
     @patch('gofer.messaging.adapter.amqp.consumer.Connection', Mock())
     def test_is_open(self):
         url = 'test-url'
@@ -156,6 +172,8 @@ class TestReader(TestCase):
         self.assertEqual(message._reader, reader)
         self.assertEqual(message._impl, received)
         self.assertEqual(message._body, received.body)
+        received.properties.get.assert_called_once_with('application_headers')
+        self.assertEqual(message._properties, received.properties.get.return_value)
 
     def test_ack(self):
         url = 'test-url'
@@ -248,7 +266,7 @@ class TestReceiver(TestCase):
     @patch('select.epoll')
     def test_wait(self, epoll):
         fd = 0
-        channel = Mock(method_queue=[])
+        channel = Mock(method_queue=[], connection=Mock(heartbeat=0))
         timeout = 10
 
         epoll.return_value.poll.return_value = [fd]
@@ -280,7 +298,7 @@ class TestReceiver(TestCase):
     @patch('select.epoll')
     def test_wait_nothing(self, epoll):
         fd = 0
-        channel = Mock(method_queue=[])
+        channel = Mock(method_queue=[], connection=Mock(heartbeat=0))
         timeout = 10
 
         epoll.return_value.poll.return_value = []
@@ -294,6 +312,80 @@ class TestReceiver(TestCase):
         epoll.return_value.poll.assert_called_with(timeout)
         self.assertFalse(channel.wait.called)
 
+    @patch('select.epoll')
+    @patch.object(Receiver, '_pump')
+    def test_wait_heartbeat(self, pump, epoll):
+        fd = 0
+        channel = Mock(method_queue=[], connection=Mock(heartbeat=10))
+
+        # test
+        Receiver._wait(fd, channel, 10)
+
+        # validation
+        pump.assert_called_once_with(fd, channel.connection, 10)
+        self.assertFalse(epoll.called)
+        self.assertFalse(channel.wait.called)
+
+    @patch('select.epoll')
+    def test_pump(self, epoll):
+        fd = 0
+        connection = Mock(heartbeat=10)
+        epoll.return_value.poll.side_effect = [[], [fd]]
+
+        # test
+        Receiver._pump(fd, connection, 60)
+
+        # validation
+        epoll.return_value.register.assert_called_with(fd, select.EPOLLIN)
+        self.assertEqual(connection.heartbeat_tick.call_count, 2)
+        connection.heartbeat_tick.assert_called_with(rate=HEARTBEAT_RATE)
+        epoll.return_value.poll.assert_called_with(5)
+        connection.drain_events.assert_called_once_with(timeout=5)
+        epoll.return_value.unregister.assert_called_once_with(fd)
+        epoll.return_value.close.assert_called_once_with()
+
+    @patch('select.epoll')
+    def test_pump_nothing(self, epoll):
+        fd = 0
+        connection = Mock(heartbeat=10)
+        epoll.return_value.poll.return_value = []
+
+        # test
+        Receiver._pump(fd, connection, 12)
+
+        # validation
+        self.assertEqual(connection.heartbeat_tick.call_count, 3)
+        self.assertEqual(
+            [c[0][0] for c in epoll.return_value.poll.call_args_list],
+            [5, 5, 2])
+        self.assertFalse(connection.drain_events.called)
+
+    @patch('select.epoll')
+    def test_pump_heartbeat_received(self, epoll):
+        fd = 0
+        connection = Mock(heartbeat=10)
+        connection.drain_events.side_effect = SocketTimeout
+        epoll.return_value.poll.return_value = [fd]
+
+        # test
+        Receiver._pump(fd, connection, 10)
+
+        # validation
+        self.assertEqual(connection.drain_events.call_count, 2)
+
+    @patch('select.epoll')
+    def test_pump_missed(self, epoll):
+        fd = 0
+        connection = Mock(heartbeat=10)
+        connection.heartbeat_tick.side_effect = ValueError
+
+        # test
+        self.assertRaises(ValueError, Receiver._pump, fd, connection, 10)
+
+        # validation
+        self.assertFalse(epoll.return_value.poll.called)
+        epoll.return_value.close.assert_called_once_with()
+
     def test_init(self):
         reader = Mock()
         r = Receiver(reader)
@@ -137,6 +137,42 @@ class TestQueue(TestCase):
             auto_delete=queue.auto_delete,
             arguments={'x-expires': queue.expiration * 1000})
 
+    @patch('gofer.messaging.adapter.amqp.reliability.Connection.channel')
+    def test_declare_expire_unused(self, channel):
+        url = 'test-url'
+
+        # test
+        queue = Queue('test')
+        queue.auto_delete = True
+        queue.expiration = 10
+        queue.expire_unused = True
+        queue.declare(url)
+
+        # validation
+        channel.return_value.queue_declare.assert_called_once_with(
+            queue.name,
+            durable=queue.durable,
+            exclusive=queue.exclusive,
+            auto_delete=False,
+            arguments={'x-expires': queue.expiration * 1000})
+
+    @patch('gofer.messaging.adapter.amqp.reliability.Connection.channel')
+    def test_declare_auto_delete_no_expiration(self, channel):
+        url = 'test-url'
+
+        # test
+        queue = Queue('test')
+        queue.auto_delete = True
+        queue.declare(url)
+
+        # validation
+        channel.return_value.queue_declare.assert_called_once_with(
+            queue.name,
+            durable=queue.durable,
+            exclusive=queue.exclusive,
+            auto_delete=True,
+            arguments=None)
+
     @patch('gofer.messaging.adapter.amqp.reliability.Connection.channel')
     def test_delete(self, channel):
         url = 'test-url'
@@ -147,3 +183,14 @@ class TestQueue(TestCase):
 
         # validation
         channel.return_value.queue_delete.assert_called_once_with(queue.name, nowait=True)
+
+    @patch('gofer.messaging.adapter.amqp.reliability.Connection.channel')
+    def test_purge(self, channel):
+        url = 'test-url'
+
+        # test
+        queue = Queue('test')
+        queue.purge(url)
+
+        # validation
+        channel.return_value.queue_purge.assert_called_once_with(queue.name)
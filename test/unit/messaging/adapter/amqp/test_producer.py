@@ -62,6 +62,20 @@ class TestBuildMessage(TestCase):
         message.assert_called_once_with(body, delivery_mode=2)
         self.assertEqual(m, message.return_value)
 
+    @patch('gofer.messaging.adapter.amqp.producer.Message')
+    def test_call_headers(self, message):
+        ttl = 0
+        body = 'test-body'
+        durable = True
+        headers = {'A': 1}
+
+        # test
+        m = build_message(body, ttl, durable, headers)
+
+        # validation
+        message.assert_called_once_with(body, delivery_mode=2, application_headers=headers)
+        self.assertEqual(m, message.return_value)
+
 
 class TestSender(TestCase):
 
@@ -159,7 +173,7 @@ class TestSender(TestCase):
         sender.send(address, content, ttl=ttl)
 
         # validation
-        build.assert_called_once_with(content, ttl, sender.durable)
+        build.assert_called_once_with(content, ttl, sender.durable, None)
         sender.channel.basic_publish.assert_called_once_with(
             build.return_value,
             mandatory=True,
@@ -183,7 +197,7 @@ class TestSender(TestCase):
         sender.send(address, content, ttl=ttl)
 
         # validation
-        build.assert_called_once_with(content, ttl, sender.durable)
+        build.assert_called_once_with(content, ttl, sender.durable, None)
         sender.channel.basic_publish.assert_called_once_with(
             build.return_value,
             mandatory=True,
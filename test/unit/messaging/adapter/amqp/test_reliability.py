@@ -19,9 +19,10 @@ from mock import Mock, patch
 from gofer.devel import ipatch
 
 from gofer.messaging.adapter.model import NotFound
+from gofer.messaging.adapter.connect import CircuitOpen, DELAY
 
 with ipatch('amqp'):
-    from gofer.messaging.adapter.amqp.reliability import reliable, DELAY
+    from gofer.messaging.adapter.amqp.reliability import reliable
     from gofer.messaging.adapter.amqp.reliability import Endpoint, endpoint
 
 
@@ -51,8 +52,8 @@ class TestReliable(TestCase):
         fn.assert_called_once_with(*args, **kwargs)
 
     @patch('gofer.messaging.adapter.amqp.reliability.CONNECTION_EXCEPTIONS', ConnectionException)
-    @patch('gofer.messaging.adapter.amqp.reliability.sleep')
-    def test_reliable_connection_exception(self, sleep):
+    @patch('gofer.messaging.adapter.amqp.reliability.recover')
+    def test_reliable_connection_exception(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[ConnectionException, None])
         messenger = Mock(url=url, connection=Mock())
@@ -64,7 +65,7 @@ class TestReliable(TestCase):
         wrapped(*args, **kwargs)
 
         # validation
-        sleep.assert_called_once_with(DELAY)
+        recover.assert_called_once_with(url, DELAY)
         messenger.repair.assert_called_once_with()
         self.assertEqual(
             fn.call_args_list,
@@ -73,9 +74,26 @@ class TestReliable(TestCase):
                 (args, kwargs),
             ])
 
+    @patch('gofer.messaging.adapter.amqp.reliability.CONNECTION_EXCEPTIONS', ConnectionException)
+    @patch('gofer.messaging.adapter.amqp.reliability.recover')
+    def test_reliable_circuit_open(self, recover):
+        url = 'test-url'
+        recover.side_effect = CircuitOpen(url)
+        fn = Mock(side_effect=[ConnectionException, None])
+        messenger = Mock(url=url, connection=Mock())
+
+        # test
+        wrapped = reliable(fn)
+
+        # validation
+        self.assertRaises(CircuitOpen, wrapped, messenger)
+        recover.assert_called_once_with(url, DELAY)
+        self.assertFalse(messenger.repair.called)
+        self.assertEqual(fn.call_count, 1)
+
     @patch('gofer.messaging.adapter.amqp.reliability.ChannelError', ChannelError)
-    @patch('gofer.messaging.adapter.amqp.reliability.sleep')
-    def test_reliable_channel_exception(self, sleep):
+    @patch('gofer.messaging.adapter.amqp.reliability.recover')
+    def test_reliable_channel_exception(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[ChannelError, None])
         messenger = Mock(url=url, connection=Mock())
@@ -87,7 +105,7 @@ class TestReliable(TestCase):
         wrapped(*args, **kwargs)
 
         # validation
-        sleep.assert_called_once_with(DELAY)
+        recover.assert_called_once_with(url, DELAY)
         messenger.repair.assert_called_once_with()
         self.assertEqual(
             fn.call_args_list,
@@ -97,8 +115,8 @@ class TestReliable(TestCase):
             ])
 
     @patch('gofer.messaging.adapter.amqp.reliability.ChannelError', ChannelError)
-    @patch('gofer.messaging.adapter.amqp.reliability.sleep')
-    def test_reliable_channel_exception_not_found(self, sleep):
+    @patch('gofer.messaging.adapter.amqp.reliability.recover')
+    def test_reliable_channel_exception_not_found(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[ChannelError(404), None])
         messenger = Mock(url=url, connection=Mock())
@@ -110,7 +128,7 @@ class TestReliable(TestCase):
 
         # validation
         self.assertRaises(NotFound, wrapped, *args, **kwargs)
-        self.assertFalse(sleep.called)
+        self.assertFalse(recover.called)
 
     @patch('gofer.messaging.adapter.amqp.reliability.Endpoint')
     def test_endpoint(self, messenger):
@@ -0,0 +1,172 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+from threading import Thread
+from unittest import TestCase
+
+from mock import patch
+
+from gofer.messaging.adapter.model import NotFound
+from gofer.messaging.adapter.loopback.broker import Envelope, Queue, Exchange, Broker
+from gofer.messaging.adapter.loopback.broker import DIRECT, FANOUT
+
+
+URL = 'loopback+amqp://localhost'
+
+
+class TestEnvelope(TestCase):
+
+    def test_init(self):
+        envelope = Envelope('hello', properties={'A': 1})
+        self.assertEqual(envelope.body, 'hello')
+        self.assertEqual(envelope.properties, {'A': 1})
+        self.assertEqual(envelope.expiration, None)
+        self.assertFalse(envelope.redelivered)
+        self.assertFalse(envelope.expired())
+
+    @patch('gofer.messaging.adapter.loopback.broker.time')
+    def test_expired(self, _time):
+        _time.return_value = 10
+        envelope = Envelope('hello', ttl=5)
+        self.assertEqual(envelope.expiration, 15)
+        self.assertFalse(envelope.expired())
+        _time.return_value = 16
+        self.assertTrue(envelope.expired())
+
+    def test_copy(self):
+        envelope = Envelope('hello', ttl=5, properties={'A': 1})
+        copy = envelope.copy()
+        self.assertFalse(copy is envelope)
+        self.assertEqual(copy.body, envelope.body)
+        self.assertEqual(copy.properties, envelope.properties)
+        self.assertEqual(copy.expiration, envelope.expiration)
+
+
+class TestQueue(TestCase):
+
+    def test_put_get(self):
+        queue = Queue('test')
+        first = Envelope('1')
+        second = Envelope('2')
+        queue.put(first)
+        queue.put(second)
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.get(), first)
+        self.assertEqual(queue.get(), second)
+        self.assertEqual(queue.get(), None)
+
+    def test_get_expired(self):
+        queue = Queue('test')
+        expired = Envelope('1')
+        expired.expiration = 0
+        queue.put(expired)
+        self.assertEqual(queue.get(), None)
+        self.assertEqual(len(queue), 0)
+
+    def test_get_wait(self):
+        queue = Queue('test')
+        envelope = Envelope('1')
+        thread = Thread(target=queue.put, args=(envelope,))
+        thread.start()
+        self.assertEqual(queue.get(10), envelope)
+        thread.join()
+
+    def test_requeue(self):
+        queue = Queue('test')
+        first = Envelope('1')
+        second = Envelope('2')
+        queue.put(second)
+        queue.requeue(first)
+        self.assertTrue(first.redelivered)
+        self.assertEqual(queue.get(), first)
+
+    def test_purge(self):
+        queue = Queue('test')
+        queue.put(Envelope('1'))
+        queue.purge()
+        self.assertEqual(len(queue), 0)
+
+
+class TestExchange(TestCase):
+
+    def test_route(self):
+        exchange = Exchange('test', DIRECT)
+        exchange.bindings.update(['q1', 'q2'])
+        self.assertEqual(exchange.route('q1'), ['q1'])
+        self.assertEqual(exchange.route('q3'), [])
+
+    def test_route_fanout(self):
+        exchange = Exchange('test', FANOUT)
+        exchange.bindings.update(['q1', 'q2'])
+        self.assertEqual(sorted(exchange.route('q3')), ['q1', 'q2'])
+
+
+class TestBroker(TestCase):
+
+    def setUp(self):
+        Broker.brokers.clear()
+
+    def tearDown(self):
+        Broker.brokers.clear()
+
+    def test_find(self):
+        broker = Broker.find(URL)
+        self.assertTrue(isinstance(broker, Broker))
+        self.assertEqual(Broker.find(URL), broker)
+        self.assertFalse(Broker.find('loopback+amqp://other') is broker)
+        self.assertTrue('amq.direct' in broker.exchanges)
+
+    def test_queue(self):
+        broker = Broker()
+        broker.declare_queue('test')
+        queue = broker.queue('test')
+        broker.declare_queue('test')
+        self.assertEqual(broker.queue('test'), queue)
+        broker.delete_queue('test')
+        self.assertRaises(NotFound, broker.queue, 'test')
+
+    def test_exchange(self):
+        broker = Broker()
+        broker.declare_exchange('test', FANOUT)
+        self.assertEqual(broker.exchange('test').policy, FANOUT)
+        broker.delete_exchange('test')
+        self.assertRaises(NotFound, broker.exchange, 'test')
+
+    def test_bind(self):
+        broker = Broker()
+        broker.declare_queue('test')
+        broker.bind('amq.direct', 'test')
+        self.assertEqual(broker.exchange('amq.direct').bindings, set(['test']))
+        broker.unbind('amq.direct', 'test')
+        self.assertEqual(broker.exchange('amq.direct').bindings, set())
+        self.assertRaises(NotFound, broker.bind, 'amq.direct', 'xx')
+        self.assertRaises(NotFound, broker.bind, 'xx', 'test')
+
+    def test_delete_bound(self):
+        broker = Broker()
+        broker.declare_queue('test')
+        broker.bind('amq.direct', 'test')
+        broker.delete_queue('test')
+        self.assertEqual(broker.exchange('amq.direct').bindings, set())
+
+    def test_send(self):
+        broker = Broker()
+        broker.declare_queue('q1')
+        broker.declare_queue('q2')
+        broker.bind('amq.fanout', 'q1')
+        broker.bind('amq.fanout', 'q2')
+        broker.send('q1', Envelope('1'))
+        broker.send('amq.fanout/x', Envelope('2'))
+        broker.send('amq.direct/q1', Envelope('3'))
+        broker.send('q3', Envelope('4'))
+        self.assertEqual([e.body for e in broker.queue('q1').messages], ['1', '2'])
+        self.assertEqual([e.body for e in broker.queue('q2').messages], ['2'])
+        self.assertRaises(NotFound, broker.send, 'xx/q1', Envelope('5'))
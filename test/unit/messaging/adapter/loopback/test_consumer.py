@@ -0,0 +1,125 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+from unittest import TestCase
+
+from gofer.messaging.adapter.model import NotFound, Node
+from gofer.messaging.adapter.loopback.broker import Broker, Envelope
+from gofer.messaging.adapter.loopback.consumer import Reader
+from gofer.messaging.adapter.loopback.producer import Sender
+from gofer.messaging.adapter.loopback.model import Exchange, Queue
+
+
+URL = 'loopback+amqp://localhost'
+
+
+class LoopbackTest(TestCase):
+
+    def setUp(self):
+        Broker.brokers.clear()
+
+    def tearDown(self):
+        Broker.brokers.clear()
+
+
+class TestModel(LoopbackTest):
+
+    def test_queue(self):
+        queue = Queue('test')
+        queue.declare(URL)
+        broker = Broker.find(URL)
+        broker.queue('test').put(Envelope('1'))
+        queue.purge(URL)
+        self.assertEqual(len(broker.queue('test')), 0)
+        queue.delete(URL)
+        self.assertRaises(NotFound, broker.queue, 'test')
+
+    def test_exchange(self):
+        queue = Queue('test')
+        queue.declare(URL)
+        exchange = Exchange('test-exchange', 'fanout')
+        exchange.declare(URL)
+        exchange.bind(queue, URL)
+        broker = Broker.find(URL)
+        self.assertEqual(broker.exchange('test-exchange').bindings, set(['test']))
+        exchange.unbind(queue, URL)
+        self.assertEqual(broker.exchange('test-exchange').bindings, set())
+        exchange.delete(URL)
+        self.assertRaises(NotFound, broker.exchange, 'test-exchange')
+
+
+class TestReader(LoopbackTest):
+
+    def test_open_not_found(self):
+        reader = Reader(Node('test'), URL)
+        self.assertRaises(NotFound, reader.open)
+        self.assertFalse(reader.is_open())
+
+    def test_send_get_ack(self):
+        Queue('test').declare(URL)
+        sender = Sender(URL)
+        sender.open()
+        sender.send('test', 'hello', properties={'A': 1})
+        sender.close()
+        reader = Reader(Node('test'), URL)
+        reader.open()
+        self.assertTrue(reader.is_open())
+
+        # test
+        message = reader.get(1)
+        message.ack()
+
+        # validation
+        self.assertEqual(message.body, 'hello')
+        self.assertEqual(message.properties, {'A': 1})
+        self.assertEqual(reader.unacked, {})
+        self.assertEqual(reader.get(), None)
+
+    def test_reject(self):
+        Queue('test').declare(URL)
+        Broker.find(URL).send('test', Envelope('hello'))
+        reader = Reader(Node('test'), URL)
+        reader.open()
+
+        # requeued
+        message = reader.get()
+        message.reject(True)
+        message = reader.get()
+        self.assertEqual(message.body, 'hello')
+
+        # discarded
+        message.reject(False)
+        self.assertEqual(reader.get(), None)
+
+    def test_close_redelivered(self):
+        Queue('test').declare(URL)
+        Broker.find(URL).send('test', Envelope('hello'))
+        reader = Reader(Node('test'), URL)
+        reader.open()
+        reader.get()
+
+        # test
+        reader.repair()
+        message = reader.get()
+
+        # validation
+        self.assertEqual(message.body, 'hello')
+        self.assertTrue(message._impl.redelivered)
+
+    def test_ttl(self):
+        Queue('test').declare(URL)
+        sender = Sender(URL)
+        sender.open()
+        sender.send('test', 'hello', ttl=10)
+        reader = Reader(Node('test'), URL)
+        reader.open()
+        message = reader.get()
+        self.assertTrue(message._impl.expiration is not None)
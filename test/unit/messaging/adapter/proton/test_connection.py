@@ -88,12 +88,14 @@ class TestConnection(TestCase):
         connection._impl = Mock()
         self.assertTrue(connection.is_open())
 
-    @patch('gofer.messaging.adapter.proton.connection.Connector.find')
+    @patch('gofer.messaging.adapter.connect.Connector.find')
     @patch('gofer.messaging.adapter.proton.connection.BlockingConnection')
     @patch('gofer.messaging.adapter.proton.connection.Connection.ssl_domain')
     def test_open(self, ssl_domain, blocking, find):
         url = 'proton+amqps://localhost'
-        find.return_value = Mock(url=URL(url))
+        connector = Connector(url)
+        connector.heartbeat = 30
+        find.return_value = connector
 
         # test
         connection = Connection(url)
@@ -102,7 +104,30 @@ class TestConnection(TestCase):
         # validation
         canonical = URL(url).canonical
         find.assert_called_once_with(url)
-        blocking.assert_called_once_with(canonical, ssl_domain=ssl_domain.return_value)
+        blocking.assert_called_once_with(
+            canonical,
+            ssl_domain=ssl_domain.return_value,
+            heartbeat=None)
+
+    @patch('gofer.messaging.adapter.connect.Connector.find')
+    @patch('gofer.messaging.adapter.proton.connection.BlockingConnection')
+    @patch('gofer.messaging.adapter.proton.connection.Connection.ssl_domain')
+    def test_open_reader_after_sender(self, ssl_domain, blocking, find):
+        url = 'proton+amqps://localhost'
+        connector = Connector(url)
+        connector.heartbeat = 30
+        find.return_value = connector
+
+        # test
+        sender = Connection(url)
+        sender.open()
+        reader = Connection(url, heartbeat=True)
+        reader.open()
+
+        # validation
+        self.assertFalse(sender is reader)
+        heartbeats = [c[1]['heartbeat'] for c in blocking.call_args_list]
+        self.assertEqual(heartbeats, [None, 30])
 
     @patch('gofer.messaging.adapter.proton.connection.BlockingConnection')
     def test_open_already(self, blocking):
@@ -167,7 +192,8 @@ class TestConnection(TestCase):
             None, dynamic=True, name=uuid.return_value, options=properties.return_value)
         self.assertEqual(receiver, connection._impl.create_receiver.return_value)
 
-    def test_close(self):
+    @patch('gofer.messaging.adapter.proton.connection.Domain')
+    def test_close(self, domain):
         url = 'test-url'
         c = Connection(url)
         impl = Mock()
@@ -175,6 +201,7 @@ class TestConnection(TestCase):
         c.close()
         impl.close.assert_called_once_with()
         self.assertEqual(c._impl, None)
+        domain.declared.invalidate.assert_called_once_with(url)
 
     def test_close_failed(self):
         url = 'test-url'
@@ -46,7 +46,7 @@ class TestReader(TestCase):
         reader = Reader(node, url=url)
 
         # validation
-        connection.assert_called_once_with(url)
+        connection.assert_called_once_with(url, heartbeat=True)
         self.assertTrue(isinstance(reader, BaseReader))
         self.assertEqual(reader.url, url)
         self.assertEqual(reader.connection, connection.return_value)
@@ -144,6 +144,7 @@ class TestReader(TestCase):
         self.assertEqual(message._reader, reader)
         self.assertEqual(message._impl, received)
         self.assertEqual(message._body, received.body)
+        self.assertEqual(message._properties, received.properties)
 
     @patch('gofer.messaging.adapter.proton.consumer.Timeout', Timeout)
     def test_get_empty(self):
@@ -44,6 +44,7 @@ class TestMethod(TestCase):
         self.assertEqual(method.url, url)
         self.assertEqual(method.name, name)
         self.assertEqual(method.arguments, arguments)
+        self.assertEqual(method.object_id, model.OBJECT_ID)
         self.assertEqual(method.connection, _connection.return_value)
         self.assertEqual(method.sender, None)
         self.assertEqual(method.receiver, None)
@@ -355,7 +356,8 @@ class TestQueue(TestCase):
             'properties': {
                 'exclusive': queue.exclusive,
                 'auto-delete': queue.auto_delete,
-                'durable': queue.durable
+                'durable': queue.durable,
+                'qpid.auto_delete_timeout': queue.expiration
             }
         }
         method.assert_called_once_with(url, model.CREATE, arguments)
@@ -378,3 +380,21 @@ class TestQueue(TestCase):
         }
         method.assert_called_once_with(url, model.DELETE, arguments)
         method.return_value.assert_called_once_with()
+
+    @patch('gofer.messaging.adapter.proton.model.Method')
+    def test_purge(self, method):
+        url = 'test-url'
+
+        # test
+        queue = Queue('test-queue')
+        queue.purge(url)
+
+        # validation
+        arguments = {
+            'request': 0
+        }
+        object_id = {
+            '_object_name': 'org.apache.qpid.broker:queue:test-queue'
+        }
+        method.assert_called_once_with(url, model.PURGE, arguments, object_id)
+        method.return_value.assert_called_once_with()
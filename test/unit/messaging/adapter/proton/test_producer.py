@@ -40,6 +40,16 @@ class TestBuilder(TestCase):
         message.assert_called_once_with(body=content, durable=durable, ttl=ttl)
         self.assertEqual(m, message.return_value)
 
+    @patch('gofer.messaging.adapter.proton.producer.Message')
+    def test_build_properties(self, message):
+        content = Mock()
+        ttl = None
+        durable = 18
+        properties = {'A': 1}
+        m = build_message(content, ttl, durable, properties)
+        message.assert_called_once_with(body=content, durable=durable, properties=properties)
+        self.assertEqual(m, message.return_value)
+
 
 class TestSender(TestCase):
 
@@ -134,7 +144,7 @@ class TestSender(TestCase):
         sender.send(address, content, ttl=ttl)
 
         # validation
-        builder.assert_called_once_with(content, ttl, sender.durable)
+        builder.assert_called_once_with(content, ttl, sender.durable, None)
         sender.connection.sender.assert_called_once_with(address)
         _sender = sender.connection.sender.return_value
         _sender.send.assert_called_once_with(builder.return_value)
@@ -19,10 +19,11 @@ from mock import Mock, patch
 from gofer.devel import ipatch
 
 from gofer.messaging.adapter.model import NotFound
+from gofer.messaging.adapter.connect import DELAY
 
 with ipatch('proton'):
     from gofer.messaging.adapter.proton.reliability import reliable, resend
-    from gofer.messaging.adapter.proton.reliability import DELAY, RESEND_DELAY
+    from gofer.messaging.adapter.proton.reliability import RESEND_DELAY
 
 
 class LinkDetached(Exception):
@@ -57,8 +58,8 @@ class TestReliable(TestCase):
         fn.assert_called_once_with(*args, **kwargs)
 
     @patch('gofer.messaging.adapter.proton.reliability.ConnectionException', ConnectionException)
-    @patch('gofer.messaging.adapter.proton.reliability.sleep')
-    def test_reliable_connection_exception(self, sleep):
+    @patch('gofer.messaging.adapter.proton.reliability.recover')
+    def test_reliable_connection_exception(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[ConnectionException, None])
         messenger = Mock(url=url, connection=Mock())
@@ -70,7 +71,7 @@ class TestReliable(TestCase):
         wrapped(*args, **kwargs)
 
         # validation
-        sleep.assert_called_once_with(DELAY)
+        recover.assert_called_once_with(url, DELAY)
         messenger.repair.assert_called_once_with()
         self.assertEqual(
             fn.call_args_list,
@@ -80,8 +81,8 @@ class TestReliable(TestCase):
             ])
 
     @patch('gofer.messaging.adapter.proton.reliability.LinkDetached', LinkDetached)
-    @patch('gofer.messaging.adapter.proton.reliability.sleep')
-    def test_reliable_link_detached(self, sleep):
+    @patch('gofer.messaging.adapter.proton.reliability.recover')
+    def test_reliable_link_detached(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[LinkDetached, None])
         messenger = Mock(url=url, connection=Mock())
@@ -93,7 +94,7 @@ class TestReliable(TestCase):
         wrapped(*args, **kwargs)
 
         # validation
-        sleep.assert_called_once_with(DELAY)
+        recover.assert_called_once_with(url, DELAY)
         messenger.repair.assert_called_once_with()
         self.assertEqual(
             fn.call_args_list,
@@ -103,8 +104,8 @@ class TestReliable(TestCase):
             ])
 
     @patch('gofer.messaging.adapter.proton.reliability.LinkDetached', LinkDetached)
-    @patch('gofer.messaging.adapter.proton.reliability.sleep')
-    def test_reliable_link_not_found(self, sleep):
+    @patch('gofer.messaging.adapter.proton.reliability.recover')
+    def test_reliable_link_not_found(self, recover):
         url = 'test-url'
         condition = 'amqp:not-found'
         fn = Mock(side_effect=LinkDetached(condition))
@@ -112,7 +113,7 @@ class TestReliable(TestCase):
         # test
         wrapped = reliable(fn)
         self.assertRaises(NotFound, wrapped, None)
-        self.assertFalse(sleep.called)
+        self.assertFalse(recover.called)
 
 
 class TestResend(TestCase):
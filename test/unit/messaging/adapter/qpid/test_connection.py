@@ -79,7 +79,7 @@ class TestConnection(TestCase):
 
     @patch('gofer.messaging.adapter.qpid.connection.Connection.ssl_domain')
     @patch('gofer.messaging.adapter.qpid.connection.Connection.add_transports')
-    @patch('gofer.messaging.adapter.qpid.connection.Connector.find')
+    @patch('gofer.messaging.adapter.connect.Connector.find')
     @patch('gofer.messaging.adapter.qpid.connection.RealConnection')
     def test_open(self, connection, find, add_transports, ssl_domain):
         url = TEST_URL
@@ -127,7 +127,8 @@ class TestConnection(TestCase):
         session = c.session()
         self.assertEqual(session, c._impl.session.return_value)
 
-    def test_close(self):
+    @patch('gofer.messaging.adapter.qpid.connection.Domain')
+    def test_close(self, domain):
         url = 'test-url'
         c = Connection(url)
         impl = Mock()
@@ -135,6 +136,7 @@ class TestConnection(TestCase):
         c.close()
         impl.close.assert_called_once_with()
         self.assertEqual(c._impl, None)
+        domain.declared.invalidate.assert_called_once_with(url)
 
     def test_close_failed(self):
         url = 'test-url'
@@ -208,6 +208,7 @@ class TestReader(TestCase):
         self.assertEqual(message._reader, reader)
         self.assertEqual(message._impl, received)
         self.assertEqual(message._body, received.content)
+        self.assertEqual(message._properties, received.properties)
 
     @patch('gofer.messaging.adapter.qpid.consumer.Empty', Empty)
     def test_get_empty(self):
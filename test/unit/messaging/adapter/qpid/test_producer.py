@@ -117,7 +117,8 @@ class TestSender(TestCase):
         sender.send(address, content, ttl=ttl)
 
         # validation
-        message.assert_called_once_with(content=content, durable=sender.durable, ttl=ttl)
+        message.assert_called_once_with(
+            content=content, durable=sender.durable, ttl=ttl, properties=None)
         sender.session.sender.assert_called_once_with(address)
         _sender = sender.session.sender.return_value
         _sender.send.assert_called_once_with(message.return_value)
@@ -19,10 +19,10 @@ from mock import Mock, patch
 from gofer.devel import ipatch
 
 from gofer.messaging.adapter.model import NotFound
+from gofer.messaging.adapter.connect import DELAY
 
 with ipatch('qpid'):
     from gofer.messaging.adapter.qpid.reliability import reliable
-    from gofer.messaging.adapter.qpid.reliability import DELAY
 
 
 class _NotFound(Exception):
@@ -61,8 +61,8 @@ class TestReliable(TestCase):
         fn.assert_called_once_with(*args, **kwargs)
 
     @patch('gofer.messaging.adapter.qpid.reliability.ConnectionError', ConnectionError)
-    @patch('gofer.messaging.adapter.qpid.reliability.sleep')
-    def test_reliable_connection_exception(self, sleep):
+    @patch('gofer.messaging.adapter.qpid.reliability.recover')
+    def test_reliable_connection_exception(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[ConnectionError, None])
         messenger = Mock(url=url, connection=Mock())
@@ -74,7 +74,7 @@ class TestReliable(TestCase):
         wrapped(*args, **kwargs)
 
         # validation
-        sleep.assert_called_once_with(DELAY)
+        recover.assert_called_once_with(url, DELAY)
         messenger.repair.assert_called_once_with()
         self.assertEqual(
             fn.call_args_list,
@@ -84,8 +84,8 @@ class TestReliable(TestCase):
             ])
 
     @patch('gofer.messaging.adapter.qpid.reliability.LinkError', LinkError)
-    @patch('gofer.messaging.adapter.qpid.reliability.sleep')
-    def test_reliable_link_detached(self, sleep):
+    @patch('gofer.messaging.adapter.qpid.reliability.recover')
+    def test_reliable_link_detached(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=[LinkError, None])
         messenger = Mock(url=url, connection=Mock())
@@ -97,7 +97,7 @@ class TestReliable(TestCase):
         wrapped(*args, **kwargs)
 
         # validation
-        sleep.assert_called_once_with(DELAY)
+        recover.assert_called_once_with(url, DELAY)
         messenger.repair.assert_called_once_with()
         self.assertEqual(
             fn.call_args_list,
@@ -107,12 +107,12 @@ class TestReliable(TestCase):
             ])
 
     @patch('gofer.messaging.adapter.qpid.reliability._NotFound', _NotFound)
-    @patch('gofer.messaging.adapter.qpid.reliability.sleep')
-    def test_reliable_link_not_found(self, sleep):
+    @patch('gofer.messaging.adapter.qpid.reliability.recover')
+    def test_reliable_link_not_found(self, recover):
         url = 'test-url'
         fn = Mock(side_effect=_NotFound)
 
         # test
         wrapped = reliable(fn)
         self.assertRaises(NotFound, wrapped, None)
-        self.assertFalse(sleep.called)
\ No newline at end of file
+        self.assertFalse(recover.called)
\ No newline at end of file
@@ -13,7 +13,10 @@ from unittest import TestCase
 
 from mock import patch, Mock
 
-from gofer.messaging.adapter.connect import retry, DELAY, DELAY_MULTIPLIER
+from gofer.messaging.adapter.model import Connector, ModelError
+from gofer.messaging.adapter.connect import retry, backoff, recover, endpoints
+from gofer.messaging.adapter.connect import Health, Endpoints, CircuitOpen
+from gofer.messaging.adapter.connect import DELAY, MAX_DELAY, DELAY_MULTIPLIER, JITTER
 
 
 class ConnectError(Exception):
@@ -23,32 +26,276 @@ class ConnectError(Exception):
 URL = 'amqp://host'
 
 
+class TestCircuitOpen(TestCase):
+
+    def test_init(self):
+        exception = CircuitOpen(URL)
+        self.assertTrue(isinstance(exception, ModelError))
+        self.assertEqual(exception.args, (CircuitOpen.DESCRIPTION % URL,))
+
+
+class TestHealth(TestCase):
+
+    def test_init(self):
+        health = Health()
+        self.assertEqual(health.failures, 0)
+        self.assertEqual(health.opened, 0)
+        self.assertEqual(health.probed, 0)
+        self.assertEqual(health.latency, None)
+        self.assertTrue(health.available())
+
+    def test_succeeded(self):
+        health = Health()
+        health.failures = 2
+        health.succeeded(4.0)
+        self.assertEqual(health.failures, 0)
+        self.assertEqual(health.latency, 4.0)
+        health.succeeded(2.0)
+        self.assertEqual(health.latency, 3.0)
+
+    @patch('gofer.messaging.adapter.connect.time')
+    def test_failed(self, _time):
+        _time.return_value = 10
+        health = Health()
+        for n in range(Health.THRESHOLD - 1):
+            health.failed()
+            self.assertTrue(health.available())
+            self.assertEqual(health.opened, 0)
+        health.failed()
+        self.assertEqual(health.opened, 10)
+        self.assertFalse(health.available())
+        _time.return_value = 10 + Health.COOL_DOWN
+        self.assertTrue(health.available())
+
+    @patch('gofer.messaging.adapter.connect.time')
+    def test_probe(self, _time):
+        _time.return_value = 10
+        health = Health()
+        health.probe()
+        self.assertEqual(health.probed, 0)
+        for n in range(Health.THRESHOLD):
+            health.failed()
+        _time.return_value = 10 + Health.COOL_DOWN
+        health.probe()
+        # claimed
+        self.assertEqual(health.probed, 10 + Health.COOL_DOWN)
+        self.assertFalse(health.available())
+        # probe failed
+        health.failed()
+        self.assertEqual(health.probed, 0)
+        self.assertFalse(health.available())
+        # claimed then succeeded
+        _time.return_value = 10 + Health.COOL_DOWN * 2
+        health.probe()
+        health.succeeded(1.0)
+        self.assertEqual(health.probed, 0)
+        self.assertTrue(health.available())
+
+    @patch('gofer.messaging.adapter.connect.time')
+    def test_probe_expired(self, _time):
+        _time.return_value = 10
+        health = Health()
+        for n in range(Health.THRESHOLD):
+            health.failed()
+        _time.return_value = 10 + Health.COOL_DOWN
+        health.probe()
+        self.assertFalse(health.available())
+        _time.return_value = 10 + Health.COOL_DOWN * 2
+        self.assertTrue(health.available())
+
+
+class TestEndpoints(TestCase):
+
+    def test_find(self):
+        registry = Endpoints()
+        connector = Connector(URL)
+        health = registry.find(connector)
+        self.assertTrue(isinstance(health, Health))
+        self.assertEqual(registry.find(Connector(URL)), health)
+        self.assertEqual(registry.health, {connector.url.canonical: health})
+
+    @patch('gofer.messaging.adapter.connect.Connector.find')
+    def test_select(self, find):
+        connector = Connector('amqp://a')
+        connector.failover = ['amqp://b', 'amqp://c', 'amqp://d']
+        find.return_value = connector
+        registry = Endpoints()
+
+        # test
+        selected = registry.select(URL)
+        self.assertEqual([str(c.url.host) for c in selected], ['a', 'b', 'c', 'd'])
+        registry.succeeded(selected[2], 0.5)
+        registry.succeeded(selected[3], 0.1)
+        for n in range(Health.THRESHOLD):
+            registry.failed(selected[0])
+        selected = registry.select(URL)
+
+        # validation
+        find.assert_called_with(URL)
+        self.assertEqual([str(c.url.host) for c in selected], ['d', 'c', 'b'])
+
+    @patch('gofer.messaging.adapter.connect.time')
+    def test_select_probe(self, _time):
+        _time.return_value = 10
+        registry = Endpoints()
+        connector = Connector(URL)
+        for n in range(Health.THRESHOLD):
+            registry.failed(connector)
+        self.assertEqual(registry.select(URL), [])
+        _time.return_value = 10 + Health.COOL_DOWN
+        # only one thread may probe
+        self.assertEqual(len(registry.select(URL)), 1)
+        self.assertEqual(registry.select(URL), [])
+
+    @patch('gofer.messaging.adapter.connect.time')
+    def test_available(self, _time):
+        _time.return_value = 10
+        registry = Endpoints()
+        connector = Connector(URL)
+        self.assertTrue(registry.available(URL))
+        for n in range(Health.THRESHOLD):
+            registry.failed(connector)
+        self.assertFalse(registry.available(URL))
+        _time.return_value = 10 + Health.COOL_DOWN
+        self.assertTrue(registry.available(URL))
+        # not claimed
+        self.assertTrue(registry.available(URL))
+        self.assertEqual(registry.find(connector).probed, 0)
+
+    def test_clear(self):
+        registry = Endpoints()
+        registry.find(Connector(URL))
+        registry.clear()
+        self.assertEqual(registry.health, {})
+
+
+class TestBackoff(TestCase):
+
+    @patch('gofer.messaging.adapter.connect.uniform')
+    def test_call(self, uniform):
+        uniform.return_value = 0.75
+        self.assertEqual(backoff(10), 7.5)
+        uniform.assert_called_once_with(1 - JITTER, 1)
+
+
+class TestRecover(TestCase):
+
+    def setUp(self):
+        endpoints.clear()
+
+    def tearDown(self):
+        endpoints.clear()
+
+    @patch('gofer.messaging.adapter.connect.backoff', lambda d: d)
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_call(self, sleep):
+        delay = recover(URL, DELAY)
+        sleep.assert_called_once_with(DELAY)
+        self.assertEqual(delay, DELAY * DELAY_MULTIPLIER)
+
+    @patch('gofer.messaging.adapter.connect.backoff', lambda d: d)
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_call_max(self, sleep):
+        delay = recover(URL, MAX_DELAY)
+        sleep.assert_called_once_with(MAX_DELAY)
+        self.assertEqual(delay, MAX_DELAY)
+
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_circuit_open(self, sleep):
+        for n in range(Health.THRESHOLD):
+            endpoints.failed(Connector(URL))
+        self.assertRaises(CircuitOpen, recover, URL, DELAY)
+        self.assertFalse(sleep.called)
+
+
 class TestRetry(TestCase):
 
+    def setUp(self):
+        endpoints.clear()
+
+    def tearDown(self):
+        endpoints.clear()
+
+    @staticmethod
+    def connection(retry=True):
+        return Mock(url=URL, retry=retry, is_open=Mock(return_value=False))
+
     @patch('gofer.messaging.adapter.connect.sleep')
     def test_open(self, sleep):
         fn = Mock()
-        connection = Mock(url=URL, retry=True)
+        connection = self.connection()
         fx = retry(ConnectError)(fn)
         fx(connection)
-        fn.assert_called_once_with(connection)
+        self.assertEqual(fn.call_count, 1)
+        self.assertEqual(fn.call_args[0][0], connection)
+        self.assertEqual(fn.call_args[0][1].url, Connector(URL).url)
         self.assertFalse(sleep.called)
+        self.assertEqual(endpoints.find(Connector(URL)).failures, 0)
+
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_open_already(self, sleep):
+        fn = Mock()
+        connection = self.connection()
+        connection.is_open.return_value = True
+        fx = retry(ConnectError)(fn)
+        fx(connection)
+        self.assertFalse(fn.called)
 
     @patch('gofer.messaging.adapter.connect.sleep')
     def test_open_failed_no_retry(self, sleep):
         fn = Mock()
         fn.side_effect = [ConnectError]
-        connection = Mock(url=URL, retry=False)
+        connection = self.connection(False)
         fx = retry(ConnectError)(fn)
         self.assertRaises(ConnectError, fx, connection)
         self.assertFalse(sleep.called)
-        fn.assert_called_once_with(connection)
+        self.assertEqual(fn.call_count, 1)
+        self.assertEqual(endpoints.find(Connector(URL)).failures, 1)
+
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_open_circuit_open(self, sleep):
+        fn = Mock()
+        connection = self.connection(False)
+        for n in range(Health.THRESHOLD):
+            endpoints.failed(Connector(URL))
+        fx = retry(ConnectError)(fn)
+        self.assertRaises(CircuitOpen, fx, connection)
+        self.assertFalse(fn.called)
+        self.assertFalse(sleep.called)
 
+    @patch('gofer.messaging.adapter.connect.backoff', lambda d: d)
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_open_circuit_opened_retried(self, sleep):
+        fn = Mock()
+        fn.side_effect = ConnectError
+        connection = self.connection()
+        fx = retry(ConnectError)(fn)
+        self.assertRaises(CircuitOpen, fx, connection)
+        self.assertEqual(fn.call_count, Health.THRESHOLD)
+        self.assertEqual(sleep.call_count, Health.THRESHOLD)
+
+    @patch('gofer.messaging.adapter.connect.Connector.find')
+    @patch('gofer.messaging.adapter.connect.sleep')
+    def test_failover(self, sleep, find):
+        connector = Connector(URL)
+        connector.failover = ['amqp://alternate']
+        find.return_value = connector
+        fn = Mock()
+        fn.side_effect = [ConnectError, None]
+        connection = self.connection(False)
+        fx = retry(ConnectError)(fn)
+        fx(connection)
+        self.assertFalse(sleep.called)
+        self.assertEqual(
+            [str(c[0][1].url.host) for c in fn.call_args_list],
+            ['host', 'alternate'])
+
+    @patch('gofer.messaging.adapter.connect.backoff', lambda d: d)
     @patch('gofer.messaging.adapter.connect.sleep')
     def test_retried(self, sleep):
         fn = Mock()
         fn.side_effect = [ConnectError, ConnectError, None]
-        connection = Mock(url=URL, retry=True)
+        connection = self.connection()
         fx = retry(ConnectError)(fn)
         fx(connection)
         self.assertEqual(
@@ -57,20 +304,15 @@ class TestRetry(TestCase):
                 ((DELAY,), {}),
                 ((DELAY * DELAY_MULTIPLIER,), {}),
             ])
-        self.assertEqual(
-            fn.call_args_list,
-            [
-                ((connection,), {}),
-                ((connection,), {}),
-                ((connection,), {}),
-            ])
+        self.assertEqual(fn.call_count, 3)
 
+    @patch('gofer.messaging.adapter.connect.backoff', lambda d: d)
     @patch('gofer.messaging.adapter.connect.RETRIES', 2)
     @patch('gofer.messaging.adapter.connect.sleep')
     def test_exceeded(self, sleep):
         fn = Mock()
         fn.side_effect = [ConnectError, ConnectError, ConnectError]
-        connection = Mock(url=URL, retry=True)
+        connection = self.connection()
         fx = retry(ConnectError)(fn)
         self.assertRaises(ConnectError, fx, connection)
         self.assertEqual(
@@ -79,10 +321,4 @@ class TestRetry(TestCase):
                 ((DELAY,), {}),
                 ((DELAY * DELAY_MULTIPLIER,), {}),
             ])
-        self.assertEqual(
-            fn.call_args_list,
-            [
-                ((connection,), {}),
-                ((connection,), {}),
-                ((connection,), {}),
-            ])
+        self.assertEqual(fn.call_count, 3)
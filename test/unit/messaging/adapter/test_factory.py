@@ -191,6 +191,25 @@ class AdapterTest(TestCase):
         p = Adapter.find('')
         self.assertEqual(p, _list[0])
 
+    @patch('gofer.messaging.adapter.factory.Adapter.bindings', {})
+    @patch('gofer.messaging.adapter.factory.Loader.load')
+    def test_find_without_url_not_default(self, _load):
+        p1 = Mock(DEFAULT=False)
+        p2 = Mock()
+        _load.return_value = [p1, p2], {'A': p1, 'B': p2}
+        p = Adapter.find('')
+        self.assertEqual(p, p2)
+        p = Adapter.find('A+amqp://localhost')
+        self.assertEqual(p, p1)
+
+    @patch('gofer.messaging.adapter.factory.Adapter.bindings', {})
+    @patch('gofer.messaging.adapter.factory.Loader.load')
+    def test_find_only_not_default(self, _load):
+        adapter = Mock(DEFAULT=False)
+        _load.return_value = [adapter], {'A': adapter}
+        self.assertRaises(NoAdaptersLoaded, Adapter.find, '')
+        self.assertRaises(NoAdaptersLoaded, Adapter.find, None)
+
     @patch('gofer.messaging.adapter.factory.Adapter.bindings', {})
     @patch('gofer.messaging.adapter.factory.Loader.load')
     def test_find_nothing_loaded(self, _load):
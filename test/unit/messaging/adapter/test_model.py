@@ -19,8 +19,9 @@ from mock import patch, Mock
 
 from gofer.common import ThreadSingleton
 from gofer.messaging.model import Document, VERSION
+from gofer.messaging.codec import compress
 from gofer.messaging.adapter.url import URL
-from gofer.messaging.adapter.model import Model, _Domain, Node
+from gofer.messaging.adapter.model import Model, _Domain, Declared, Domain, Node
 from gofer.messaging.adapter.model import BaseExchange, Exchange, DIRECT
 from gofer.messaging.adapter.model import BaseQueue, Queue
 from gofer.messaging.adapter.model import Messenger
@@ -119,6 +120,53 @@ class TestDomain(TestCase):
         self.assertEqual(domain.content, {'Node::cat': cat})
 
 
+class TestDeclared(TestCase):
+
+    def test_init(self):
+        declared = Declared()
+        self.assertEqual(declared.content, {})
+        self.assertEqual(len(declared), 0)
+
+    def test_add(self):
+        url = 'test-url'
+        key = (Declared.QUEUE, 'q1')
+        declared = Declared()
+        declared.add(url, key)
+        self.assertTrue(declared.contains(url, key))
+        self.assertFalse(declared.contains('other-url', key))
+        self.assertFalse(declared.contains(url, (Declared.EXCHANGE, 'q1')))
+        self.assertEqual(len(declared), 1)
+
+    def test_discard(self):
+        url = 'test-url'
+        declared = Declared()
+        declared.add(url, (Declared.QUEUE, 'q1'))
+        declared.add(url, (Declared.QUEUE, 'q2'))
+        declared.add(url, (Declared.EXCHANGE, 'x1'))
+        declared.add(url, (Declared.BINDING, 'x1', 'q1'))
+        declared.add(url, (Declared.BINDING, 'x1', 'q2'))
+        # binding
+        declared.discard(url, (Declared.BINDING, 'x1', 'q2'))
+        self.assertEqual(len(declared), 4)
+        self.assertTrue(declared.contains(url, (Declared.QUEUE, 'q2')))
+        # queue
+        declared.discard(url, (Declared.QUEUE, 'q1'))
+        self.assertEqual(
+            declared.content[url],
+            set([(Declared.QUEUE, 'q2'), (Declared.EXCHANGE, 'x1')]))
+        # not declared
+        declared.discard('other-url', (Declared.QUEUE, 'q1'))
+
+    def test_invalidate(self):
+        url = 'test-url'
+        declared = Declared()
+        declared.add(url, (Declared.QUEUE, 'q1'))
+        declared.add('other-url', (Declared.QUEUE, 'q1'))
+        declared.invalidate(url)
+        declared.invalidate('not-declared')
+        self.assertEqual(declared.content.keys(), ['other-url'])
+
+
 class TestNode(TestCase):
 
     def test_init(self):
@@ -175,6 +223,12 @@ class TestBaseExchange(TestCase):
 
 class TestExchange(TestCase):
 
+    def setUp(self):
+        Domain.declared.content.clear()
+
+    def tearDown(self):
+        Domain.declared.content.clear()
+
     def test_init(self):
         name = 'test'
         exchange = BaseExchange(name)
@@ -205,6 +259,22 @@ class TestExchange(TestCase):
         impl.declare.assert_called_with(TEST_URL)
         self.assertEqual(impl.durable, exchange.durable)
         self.assertEqual(impl.auto_delete, exchange.auto_delete)
+        self.assertFalse(Domain.declared.contains(TEST_URL, (Declared.EXCHANGE, exchange.name)))
+        # not auto-deleted
+        exchange.auto_delete = False
+        exchange.declare(TEST_URL)
+        self.assertTrue(Domain.declared.contains(TEST_URL, (Declared.EXCHANGE, exchange.name)))
+
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_declare_cached(self, _find):
+        exchange = Exchange('test')
+        Domain.declared.add(TEST_URL, (Declared.EXCHANGE, exchange.name))
+
+        # test
+        exchange.declare(TEST_URL)
+
+        # validation
+        self.assertFalse(_find.called)
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_delete(self, _find):
@@ -212,6 +282,8 @@ class TestExchange(TestCase):
         _find.return_value = plugin
         exchange = Exchange('test')
 
+        Domain.declared.add(TEST_URL, (Declared.EXCHANGE, exchange.name))
+
         # test
         exchange.delete(TEST_URL)
 
@@ -219,21 +291,25 @@ class TestExchange(TestCase):
         plugin.Exchange.assert_called_with(exchange.name, exchange.policy)
         impl = plugin.Exchange()
         impl.delete.assert_called_with(TEST_URL)
+        self.assertEqual(len(Domain.declared), 0)
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_bind(self, _find):
         plugin = Mock()
         _find.return_value = plugin
-        queue = Mock()
+        queue = Queue('test-queue')
 
         # test
         exchange = Exchange('test')
         exchange.bind(queue, TEST_URL)
+        exchange.bind(queue, TEST_URL)
 
         # validation
-        plugin.Exchange.assert_called_with(exchange.name, exchange.policy)
+        plugin.Exchange.assert_called_once_with(exchange.name, exchange.policy)
         impl = plugin.Exchange()
-        impl.bind.assert_called_with(queue, TEST_URL)
+        impl.bind.assert_called_once_with(queue, TEST_URL)
+        key = (Declared.BINDING, exchange.name, queue.name)
+        self.assertTrue(Domain.declared.contains(TEST_URL, key))
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_unbind(self, _find):
@@ -243,12 +319,14 @@ class TestExchange(TestCase):
 
         # test
         exchange = Exchange('test')
+        Domain.declared.add(TEST_URL, (Declared.BINDING, exchange.name, queue.name))
         exchange.unbind(queue, TEST_URL)
 
         # validation
         plugin.Exchange.assert_called_with(exchange.name, exchange.policy)
         impl = plugin.Exchange()
         impl.unbind.assert_called_with(queue, TEST_URL)
+        self.assertEqual(len(Domain.declared), 0)
 
 
 class TestBaseQueue(TestCase):
@@ -260,6 +338,7 @@ class TestBaseQueue(TestCase):
         self.assertEqual(queue.exclusive, False)
         self.assertEqual(queue.auto_delete, False)
         self.assertEqual(queue.expiration, 0)
+        self.assertEqual(queue.expire_unused, False)
 
     def test_eq(self):
         self.assertTrue(BaseQueue('1') == BaseQueue('1'))
@@ -272,6 +351,12 @@ class TestBaseQueue(TestCase):
 
 class TestQueue(TestCase):
 
+    def setUp(self):
+        Domain.declared.content.clear()
+
+    def tearDown(self):
+        Domain.declared.content.clear()
+
     def test_init(self):
         name = 'test'
         queue = Queue(name)
@@ -279,6 +364,7 @@ class TestQueue(TestCase):
         self.assertEqual(queue.exclusive, False)
         self.assertEqual(queue.auto_delete, False)
         self.assertEqual(queue.expiration, 0)
+        self.assertEqual(queue.expire_unused, False)
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_declare(self, _find):
@@ -289,6 +375,7 @@ class TestQueue(TestCase):
         queue.durable = 1
         queue.auto_delete = 2
         queue.expiration = 3
+        queue.expire_unused = 5
         queue.exclusive = 4
 
         # test
@@ -301,7 +388,24 @@ class TestQueue(TestCase):
         self.assertEqual(impl.durable, queue.durable)
         self.assertEqual(impl.auto_delete, queue.auto_delete)
         self.assertEqual(impl.expiration, queue.expiration)
+        self.assertEqual(impl.expire_unused, queue.expire_unused)
         self.assertEqual(impl.exclusive, queue.exclusive)
+        self.assertFalse(Domain.declared.contains(TEST_URL, (Declared.QUEUE, name)))
+        # not auto-deleted
+        queue.auto_delete = False
+        queue.declare(TEST_URL)
+        self.assertTrue(Domain.declared.contains(TEST_URL, (Declared.QUEUE, name)))
+
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_declare_cached(self, _find):
+        queue = Queue('test')
+        Domain.declared.add(TEST_URL, (Declared.QUEUE, queue.name))
+
+        # test
+        queue.declare(TEST_URL)
+
+        # validation
+        self.assertFalse(_find.called)
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_delete(self, _find):
@@ -309,6 +413,9 @@ class TestQueue(TestCase):
         _find.return_value = plugin
         name = 'test'
 
+        Domain.declared.add(TEST_URL, (Declared.QUEUE, name))
+        Domain.declared.add(TEST_URL, (Declared.BINDING, 'amq.direct', name))
+
         # test
         queue = Queue(name)
         queue.delete(TEST_URL)
@@ -317,12 +424,47 @@ class TestQueue(TestCase):
         plugin.Queue.assert_called_with(name)
         impl = plugin.Queue()
         impl.delete.assert_called_with(TEST_URL)
+        self.assertEqual(len(Domain.declared), 0)
 
     @patch('gofer.messaging.adapter.model.Reader')
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_purge(self, _find, _reader):
         name = 'test'
-        _find.return_value = Mock()
+        plugin = Mock()
+        _find.return_value = plugin
+
+        # test
+        queue = Queue(name)
+        queue.purge(TEST_URL)
+
+        # validation
+        plugin.Queue.assert_called_once_with(name)
+        plugin.Queue.return_value.purge.assert_called_once_with(TEST_URL)
+        self.assertFalse(_reader.called)
+
+    @patch('gofer.messaging.adapter.model.Reader')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_purge_failed(self, _find, _reader):
+        name = 'test'
+        plugin = Mock()
+        plugin.Queue.return_value.purge.side_effect = ValueError
+        _find.return_value = plugin
+        _reader.return_value.get.return_value = None
+
+        # test
+        queue = Queue(name)
+        queue.purge(TEST_URL)
+
+        # validation
+        _reader.assert_called_once_with(queue, url=TEST_URL)
+
+    @patch('gofer.messaging.adapter.model.Reader')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_purge_drained(self, _find, _reader):
+        name = 'test'
+        plugin = Mock()
+        plugin.Queue.return_value.purge.side_effect = NotImplementedError
+        _find.return_value = plugin
         queued = [
             Mock(),
             Mock(),
@@ -536,7 +678,8 @@ class TestReader(TestCase):
 
         # validation
         reader.get.assert_called_once_with(10)
-        auth.validate.assert_called_once_with(reader.authenticator, message.body)
+        auth.validate.assert_called_once_with(
+            reader.authenticator, message.body, message.properties)
         validate.assert_called_once_with(document)
         self.assertEqual(_message, reader.get.return_value)
         self.assertEqual(_document, document)
@@ -578,7 +721,8 @@ class TestReader(TestCase):
 
         # validation
         reader.get.assert_called_once_with(10)
-        auth.validate.assert_called_once_with(reader.authenticator, message.body)
+        auth.validate.assert_called_once_with(
+            reader.authenticator, message.body, message.properties)
         message.ack.assert_called_once_with()
         self.assertFalse(validate.called)
 
@@ -603,10 +747,44 @@ class TestReader(TestCase):
 
         # validation
         reader.get.assert_called_once_with(10)
-        auth.validate.assert_called_once_with(reader.authenticator, message.body)
+        auth.validate.assert_called_once_with(
+            reader.authenticator, message.body, message.properties)
         message.ack.assert_called_once_with()
         validate.assert_called_once_with(document)
 
+    @patch('gofer.messaging.adapter.model.validate')
+    @patch('gofer.messaging.adapter.model.auth')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_authenticate(self, _find, auth, validate):
+        message = Mock()
+
+        # test
+        reader = Reader(Node(''))
+        document = reader.authenticate(message)
+
+        # validation
+        auth.validate.assert_called_once_with(
+            reader.authenticator, message.body, message.properties)
+        validate.assert_called_once_with(auth.validate.return_value)
+        self.assertEqual(document, auth.validate.return_value)
+        self.assertFalse(message.ack.called)
+        self.assertEqual(reader.latency.count, 1)
+
+    @patch('gofer.messaging.adapter.model.validate')
+    @patch('gofer.messaging.adapter.model.auth')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_authenticate_invalid(self, _find, auth, validate):
+        message = Mock()
+        validate.side_effect = ModelError
+
+        # test
+        reader = Reader(Node(''))
+        self.assertRaises(ModelError, reader.authenticate, message)
+
+        # validation
+        self.assertFalse(message.ack.called)
+        self.assertEqual(reader.latency.count, 1)
+
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_search(self, _find):
         _impl = Mock()
@@ -614,28 +792,75 @@ class TestReader(TestCase):
         plugin.Reader.return_value = _impl
         _find.return_value = plugin
         received = [
-            (Mock(), Document(sn='1')),
-            (Mock(), Document(sn='2')),
-            (Mock(), Document(sn='3'))
+            Mock(body=Document(sn='1', version=VERSION).dump()),
+            Mock(body=Document(sn='2', version=VERSION).dump()),
+            Mock(body=Document(sn='3', version=VERSION).dump()),
         ]
 
         # test
         url = TEST_URL
         node = Node('')
-        sn = received[1][1].sn
+        sn = '2'
         reader = Reader(node, url)
-        reader.next = Mock(side_effect=received)
+        reader.get = Mock(side_effect=received)
         document = reader.search(sn, timeout=10)
 
         # validation
-        next_calls = reader.next.call_args_list
-        self.assertEqual(len(next_calls), 2)
-        self.assertEqual(document, received[1][1])
-        for call in next_calls:
+        get_calls = reader.get.call_args_list
+        self.assertEqual(len(get_calls), 2)
+        self.assertEqual(document.sn, sn)
+        for call in get_calls:
             self.assertEqual(call[0][0], 10)
-        self.assertTrue(received[0][0].ack.called)
-        self.assertTrue(received[1][0].ack.called)
-        self.assertFalse(received[2][0].ack.called)
+        self.assertTrue(received[0].ack.called)
+        self.assertTrue(received[1].ack.called)
+        self.assertFalse(received[2].ack.called)
+
+    @patch('gofer.messaging.adapter.model.log')
+    @patch('gofer.messaging.adapter.model.auth')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_search_not_decoded(self, _find, auth, log):
+        _impl = Mock()
+        plugin = Mock()
+        plugin.Reader.return_value = _impl
+        _find.return_value = plugin
+        matched = Document(sn='xyz', version=VERSION)
+        auth.validate.return_value = matched
+        received = [
+            Mock(body=Document(sn='abc', version=VERSION).dump()),
+            Mock(body=compress(Document(sn='abc', data='A' * 1000).dump(), 100)),
+            Mock(body=matched.dump()),
+        ]
+
+        # test
+        reader = Reader(Node(''), TEST_URL)
+        reader.get = Mock(side_effect=received)
+        document = reader.search(matched.sn, timeout=10)
+
+        # validation
+        auth.validate.assert_called_once_with(
+            reader.authenticator, received[2].body, received[2].properties)
+        self.assertEqual(document, matched)
+        for message in received:
+            message.ack.assert_called_once_with()
+        self.assertEqual(log.debug.call_count, 2)
+
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_search_invalid(self, _find):
+        _impl = Mock()
+        plugin = Mock()
+        plugin.Reader.return_value = _impl
+        _find.return_value = plugin
+        received = [
+            Mock(body=Document(sn='1', version='0.0').dump()),
+        ]
+
+        # test
+        reader = Reader(Node(''), TEST_URL)
+        reader.get = Mock(side_effect=received)
+        self.assertRaises(ModelError, reader.search, '1', timeout=10)
+
+        # validation
+        received[0].ack.assert_called_once_with()
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_search_not_found(self, _find):
@@ -644,28 +869,28 @@ class TestReader(TestCase):
         plugin.Reader.return_value = _impl
         _find.return_value = plugin
         received = [
-            (Mock(), Document(sn='1')),
-            (Mock(), Document(sn='2')),
-            (Mock(), Document(sn='3')),
-            (None, None)
+            Mock(body=Document(sn='1', version=VERSION).dump()),
+            Mock(body=Document(sn='2', version=VERSION).dump()),
+            Mock(body=Document(sn='3', version=VERSION).dump()),
+            None
         ]
 
         # test
         url = TEST_URL
         node = Node('')
         reader = Reader(node, url)
-        reader.next = Mock(side_effect=received)
+        reader.get = Mock(side_effect=received)
         document = reader.search('', timeout=10)
 
         # validation
-        next_calls = reader.next.call_args_list
-        self.assertEqual(len(next_calls), len(received))
+        get_calls = reader.get.call_args_list
+        self.assertEqual(len(get_calls), len(received))
         self.assertEqual(document, None)
-        for call in next_calls:
+        for call in get_calls:
             self.assertEqual(call[0][0], 10)
-        self.assertTrue(received[0][0].ack.called)
-        self.assertTrue(received[1][0].ack.called)
-        self.assertTrue(received[2][0].ack.called)
+        self.assertTrue(received[0].ack.called)
+        self.assertTrue(received[1].ack.called)
+        self.assertTrue(received[2].ack.called)
 
     @patch('gofer.messaging.adapter.model.Adapter.find')
     def test_search_timeout(self, _find):
@@ -674,26 +899,26 @@ class TestReader(TestCase):
         plugin.Reader.return_value = _impl
         _find.return_value = plugin
         received = [
-            (Mock(), Document(sn='1')),
-            (Mock(), Document(sn='2')),
-            (None, None)
+            Mock(body=Document(sn='1', version=VERSION).dump()),
+            Mock(body=Document(sn='2', version=VERSION).dump()),
+            None
         ]
 
         # test
         url = TEST_URL
         node = Node('')
         reader = Reader(node, url)
-        reader.next = Mock(side_effect=received)
-        document = reader.search('', timeout=10)
+        reader.get = Mock(side_effect=received)
+        document = reader.search('4', timeout=10)
 
         # validation
-        next_calls = reader.next.call_args_list
-        self.assertEqual(len(next_calls), len(received))
+        get_calls = reader.get.call_args_list
+        self.assertEqual(len(get_calls), len(received))
         self.assertEqual(document, None)
-        for call in next_calls:
+        for call in get_calls:
             self.assertEqual(call[0][0], 10)
-        self.assertTrue(received[0][0].ack.called)
-        self.assertTrue(received[1][0].ack.called)
+        self.assertTrue(received[0].ack.called)
+        self.assertTrue(received[1].ack.called)
 
 
 class TestBaseSender(TestCase):
@@ -782,7 +1007,7 @@ class TestSender(TestCase):
         sender = Sender(url)
         sender.durable = 18
         sender.send(address, content, ttl)
-        _impl.send.assert_called_once_with(address, content, ttl)
+        _impl.send.assert_called_once_with(address, content, ttl, None)
         self.assertEqual(sender.durable, _impl.durable)
 
 
@@ -875,11 +1100,55 @@ class TestProducer(TestCase):
             routing=(None, address)
         )
         unsigned = document.return_value
+        unsigned.__iadd__.return_value.dump.assert_called_once_with(producer.codec)
         auth.sign.assert_called_once_with(
-            producer.authenticator, unsigned.__iadd__.return_value.dump.return_value)
-        _impl.send.assert_called_once_with(address, auth.sign.return_value, ttl)
+            producer.authenticator,
+            unsigned.__iadd__.return_value.dump.return_value,
+            producer.codec)
+        _impl.send.assert_called_once_with(address, auth.sign.return_value, ttl, None)
         self.assertEqual(sn, uuid4.return_value)
 
+    @patch('gofer.messaging.adapter.model.codec')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_send_compressed(self, _find, codec):
+        _impl = Mock()
+        plugin = Mock()
+        plugin.Sender.return_value = _impl
+        _find.return_value = plugin
+        address = 'amq.direct/bar'
+
+        # test
+        producer = Producer(TEST_URL)
+        producer.compression = 100
+        producer.send(address, A='B' * 1000)
+
+        # validation
+        signed = codec.compress.call_args[0][0]
+        codec.compress.assert_called_once_with(signed, producer.compression)
+        _impl.send.assert_called_once_with(address, codec.compress.return_value, None, None)
+
+    @patch('gofer.messaging.adapter.model.auth')
+    @patch('gofer.messaging.adapter.model.Adapter.find')
+    def test_send_detached(self, _find, auth):
+        _impl = Mock()
+        plugin = Mock()
+        plugin.Sender.return_value = _impl
+        _find.return_value = plugin
+        auth.DETACHED = 'detached'
+        address = 'amq.direct/bar'
+
+        # test
+        producer = Producer(TEST_URL)
+        producer.authenticator = Mock()
+        producer.signing = 'detached'
+        producer.send(address, A=1)
+
+        # validation
+        self.assertFalse(auth.sign.called)
+        unsigned = auth.detach.call_args[0][1]
+        auth.detach.assert_called_once_with(producer.authenticator, unsigned)
+        _impl.send.assert_called_once_with(address, unsigned, None, auth.detach.return_value)
+
 
 class TestBaseConnection(TestCase):
 
@@ -1022,6 +1291,8 @@ class TestConnector(TestCase):
         self.assertEqual(b.userid, URL(url).userid)
         self.assertEqual(b.password, URL(url).password)
         self.assertEqual(b.virtual_host, URL(url).path)
+        self.assertEqual(b.heartbeat, None)
+        self.assertEqual(b.failover, [])
         self.assertEqual(b.ssl.ca_certificate, None)
         self.assertEqual(b.ssl.client_key, None)
         self.assertEqual(b.ssl.client_certificate, None)
@@ -1048,6 +1319,21 @@ class TestConnector(TestCase):
         connector = Connector('amqps://localhost')
         self.assertTrue(connector.use_ssl())
 
+    def test_endpoints(self):
+        connector = Connector('amqp://a')
+        connector.heartbeat = 10
+        connector.failover = ['amqp://b', 'amqp://c']
+
+        # test
+        endpoints = connector.endpoints()
+
+        # validation
+        self.assertEqual(endpoints[0], connector)
+        self.assertEqual([e.url for e in endpoints[1:]], [URL('amqp://b'), URL('amqp://c')])
+        for endpoint in endpoints[1:]:
+            self.assertEqual(endpoint.ssl, connector.ssl)
+            self.assertEqual(endpoint.heartbeat, connector.heartbeat)
+
     def test_unicode(self):
         url = TEST_URL
         b = Connector(url)
@@ -1086,6 +1372,15 @@ class TestMessage(TestCase):
         self.assertEqual(message._reader, reader)
         self.assertEqual(message._impl, impl)
         self.assertEqual(message._body, body)
+        self.assertEqual(message._properties, {})
+
+    def test_properties(self):
+        reader = Mock()
+        impl = Mock()
+        body = 'test-body'
+        properties = {'A': 1}
+        message = Message(reader, impl, body, properties)
+        self.assertEqual(message.properties, properties)
 
     def test_body(self):
         reader = Mock()
@@ -15,7 +15,7 @@ from unittest import TestCase
 from mock import patch, Mock
 
 from gofer.messaging.auth import ValidationFailed, Authenticator
-from gofer.messaging.auth import sign, validate
+from gofer.messaging.auth import sign, detach, validate, SIGNATURE
 from gofer.messaging.auth import peal, encode, decode
 
 
@@ -72,6 +72,32 @@ class TestSign(TestCase):
         self.assertEqual(signed, message)
 
 
+class TestDetach(TestCase):
+
+    def test_detach(self):
+        message = '{"A":1}'
+        signature = 'KLAJDF988R'
+        authenticator = Mock()
+        authenticator.sign.return_value = signature
+
+        # functional test
+        properties = detach(authenticator, message)
+
+        # validation
+        h = sha256()
+        h.update(message)
+        authenticator.sign.assert_called_once_with(h.hexdigest())
+        self.assertEqual(properties, {SIGNATURE: 'S0xBSkRGOTg4Ug=='})
+
+    def test_no_authenticator(self):
+        properties = detach(None, 'howdy partner')
+        self.assertEqual(properties, {})
+
+    def test_signing_exception(self):
+        properties = detach(Authenticator(), 'howdy partner')
+        self.assertEqual(properties, {})
+
+
 class TestValidation(TestCase):
 
     @patch('gofer.messaging.auth.decode', side_effect=decode)
@@ -87,6 +113,35 @@ class TestValidation(TestCase):
         decode.assert_called_once_with(signature)
         self.assertEqual(1, validated['A'])
 
+    def test_validate_detached(self):
+        signature = 'S0xBSkRGOTg4Ug=='
+        message = '{"A":1}'
+        properties = {SIGNATURE: signature}
+        authenticator = Mock()
+
+        # functional test
+        validated = validate(authenticator, message, properties)
+
+        # validation
+        h = sha256()
+        h.update(message)
+        authenticator.validate.assert_called_once_with(
+            validated, h.hexdigest(), 'KLAJDF988R')
+        self.assertEqual(1, validated['A'])
+
+    def test_validate_detached_failed(self):
+        message = '{"A":1}'
+        properties = {SIGNATURE: 'S0xBSkRGOTg4Ug=='}
+        authenticator = Mock()
+        authenticator.validate.side_effect = ValidationFailed
+
+        # functional test
+        try:
+            validate(authenticator, message, properties)
+            self.assertTrue(False, msg='validation exception expected')
+        except ValidationFailed, e:
+            self.assertEqual(e.document, message)
+
     def test_validate_failed(self):
         message = '[]'
         authenticator = Mock()
@@ -0,0 +1,234 @@
+# Copyright (c) 2015 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import zlib
+
+from unittest import TestCase
+
+from mock import patch
+
+from gofer.common import Options
+from gofer.messaging import codec
+from gofer.messaging.codec import Codec, Json, Compact, MsgPack
+from gofer.messaging.codec import CodecNotFound, Splice, find, detect, default
+from gofer.messaging.codec import compressed, compress, decompress, contains
+from gofer.messaging.model import Document
+
+
+class TestDefault(TestCase):
+
+    def test_options(self):
+        options = Options(a=1)
+        self.assertEqual(default(options), {'a': 1})
+
+    def test_not_supported(self):
+        self.assertRaises(TypeError, default, object())
+
+
+class Encoded(object):
+
+    def __init__(self, encoded):
+        self.__encoded__ = encoded
+
+
+class TestSplice(TestCase):
+
+    def test_splice(self):
+        thing = dict(A=Encoded('{"x": [1, 2]}'), B=[Encoded('"y"')], C=Options(d=1))
+        self.assertEqual(
+            Json().encode(thing),
+            '{"A": {"x": [1, 2]}, "B": ["y"], "C": {"d": 1}}')
+        self.assertEqual(
+            Compact().decode(Compact().encode(thing)),
+            {'A': {'x': [1, 2]}, 'B': ['y'], 'C': {'d': 1}})
+
+    def test_not_encoded(self):
+        splice = Splice()
+        self.assertEqual(splice.default(Options(a=1)), {'a': 1})
+        self.assertRaises(TypeError, splice.default, object())
+        self.assertEqual(splice.token, None)
+        self.assertEqual(splice('{}'), '{}')
+
+
+class TestCodec(TestCase):
+
+    def test_abstract(self):
+        c = Codec()
+        self.assertRaises(NotImplementedError, c.detected, '')
+        self.assertRaises(NotImplementedError, c.encode, {})
+        self.assertRaises(NotImplementedError, c.decode, '')
+
+
+class TestJson(TestCase):
+
+    def test_detected(self):
+        c = Json()
+        self.assertTrue(c.detected('{}'))
+        self.assertTrue(c.detected(' {}'))
+        self.assertFalse(c.detected('\x80'))
+        self.assertFalse(c.detected(''))
+
+    def test_encode(self):
+        c = Json()
+        thing = dict(B=2, A=Options(c=3, b=[Options()]))
+        self.assertEqual(c.encode(thing), '{"A": {"b": [{}], "c": 3}, "B": 2}')
+
+    def test_decode(self):
+        c = Json()
+        self.assertEqual(c.decode('{"A": 1}'), {'A': 1})
+
+
+class TestCompact(TestCase):
+
+    def test_encode(self):
+        c = Compact()
+        thing = dict(A=Options(b=[1, 2]))
+        self.assertEqual(c.encode(thing), '{"A":{"b":[1,2]}}')
+
+    def test_round_trip(self):
+        c = Compact()
+        thing = dict(A=1, B=[1, 2], C=dict(x='y'))
+        encoded = c.encode(thing)
+        self.assertEqual(detect(encoded).decode(encoded), thing)
+
+
+class TestMsgPack(TestCase):
+
+    def test_detected(self):
+        c = MsgPack()
+        self.assertTrue(c.detected('\x80'))
+        self.assertTrue(c.detected('\x8f'))
+        self.assertTrue(c.detected('\xde'))
+        self.assertTrue(c.detected('\xdf'))
+        self.assertFalse(c.detected('{}'))
+        self.assertFalse(c.detected(''))
+
+    @patch('gofer.messaging.codec.msgpack', None)
+    def test_not_installed(self):
+        c = MsgPack()
+        self.assertRaises(CodecNotFound, c.encode, {})
+        self.assertRaises(CodecNotFound, c.decode, '\x80')
+
+    def test_round_trip(self):
+        if codec.msgpack is None:
+            return
+        c = MsgPack()
+        thing = dict(A=1, B=Options(x=[1, 2]))
+        encoded = c.encode(thing)
+        self.assertTrue(c.detected(encoded))
+        self.assertEqual(detect(encoded).decode(encoded), {'A': 1, 'B': {'x': [1, 2]}})
+
+
+class TestFind(TestCase):
+
+    def test_default(self):
+        self.assertTrue(isinstance(find(), Json))
+        self.assertTrue(isinstance(find(None), Json))
+
+    def test_find(self):
+        self.assertTrue(isinstance(find('compact'), Compact))
+        self.assertTrue(isinstance(find('msgpack'), MsgPack))
+
+    def test_not_found(self):
+        self.assertRaises(CodecNotFound, find, 'xml')
+
+
+class TestDetect(TestCase):
+
+    def test_default(self):
+        self.assertTrue(isinstance(detect('garbage'), Json))
+
+
+class TestDocument(TestCase):
+
+    def test_dump_compact(self):
+        document = Document(A=Document(b=1))
+        self.assertEqual(document.dump('compact'), '{"A":{"b":1}}')
+
+    def test_load_detected(self):
+        if codec.msgpack is None:
+            return
+        document = Document(A=Document(b=1))
+        loaded = Document().load(document.dump('msgpack'))
+        self.assertEqual(loaded.__dict__, {'A': {'b': 1}})
+
+
+class TestContains(TestCase):
+
+    def test_contains(self):
+        s = Document(sn='1234', A=1).dump()
+        self.assertTrue(contains(s, '1234'))
+        self.assertTrue(contains(s, u'1234'))
+        self.assertFalse(contains(s, '5678'))
+
+    def test_compressed(self):
+        s = compress(Document(sn='1234', A='B' * 1000).dump(), 100)
+        self.assertTrue(contains(s, '1234'))
+        self.assertFalse(contains(s, '5678'))
+
+    def test_signed(self):
+        s = Document(message=Document(sn='1234').dump('compact')).dump()
+        self.assertTrue(contains(s, '1234'))
+
+    def test_msgpack(self):
+        if codec.msgpack is None:
+            return
+        s = Document(sn='1234').dump('msgpack')
+        self.assertTrue(contains(s, '1234'))
+
+
+class TestCompression(TestCase):
+
+    def test_compressed(self):
+        self.assertTrue(compressed(zlib.compress('hello')))
+        self.assertTrue(compressed(zlib.compress('hello', 9)))
+        self.assertFalse(compressed(''))
+        self.assertFalse(compressed('x'))
+        self.assertFalse(compressed('xyz'))
+        self.assertFalse(compressed('{"A": 1}'))
+
+    def test_disabled(self):
+        s = 'A' * 1000
+        self.assertEqual(compress(s), s)
+        self.assertEqual(compress(s, 0), s)
+
+    def test_below_threshold(self):
+        s = 'A' * 1000
+        self.assertEqual(compress(s, 1000), s)
+
+    def test_not_reduced(self):
+        s = os.urandom(100)
+        self.assertEqual(compress(s, 10), s)
+
+    def test_compress(self):
+        s = 'A' * 1000
+        z = compress(s, 100)
+        self.assertTrue(compressed(z))
+        self.assertTrue(len(z) < len(s))
+        self.assertEqual(decompress(z), s)
+
+    def test_compress_unicode(self):
+        s = u'\u00e9' * 1000
+        z = compress(s, 100)
+        self.assertEqual(decompress(z).decode('utf-8'), s)
+
+    def test_decompress_plain(self):
+        s = '{"A": 1}'
+        self.assertEqual(decompress(s), s)
+
+    def test_decompress_invalid(self):
+        self.assertRaises(ValueError, decompress, 'x\x9cgarbage')
+
+    def test_document(self):
+        document = Document(A='B' * 1000)
+        z = compress(document.dump(), 100)
+        self.assertEqual(Document().load(z).__dict__, document.__dict__)
@@ -9,16 +9,157 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+import shutil
+
+from tempfile import mkdtemp
 from threading import Thread
 from unittest import TestCase
 
 from mock import Mock, patch
 
 from gofer.messaging import Node
-from gofer.messaging.consumer import ConsumerThread, Consumer
+from gofer.messaging.consumer import ConsumerThread, Consumer, Job, Pipeline, Quarantine
 from gofer.messaging import InvalidDocument, ValidationFailed
 
 
+class TestJob(TestCase):
+
+    def test_call(self):
+        message = Mock()
+        reader = Mock()
+        job = Job(message)
+        job(reader)
+        reader.authenticate.assert_called_once_with(message)
+        self.assertEqual(job.document, reader.authenticate.return_value)
+        self.assertEqual(job.error, None)
+        self.assertTrue(job.done.isSet())
+
+    def test_call_failed(self):
+        message = Mock()
+        reader = Mock()
+        reader.authenticate.side_effect = ValueError
+        job = Job(message)
+        job(reader)
+        self.assertEqual(job.document, None)
+        self.assertTrue(isinstance(job.error, ValueError))
+        self.assertTrue(job.done.isSet())
+
+
+class TestQuarantine(TestCase):
+
+    def setUp(self):
+        self.path = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_init(self):
+        quarantine = Quarantine(self.path)
+        self.assertEqual(quarantine.path, self.path)
+        self.assertEqual(quarantine.failures, {})
+        self.assertEqual(len(quarantine.history), 0)
+
+    def test_digest(self):
+        self.assertEqual(
+            Quarantine.digest(Mock(body='hello')),
+            Quarantine.digest(Mock(body=u'hello')))
+        self.assertNotEqual(
+            Quarantine.digest(Mock(body='hello')),
+            Quarantine.digest(Mock(body='world')))
+
+    def test_failed(self):
+        message = Mock(body='poison')
+        digest = Quarantine.digest(message)
+        quarantine = Quarantine(self.path)
+
+        # test
+        for n in range(Quarantine.LIMIT - 1):
+            self.assertFalse(quarantine.failed(message))
+        self.assertEqual(quarantine.failures, {digest: Quarantine.LIMIT - 1})
+        self.assertTrue(quarantine.failed(message))
+
+        # validation
+        self.assertEqual(quarantine.failures, {})
+        path = os.path.join(self.path, digest)
+        self.assertEqual(open(path).read(), message.body)
+
+    def test_failed_no_path(self):
+        message = Mock(body='poison')
+        quarantine = Quarantine()
+        for n in range(Quarantine.LIMIT - 1):
+            self.assertFalse(quarantine.failed(message))
+        self.assertTrue(quarantine.failed(message))
+        self.assertEqual(os.listdir(self.path), [])
+
+    @patch('gofer.messaging.consumer.Quarantine.CAPACITY', 2)
+    def test_failed_capacity(self):
+        quarantine = Quarantine(self.path)
+        for body in ('a', 'b', 'c'):
+            quarantine.failed(Mock(body=body))
+        self.assertEqual(len(quarantine.failures), 2)
+        self.assertEqual(list(quarantine.history), [Quarantine.digest(Mock(body=b)) for b in ('b', 'c')])
+
+
+class TestPipeline(TestCase):
+
+    @patch('gofer.messaging.consumer.ThreadPool')
+    def test_init(self, pool):
+        reader = Mock()
+        pipeline = Pipeline(reader, 3)
+        pool.assert_called_once_with(3)
+        self.assertEqual(pipeline.reader, reader)
+        self.assertEqual(pipeline.pool, pool.return_value)
+        self.assertEqual(pipeline.backlog, 6)
+        self.assertEqual(len(pipeline), 0)
+
+    @patch('gofer.messaging.consumer.ThreadPool')
+    def test_put(self, pool):
+        reader = Mock()
+        message = Mock()
+        pipeline = Pipeline(reader, 1)
+        pipeline.put(message)
+        self.assertEqual(len(pipeline), 1)
+        job = pipeline.jobs[0]
+        self.assertEqual(job.message, message)
+        pool.return_value.run.assert_called_once_with(job, reader)
+        self.assertFalse(pipeline.full())
+        pipeline.put(message)
+        self.assertTrue(pipeline.full())
+
+    @patch('gofer.messaging.consumer.ThreadPool')
+    def test_get_ordered(self, pool):
+        reader = Mock()
+        pipeline = Pipeline(reader, 2)
+        for n in range(3):
+            pipeline.put(Mock())
+        jobs = list(pipeline.jobs)
+        jobs[1].done.set()
+        self.assertEqual(pipeline.get(False), [])
+        jobs[0].done.set()
+        self.assertEqual(pipeline.get(False), jobs[:2])
+        self.assertEqual(len(pipeline), 1)
+
+    @patch('gofer.messaging.consumer.ThreadPool')
+    def test_get_blocking(self, pool):
+        reader = Mock()
+        pipeline = Pipeline(reader, 1)
+        pool.return_value.run.side_effect = lambda job, r: job(r)
+        pipeline.put(Mock())
+        completed = pipeline.get(True)
+        self.assertEqual(len(completed), 1)
+        self.assertEqual(completed[0].document, reader.authenticate.return_value)
+        self.assertEqual(pipeline.get(True), [])
+
+    @patch('gofer.messaging.consumer.ThreadPool')
+    def test_shutdown(self, pool):
+        pipeline = Pipeline(Mock(), 1)
+        pipeline.put(Mock())
+        pipeline.shutdown()
+        self.assertEqual(len(pipeline), 0)
+        pool.return_value.shutdown.assert_called_once_with()
+
+
 class TestConsumerThread(TestCase):
 
     def test_init(self):
@@ -31,6 +172,9 @@ class TestConsumerThread(TestCase):
         self.assertTrue(isinstance(consumer, Thread))
         self.assertTrue(consumer.daemon)
         self.assertEqual(consumer.reader,  None)
+        self.assertEqual(consumer.auth_threads, 0)
+        self.assertTrue(isinstance(consumer.quarantine, Quarantine))
+        self.assertEqual(consumer.pipeline, None)
 
     @patch('gofer.common.Thread.abort')
     def test_shutdown(self, abort):
@@ -199,6 +343,214 @@ class TestConsumerThread(TestCase):
         consumer.open.assert_called_once_with()
         sleep.assert_called_once_with(60)
 
+    @patch('gofer.messaging.consumer.Pipeline')
+    @patch('gofer.messaging.consumer.Reader')
+    def test_run_pipelined(self, reader, pipeline):
+        url = 'test-url'
+        node = Node('test-queue')
+        consumer = ConsumerThread(node, url)
+        consumer.auth_threads = 4
+        consumer.open = Mock()
+        consumer.close = Mock()
+        consumer.read = Mock(side_effect=StopIteration)
+
+        # test
+        try:
+            consumer.run()
+        except StopIteration:
+            pass
+
+        # validation
+        pipeline.assert_called_once_with(reader.return_value, consumer.auth_threads)
+        pipeline.return_value.shutdown.assert_called_once_with()
+
+    def test_read_pipelined(self):
+        url = 'test-url'
+        node = Node('test-queue')
+        message = Mock()
+        job = Mock(message=message, error=None)
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.reader.get.return_value = message
+        consumer.pipeline = Mock()
+        consumer.pipeline.full.return_value = False
+        consumer.pipeline.__len__ = Mock(return_value=0)
+        consumer.pipeline.get.return_value = [job]
+        consumer.dispatch = Mock()
+
+        # test
+        consumer.read()
+
+        # validate
+        consumer.reader.get.assert_called_once_with(consumer.wait)
+        consumer.pipeline.put.assert_called_once_with(message)
+        consumer.pipeline.get.assert_called_once_with(False)
+        consumer.dispatch.assert_called_once_with(job.document)
+        message.ack.assert_called_once_with()
+
+    def test_read_pipelined_pending(self):
+        url = 'test-url'
+        node = Node('test-queue')
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.reader.get.return_value = None
+        consumer.pipeline = Mock()
+        consumer.pipeline.full.return_value = False
+        consumer.pipeline.__len__ = Mock(return_value=1)
+        consumer.pipeline.get.return_value = []
+        consumer.dispatch = Mock()
+
+        # test
+        consumer.read()
+
+        # validate
+        consumer.reader.get.assert_called_once_with(0)
+        consumer.pipeline.get.assert_called_once_with(True)
+        self.assertFalse(consumer.dispatch.called)
+
+    def test_read_pipelined_full(self):
+        url = 'test-url'
+        node = Node('test-queue')
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.pipeline = Mock()
+        consumer.pipeline.full.return_value = True
+        consumer.pipeline.get.return_value = []
+
+        # test
+        consumer.read()
+
+        # validate
+        self.assertFalse(consumer.reader.get.called)
+        consumer.pipeline.get.assert_called_once_with(True)
+
+    def test_read_pipelined_invalid(self):
+        url = 'test-url'
+        node = Node('test-queue')
+        message = Mock()
+        failed = ValidationFailed(details='test')
+        job = Mock(message=message, error=failed)
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.pipeline = Mock()
+        consumer.pipeline.full.return_value = True
+        consumer.pipeline.get.return_value = [job]
+        consumer.dispatch = Mock()
+        consumer.rejected = Mock()
+
+        # test
+        consumer.read()
+
+        # validate
+        message.ack.assert_called_once_with()
+        self.assertFalse(consumer.dispatch.called)
+        consumer.rejected.assert_called_once_with(
+            failed.code, failed.description, failed.document, failed.details)
+
+    @patch('gofer.messaging.consumer.sleep')
+    def test_read_pipelined_failed(self, sleep):
+        url = 'test-url'
+        node = Node('test-queue')
+        message = Mock()
+        job = Mock(message=message, error=IndexError())
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.pipeline = Mock()
+        consumer.pipeline.full.return_value = True
+        consumer.pipeline.get.return_value = [job]
+        consumer.failed = Mock()
+        consumer.open = Mock()
+        consumer.close = Mock()
+
+        # test
+        consumer.read()
+
+        # validation
+        consumer.failed.assert_called_once_with(message)
+        self.assertFalse(consumer.pipeline.clear.called)
+        self.assertFalse(consumer.close.called)
+        self.assertFalse(sleep.called)
+
+    @patch('gofer.messaging.consumer.sleep')
+    def test_read_pipelined_exception(self, sleep):
+        url = 'test-url'
+        node = Node('test-queue')
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.reader.get.side_effect = IndexError
+        consumer.pipeline = Mock()
+        consumer.pipeline.full.return_value = False
+        consumer.pipeline.__len__ = Mock(return_value=0)
+        consumer.open = Mock()
+        consumer.close = Mock()
+
+        # test
+        consumer.read()
+
+        # validation
+        consumer.pipeline.clear.assert_called_once_with()
+        consumer.close.assert_called_once_with()
+        consumer.open.assert_called_once_with()
+        sleep.assert_called_once_with(60)
+
+    def test_process(self):
+        url = 'test-url'
+        node = Node('test-queue')
+        message = Mock()
+        document = Mock()
+        consumer = ConsumerThread(node, url)
+        consumer.dispatch = Mock()
+        consumer.failed = Mock()
+
+        # test
+        consumer.process(message, document)
+
+        # validation
+        consumer.dispatch.assert_called_once_with(document)
+        message.ack.assert_called_once_with()
+        self.assertFalse(consumer.failed.called)
+
+    @patch('gofer.messaging.consumer.sleep')
+    def test_process_failed(self, sleep):
+        url = 'test-url'
+        node = Node('test-queue')
+        message = Mock()
+        document = Mock()
+        consumer = ConsumerThread(node, url)
+        consumer.reader = Mock()
+        consumer.reader.next.return_value = (message, document)
+        consumer.dispatch = Mock(side_effect=ValueError)
+        consumer.failed = Mock()
+        consumer.close = Mock()
+
+        # test
+        consumer.read()
+
+        # validation
+        consumer.failed.assert_called_once_with(message)
+        self.assertFalse(message.ack.called)
+        self.assertFalse(consumer.close.called)
+        self.assertFalse(sleep.called)
+
+    def test_failed(self):
+        url = 'test-url'
+        node = Node('test-queue')
+        message = Mock()
+        consumer = ConsumerThread(node, url)
+        consumer.quarantine = Mock()
+
+        # requeued
+        consumer.quarantine.failed.return_value = False
+        consumer.failed(message)
+        consumer.quarantine.failed.assert_called_once_with(message)
+        message.reject.assert_called_once_with(True)
+        self.assertFalse(message.ack.called)
+
+        # quarantined
+        consumer.quarantine.failed.return_value = True
+        consumer.failed(message)
+        message.ack.assert_called_once_with()
+
     def test_rejected(self):
         url = 'test-url'
         node = Node('test-queue')
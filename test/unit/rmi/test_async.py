@@ -11,6 +11,154 @@
 
 from unittest import TestCase
 
+from mock import Mock
+
+from gofer.messaging import Document, InvalidDocument
+from gofer.rmi.policy import RequestTimeout
+from gofer.rmi.async import Succeeded, Failed, Rejected, Progress, Started
+from gofer.rmi.async import Future, Futures
+
+
+def document(sn, **body):
+    return Document(sn=sn, routing=['A', 'B'], timestamp='ts', data=None, **body)
+
 
 class Test(TestCase):
-    pass
\ No newline at end of file
+    pass
+
+
+class TestRejected(TestCase):
+
+    def test_throw(self):
+        reply = Rejected(document('123', code='1', description='2', details='3'))
+        self.assertEqual(reply.code, '1')
+        self.assertEqual(reply.description, '2')
+        self.assertEqual(reply.details, '3')
+        self.assertRaises(InvalidDocument, reply.throw)
+
+
+class TestFuture(TestCase):
+
+    def test_init(self):
+        progress = Mock()
+        future = Future('123', progress)
+        self.assertEqual(future.sn, '123')
+        self.assertEqual(future.progress, progress)
+        self.assertEqual(future.reply, None)
+        self.assertFalse(future.done())
+
+    def test_set(self):
+        reply = Mock()
+        future = Future('123')
+        future.set(reply)
+        self.assertTrue(future.done())
+        self.assertEqual(future.wait(), reply)
+
+    def test_wait_timeout(self):
+        future = Future('123')
+        self.assertRaises(RequestTimeout, future.wait, 0)
+
+    def test_result(self):
+        reply = Succeeded(document('123', result=dict(retval=18)))
+        future = Future('123')
+        future.set(reply)
+        self.assertEqual(future.result(), 18)
+
+    def test_result_failed(self):
+        result = dict(
+            exval='failed',
+            xmodule=ValueError.__module__,
+            xclass=ValueError.__name__,
+            xstate={},
+            xargs=[])
+        reply = Failed(document('123', result=result))
+        future = Future('123')
+        future.set(reply)
+        self.assertRaises(ValueError, future.result)
+
+
+class TestFutures(TestCase):
+
+    def test_add(self):
+        futures = Futures()
+        future = futures.add('123')
+        self.assertEqual(future.sn, '123')
+        self.assertEqual(futures.futures, {'123': future})
+        self.assertEqual(len(futures), 1)
+
+    def test_final(self):
+        futures = Futures()
+        future = futures.add('123')
+        reply = Succeeded(document('123', result=dict(retval=1)))
+        futures(reply)
+        self.assertTrue(future.done())
+        self.assertEqual(future.reply, reply)
+        self.assertEqual(len(futures), 0)
+
+    def test_rejected(self):
+        futures = Futures()
+        future = futures.add('123')
+        reply = Rejected(document('123', code='1', description='2', details='3'))
+        futures(reply)
+        self.assertTrue(future.done())
+        self.assertRaises(InvalidDocument, future.result)
+
+    def test_orphaned(self):
+        futures = Futures()
+        reply = Succeeded(document('123', result=dict(retval=1)))
+        futures(reply)
+        self.assertEqual(futures.orphans, {'123': reply})
+        future = futures.add('123')
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 1)
+        self.assertEqual(futures.orphans, {})
+        self.assertEqual(len(futures), 0)
+
+    def test_orphans_bounded(self):
+        futures = Futures()
+        futures.MAX_ORPHANS = 2
+        for sn in ('1', '2', '3'):
+            futures(Succeeded(document(sn, result=dict(retval=1))))
+        self.assertEqual(sorted(futures.orphans), ['2', '3'])
+        self.assertEqual(list(futures.order), ['2', '3'])
+
+    def test_orphans_adopted(self):
+        futures = Futures()
+        futures.MAX_ORPHANS = 2
+        for sn in ('1', '2'):
+            futures(Succeeded(document(sn, result=dict(retval=1))))
+        futures.add('1')
+        for sn in ('3', '4'):
+            futures(Succeeded(document(sn, result=dict(retval=1))))
+        self.assertEqual(sorted(futures.orphans), ['3', '4'])
+        futures.add('3')
+        futures(Succeeded(document('5', result=dict(retval=1))))
+        self.assertEqual(sorted(futures.orphans), ['4', '5'])
+        self.assertTrue(len(futures.order) <= futures.MAX_ORPHANS * 2)
+
+    def test_progress(self):
+        progress = Mock()
+        futures = Futures()
+        future = futures.add('123', progress)
+        reply = Progress(document('123', total=10, completed=1, details=''))
+        futures(reply)
+        progress.assert_called_once_with(reply)
+        self.assertFalse(future.done())
+
+    def test_progress_failed(self):
+        progress = Mock(side_effect=ValueError)
+        futures = Futures()
+        futures.add('123', progress)
+        futures(Progress(document('123', total=10, completed=1, details='')))
+
+    def test_status_ignored(self):
+        futures = Futures()
+        future = futures.add('123')
+        futures(Started(document('123')))
+        self.assertFalse(future.done())
+
+    def test_discard(self):
+        futures = Futures()
+        futures.add('123')
+        futures.discard('123')
+        self.assertEqual(len(futures), 0)
@@ -22,6 +22,7 @@ class TestCriteria(TestCase):
         c = 1234
         criteria = Criteria(c)
         self.assertEqual(criteria.criteria, 1234)
+        self.assertEqual(criteria.compiled, None)
 
     def test_match(self):
         criteria = Criteria('')
@@ -213,3 +214,84 @@ class TestBuilder(TestCase):
         b = Builder()
         q = {'xx': 1}
         self.assertRaises(InvalidOperator, b.build, q)
+
+
+class TestCompile(TestCase):
+
+    LOCATORS = [
+        {'id': 1, 'age': 10},
+        {'id': 2, 'age': 20},
+        {'age': 20},
+        {},
+        1,
+        2,
+        None,
+        'hello',
+        [1],
+    ]
+
+    QUERIES = [
+        {'match': {'id': 1}},
+        {'match': {'id': 2, 'age': 20}},
+        {'match': {}},
+        {'match': 88},
+        {'eq': 1},
+        {'neq': 1},
+        {'gt': 1},
+        {'lt': 2},
+        {'in': [1, 'hello', [1]]},
+        {'in': []},
+        {'and': ({'neq': 2}, {'match': {'age': 20}})},
+        {'and': ({'match': 1}, {'eq': 1})},
+        {'or': ({'match': 1}, {'eq': 1})},
+        {'or': ({'gt': 1}, {'match': {'id': 1}})},
+    ]
+
+    def test_compile(self):
+        b = Builder()
+        for query in self.QUERIES:
+            criteria = b.build(query)
+            fn = criteria.compile()
+            for locator in self.LOCATORS:
+                expected = type(criteria).match(criteria, locator)
+                self.assertEqual(fn(locator), expected, (query, locator))
+
+    def test_folded(self):
+        b = Builder()
+        self.assertTrue(b.build({'match': {}}).compiled is false)
+        self.assertTrue(b.build({'in': []}).compiled is false)
+        self.assertTrue(b.build({'and': ({'match': 1}, {'eq': 1})}).compiled is false)
+        self.assertTrue(b.build({'or': ({'match': 1}, {'match': {}})}).compiled is false)
+
+    def test_compiled(self):
+        b = Builder()
+        criteria = b.build({'and': ({'gt': 1}, {'lt': 3})})
+        # not replaced by the compiled predicate
+        self.assertFalse('match' in criteria.__dict__)
+        self.assertTrue(callable(criteria.compiled))
+        self.assertTrue(criteria.predicate() is criteria.compiled)
+        self.assertTrue(criteria(2))
+        self.assertFalse(criteria(3))
+
+    def test_ordered(self):
+        eq = Equal(1)
+        neq = NotEqual(1)
+        self.assertEqual(And((neq, eq)).ordered(), [eq, neq])
+        self.assertEqual(Or((eq, neq)).ordered(), [neq, eq])
+
+    def test_selectivity(self):
+        self.assertEqual(In([1, 2]).selectivity(), 0.2)
+        self.assertEqual(In(1).selectivity(), In.SELECTIVITY)
+        self.assertEqual(And((Equal(1), Greater(1))).selectivity(), 0.05)
+        self.assertEqual(Or((Equal(1), Greater(1))).selectivity(), 0.55)
+
+    def test_snapshot(self):
+        b = Builder()
+        items = list(enumerate(self.LOCATORS))
+        snapshot = Snapshot(items)
+        for query in self.QUERIES:
+            criteria = b.build(query)
+            expected = [n for n, l in items if type(criteria).match(criteria, l)]
+            self.assertEqual(snapshot.select(criteria), expected, query)
+        self.assertEqual(len(snapshot), len(self.LOCATORS))
+        self.assertEqual(snapshot.column('id')[:3], [1, 2, MISSING])
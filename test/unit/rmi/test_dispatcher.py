@@ -11,6 +11,340 @@
 
 from unittest import TestCase
 
+from mock import patch
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from gofer import NAME
+from gofer.common import Options
+from gofer.decorators import options
+from gofer.messaging import Document
+from gofer.rmi.dispatcher import Dispatcher, Return, Call, Security
+from gofer.rmi.dispatcher import lifecycle, PerRequest, Shared, Pooled
+
+
+def remote(fn):
+    options(fn)
+    return fn
+
+
+def secret(fn):
+    opt = options(fn)
+    opt.security.append(('secret', Document(secret='xyz')))
+    return fn
+
+
+class Dog(object):
+
+    def __init__(self, name='rover'):
+        self.name = name
+
+    @remote
+    def bark(self, words):
+        return '%s: %s' % (self.name, words)
+
+    @staticmethod
+    @remote
+    def wag(n):
+        return n * 2
+
+    @secret
+    def fetch(self):
+        return 'fetched'
+
+    def sleep(self):
+        pass
+
+
+class Cat(object):
+
+    @remote
+    def meow(self):
+        return 'meow'
+
+
+class Counted(object):
+
+    constructed = 0
+
+    def __init__(self, name=''):
+        Counted.constructed += 1
+        self.name = name
+
+    @remote
+    def echo(self):
+        return id(self)
+
+    @remote
+    def fail(self):
+        raise ValueError(id(self))
+
+    @secret
+    def secured(self):
+        return id(self)
+
+
+def lifecycled(name, size=None, idle=None):
+    policy = Options(name=name, size=size, idle=idle)
+    return type('Counted', (Counted,), {NAME: Options(lifecycle=policy)})
+
+
+def document(classname, method, args=(), cntr=None, secret=None):
+    request = Document(
+        classname=classname,
+        method=method,
+        args=list(args),
+        kws={},
+        cntr=cntr)
+    return Document(routing=['a', 'b'], secret=secret, request=request)
+
+
+class TestCall(TestCase):
+
+    def test_parse(self):
+        request = dict(classname='Dog', method='bark', args=['hello'], kws={'n': 1})
+        call = Call.parse(request)
+        self.assertEqual(call.classname, 'Dog')
+        self.assertEqual(call.method, 'bark')
+        self.assertEqual(call.args, ['hello'])
+        self.assertEqual(call.kws, {'n': 1})
+        self.assertEqual(call.cntr, None)
+        self.assertTrue(Call.parse(call) is call)
+        self.assertEqual(Call.parse(Document(request)), call)
+
+    def test_parse_malformed(self):
+        call = Call.parse(None)
+        self.assertEqual(call.classname, None)
+        self.assertEqual(call.args, [])
+        self.assertEqual(call.kws, {})
+
+    def test_encoded(self):
+        call = Call('Dog', 'bark', ['hello'], {}, None)
+        document = Document(sn='1', request=call)
+        loaded = Document()
+        loaded.load(document.dump())
+        self.assertEqual(loaded.request, call.dict())
+        self.assertEqual(Dispatcher.classname(document), 'Dog')
+        self.assertEqual(Dispatcher.classname(loaded), 'Dog')
+
+
+class TestReturn(TestCase):
+
+    def test_succeed(self):
+        result = Return.succeed({'a': [1, 2]})
+        self.assertEqual(result.retval, {'a': [1, 2]})
+        self.assertEqual(result.__encoded__, result.dump())
+        self.assertFalse('__encoded__' in result.__dict__)
+        reply = Document(sn='1', result=result)
+        loaded = Document()
+        loaded.load(reply.dump())
+        self.assertEqual(loaded.result, {'retval': {'a': [1, 2]}})
+
+    def test_not_serializable(self):
+        self.assertRaises(TypeError, Return.succeed, object())
+
+    def test_exception(self):
+        try:
+            raise ValueError('failed')
+        except ValueError:
+            result = Return.exception()
+        self.assertEqual(result.xclass, 'ValueError')
+        self.assertEqual(result.__encoded__, result.dump())
+
+
+class TestDispatcher(TestCase):
+
+    def dispatch(self, dispatcher, *args, **kwargs):
+        return Return(dispatcher.dispatch(document(*args, **kwargs)))
+
+    def test_table(self):
+        cat = Cat()
+        dispatcher = Dispatcher([Dog])
+        dispatcher['Cat'] = cat
+        targets = sorted(dispatcher.table.targets.keys())
+        self.assertEqual(
+            targets,
+            [('Cat', 'meow'), ('Dog', 'bark'), ('Dog', 'fetch'), ('Dog', 'wag')])
+        self.assertTrue(dispatcher.table.find('Dog', 'bark').constructed)
+        self.assertFalse(dispatcher.table.find('Cat', 'meow').constructed)
+        self.assertEqual(dispatcher.table.find('Dog', 'sleep'), None)
+
+    def test_dispatch(self):
+        dispatcher = Dispatcher([Dog])
+        parsed = document('Dog', 'bark', ['hello'])
+        parsed.request = Call.parse(parsed.request)
+        result = Return(dispatcher.dispatch(parsed))
+        self.assertEqual(result.retval, 'rover: hello')
+        result = self.dispatch(dispatcher, 'Dog', 'bark', ['hello'])
+        self.assertEqual(result.retval, 'rover: hello')
+        result = self.dispatch(dispatcher, 'Dog', 'bark', ['hello'], cntr=(['max'], {}))
+        self.assertEqual(result.retval, 'max: hello')
+        result = self.dispatch(dispatcher, 'Dog', 'wag', [2])
+        self.assertEqual(result.retval, 4)
+
+    def test_dispatch_object(self):
+        cat = Cat()
+        dispatcher = Dispatcher()
+        dispatcher['Cat'] = cat
+        self.assertEqual(len(dispatcher.table), 1)
+        result = self.dispatch(dispatcher, 'Cat', 'meow')
+        self.assertEqual(result.retval, 'meow')
+
+    def test_security(self):
+        dispatcher = Dispatcher([Dog])
+        result = self.dispatch(dispatcher, 'Dog', 'fetch')
+        self.assertEqual(result.xclass, 'SecretRequired')
+        result = self.dispatch(dispatcher, 'Dog', 'fetch', secret='xyz')
+        self.assertEqual(result.retval, 'fetched')
+
+    def test_security_built(self):
+        dispatcher = Dispatcher([Dog])
+        target = dispatcher.table.find('Dog', 'fetch')
+        self.assertEqual(target.name, 'Dog.fetch')
+        self.assertTrue(isinstance(target.security, Security))
+        self.assertEqual(dispatcher.table.find('Dog', 'bark').security, None)
+        with patch('gofer.rmi.dispatcher.Security') as security:
+            result = self.dispatch(dispatcher, 'Dog', 'fetch', secret='xyz')
+            self.assertEqual(result.retval, 'fetched')
+            result = self.dispatch(dispatcher, 'Dog', 'fetch', secret='abc')
+            self.assertEqual(result.xclass, 'SecretNotMatched')
+            self.assertFalse(security.called)
+        self.assertTrue(result.xargs[0].startswith('Dog.fetch()'))
+
+    def test_not_found(self):
+        dispatcher = Dispatcher([Dog])
+        result = self.dispatch(dispatcher, 'Dog', 'sleep')
+        self.assertEqual(result.xclass, 'NotPermitted')
+        result = self.dispatch(dispatcher, 'Dog', 'run')
+        self.assertEqual(result.xclass, 'MethodNotFound')
+        result = self.dispatch(dispatcher, 'Bird', 'fly')
+        self.assertEqual(result.xclass, 'ClassNotFound')
+
+
+class TestLifecycle(TestCase):
+
+    def setUp(self):
+        Counted.constructed = 0
+
+    def dispatch(self, dispatcher, cntr=None):
+        return Return(dispatcher.dispatch(document('Counted', 'echo', cntr=cntr)))
+
+    def test_find(self):
+        self.assertTrue(isinstance(lifecycle(Dog), PerRequest))
+        self.assertTrue(isinstance(lifecycle(lifecycled('request')), PerRequest))
+        policy = lifecycle(lifecycled('singleton', size=2, idle=20))
+        self.assertTrue(isinstance(policy, Shared))
+        self.assertEqual(policy.size, 2)
+        self.assertEqual(policy.idle, 20)
+        policy = lifecycle(lifecycled('pooled', size=3, idle=10))
+        self.assertTrue(isinstance(policy, Pooled))
+        self.assertEqual(policy.size, 3)
+        self.assertEqual(policy.idle, 10)
+
+    def test_request(self):
+        dispatcher = Dispatcher([lifecycled('request')])
+        self.dispatch(dispatcher)
+        self.dispatch(dispatcher)
+        self.assertEqual(Counted.constructed, 2)
+
+    def test_singleton(self):
+        dispatcher = Dispatcher([lifecycled('singleton')])
+        first = self.dispatch(dispatcher)
+        second = self.dispatch(dispatcher)
+        self.assertEqual(first.retval, second.retval)
+        self.dispatch(dispatcher, cntr=(['max'], {}))
+        self.assertEqual(Counted.constructed, 2)
+
+    def test_singleton_bounded(self):
+        policy = Shared(Counted, size=2)
+        first = policy.acquire((['a'], {}))
+        policy.acquire((['b'], {}))
+        self.assertTrue(policy.acquire((['a'], {})) is first)
+        policy.acquire((['c'], {}))
+        self.assertEqual(len(policy.instances), 2)
+        self.assertTrue(policy.acquire((['a'], {})) is first)
+        self.assertEqual(Counted.constructed, 3)
+        policy.acquire((['b'], {}))
+        self.assertEqual(Counted.constructed, 4)
+
+    @patch('gofer.rmi.dispatcher.time')
+    def test_singleton_not_evicted(self, _time):
+        _time.return_value = 100
+        policy = Shared(Counted)
+        cntr = ([], {})
+        inst = policy.acquire(cntr)
+        policy.release(cntr, inst)
+        _time.return_value = 100 + 3600 * 24
+        self.assertTrue(policy.acquire(cntr) is inst)
+
+    @patch('gofer.rmi.dispatcher.time')
+    def test_singleton_evict(self, _time):
+        _time.return_value = 100
+        policy = Shared(Counted, idle=10)
+        cntr = ([], {})
+        inst = policy.acquire(cntr)
+        policy.release(cntr, inst)
+        _time.return_value = 111
+        self.assertFalse(policy.acquire(cntr) is inst)
+        self.assertEqual(len(policy.instances), 1)
+
+    def test_pooled(self):
+        dispatcher = Dispatcher([lifecycled('pooled', size=1)])
+        first = self.dispatch(dispatcher)
+        second = self.dispatch(dispatcher)
+        self.assertEqual(first.retval, second.retval)
+        self.dispatch(dispatcher, cntr=(['max'], {}))
+        self.assertEqual(Counted.constructed, 2)
+
+    def test_pooled_exclusive(self):
+        policy = Pooled(Counted, size=1)
+        cntr = ([], {})
+        first = policy.acquire(cntr)
+        second = policy.acquire(cntr)
+        self.assertFalse(first is second)
+        policy.release(cntr, first)
+        policy.release(cntr, second)
+        self.assertEqual(len(policy.pool[policy.key(cntr)]), 1)
+        self.assertTrue(policy.acquire(cntr) is first)
+
+    @patch('gofer.rmi.dispatcher.time')
+    def test_pooled_evict(self, _time):
+        _time.return_value = 100
+        policy = Pooled(Counted, idle=10)
+        cntr = ([], {})
+        inst = policy.acquire(cntr)
+        policy.release(cntr, inst)
+        _time.return_value = 111
+        self.assertFalse(policy.acquire(cntr) is inst)
+        self.assertEqual(policy.pool, {})
+
+    def test_pooled_failed(self):
+        dispatcher = Dispatcher([lifecycled('pooled', size=1)])
+        failed = Return(dispatcher.dispatch(document('Counted', 'fail')))
+        self.assertEqual(failed.xclass, 'ValueError')
+        self.assertEqual(Counted.constructed, 1)
+        self.dispatch(dispatcher)
+        self.assertEqual(Counted.constructed, 2)
+        policy = dispatcher.table.find('Counted', 'echo').lifecycle
+        self.assertEqual(len(policy.pool[policy.key(([], {}))]), 1)
+
+    def test_pooled_not_permitted(self):
+        dispatcher = Dispatcher([lifecycled('pooled', size=1)])
+        denied = Return(dispatcher.dispatch(document('Counted', 'secured')))
+        self.assertEqual(denied.xclass, 'SecretRequired')
+        self.dispatch(dispatcher)
+        self.assertEqual(Counted.constructed, 1)
+
+    def test_build_kept(self):
+        cls = lifecycled('singleton')
+        dispatcher = Dispatcher([cls])
+        first = self.dispatch(dispatcher)
+        policy = dispatcher.table.find('Counted', 'echo').lifecycle
+        dispatcher += [Cat]
+        dispatcher['Dog'] = Dog
+        self.assertTrue(dispatcher.table.find('Counted', 'echo').lifecycle is policy)
+        self.assertEqual(self.dispatch(dispatcher).retval, first.retval)
+        self.assertEqual(Counted.constructed, 1)
+        # changed
+        dispatcher['Counted'] = lifecycled('singleton')
+        self.assertFalse(dispatcher.table.find('Counted', 'echo').lifecycle is policy)
+        self.dispatch(dispatcher)
+        self.assertEqual(Counted.constructed, 2)
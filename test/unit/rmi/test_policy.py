@@ -11,7 +11,13 @@
 
 
 from unittest import TestCase
-from gofer.rmi.policy import Timeout
+
+from mock import Mock, patch
+
+from gofer.common import Options
+from gofer.messaging import Document, ModelError
+from gofer.rmi.dispatcher import Return
+from gofer.rmi.policy import Timeout, RequestTimeout, Policy, Trigger, ReplyPool, POOLED
 
 
 class TimeoutTests(TestCase):
@@ -91,3 +97,215 @@ class TimeoutTests(TestCase):
         self.assertRaises(ValueError, Timeout, 'x')
         self.assertRaises(ValueError, Timeout, '10x')
         self.assertRaises(ValueError, Timeout, '')
+
+
+class TestPolicy(TestCase):
+
+    def test_read_reply_status(self):
+        status = Mock()
+        progress = Mock()
+        sn = '123'
+        reader = Mock()
+        reader.search.side_effect = [
+            Document(sn=sn, data=1, status='accepted'),
+            Document(sn=sn, data=1, status='started'),
+            Document(sn=sn, data=1, status='progress', total=1, completed=0, details=None),
+            Document(sn=sn, data=1, result=Return.succeed(18)),
+        ]
+        policy = Policy('', '', Options(status=status, progress=progress))
+
+        # test
+        document = policy.read_reply(sn, reader)
+
+        # validation
+        self.assertEqual(document.result.retval, 18)
+        self.assertEqual(
+            status.call_args_list,
+            [
+                ((dict(sn=sn, data=1, status='accepted'),), {}),
+                ((dict(sn=sn, data=1, status='started'),), {}),
+            ])
+        self.assertEqual(progress.call_count, 1)
+
+    def test_on_status_failed(self):
+        status = Mock(side_effect=ValueError)
+        policy = Policy('', '', Options(status=status))
+        policy.on_status(Document(sn='123', status='accepted'))
+        self.assertTrue(status.called)
+
+
+class TestReplyPool(TestCase):
+
+    def test_init(self):
+        pool = ReplyPool()
+        self.assertEqual(pool.idle, {})
+        self.assertEqual(len(pool), 0)
+
+    def test_get_empty(self):
+        pool = ReplyPool()
+        self.assertEqual(pool.get('url', 'ex'), None)
+
+    def test_put_get(self):
+        queue = Mock()
+        pool = ReplyPool()
+        pool.put('url', 'ex', queue)
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.get('url', None), None)
+        self.assertEqual(pool.get('url', 'ex'), queue)
+        self.assertEqual(len(pool), 0)
+
+    @patch('gofer.rmi.policy.time')
+    def test_get_expired(self, _time):
+        queue = Mock()
+        pool = ReplyPool()
+        _time.return_value = 10
+        pool.put('url', None, queue)
+        _time.return_value = 10 + ReplyPool.EXPIRATION / 2
+        self.assertEqual(pool.get('url'), None)
+        self.assertEqual(len(pool), 0)
+
+    def test_put_capacity(self):
+        pool = ReplyPool()
+        for n in range(ReplyPool.CAPACITY + 2):
+            pool.put('url', None, Mock())
+        self.assertEqual(len(pool), ReplyPool.CAPACITY)
+
+    def test_clear(self):
+        pool = ReplyPool()
+        pool.put('url', None, Mock())
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+
+class TestTrigger(TestCase):
+
+    def setUp(self):
+        Trigger.pool.clear()
+
+    def tearDown(self):
+        Trigger.pool.clear()
+
+    @staticmethod
+    def policy(**options):
+        return Policy('url', 'address', Options(wait=10, **options))
+
+    @patch('gofer.rmi.policy.Queue')
+    def test_temporary(self, _queue):
+        queue = _queue.return_value
+        trigger = Trigger(self.policy(), 'request')
+        trigger._send = Mock()
+
+        # test
+        retval = trigger()
+
+        # validation
+        queue.declare.assert_called_once_with('url')
+        trigger._send.assert_called_once_with(reply=queue.name, queue=queue)
+        queue.purge.assert_called_once_with('url')
+        queue.delete.assert_called_once_with('url')
+        self.assertEqual(retval, trigger._send.return_value)
+        self.assertEqual(len(Trigger.pool), 0)
+
+    @patch('gofer.rmi.policy.Exchange')
+    @patch('gofer.rmi.policy.Queue')
+    def test_pooled(self, _queue, _exchange):
+        queue = _queue.return_value
+        queue.name = 'test'
+        policy = self.policy(reply_queue=POOLED, exchange='amq.direct')
+
+        def send(trigger):
+            def fn(**unused):
+                trigger._replied = True
+                return 'done'
+            trigger._send = Mock(side_effect=fn)
+            return trigger
+
+        # test
+        trigger = send(Trigger(policy, 'request'))
+        trigger()
+        trigger = send(Trigger(policy, 'request'))
+        retval = trigger()
+
+        # validation
+        _queue.assert_called_once_with()
+        self.assertFalse(queue.durable)
+        self.assertTrue(queue.auto_delete)
+        self.assertEqual(queue.expiration, ReplyPool.EXPIRATION)
+        self.assertTrue(queue.expire_unused)
+        queue.declare.assert_called_once_with('url')
+        _exchange.assert_called_once_with('amq.direct')
+        _exchange.return_value.bind.assert_called_once_with(queue, 'url')
+        trigger._send.assert_called_once_with(reply='amq.direct/test', queue=queue)
+        self.assertFalse(queue.purge.called)
+        self.assertFalse(queue.delete.called)
+        self.assertEqual(retval, 'done')
+        self.assertEqual(len(Trigger.pool), 1)
+
+    @patch('gofer.rmi.policy.Reader')
+    @patch('gofer.rmi.policy.Producer')
+    @patch('gofer.rmi.policy.Queue')
+    def test_pooled_reused(self, _queue, _producer, _reader):
+        queue = _queue.return_value
+        queue.name = 'test'
+        policy = self.policy(reply_queue=POOLED)
+        replies = []
+
+        def search(sn, timeout):
+            document = Document(sn=sn, result=Return.succeed(len(replies)))
+            replies.append(document)
+            return document
+
+        _reader.return_value.search.side_effect = search
+
+        # test
+        first = Trigger(policy, 'request')()
+        second = Trigger(policy, 'request')()
+
+        # validation
+        _queue.assert_called_once_with()
+        self.assertTrue(queue.auto_delete)
+        self.assertEqual(queue.expiration, ReplyPool.EXPIRATION)
+        self.assertTrue(queue.expire_unused)
+        queue.declare.assert_called_once_with('url')
+        self.assertEqual((first, second), (0, 1))
+        calls = _producer.return_value.send.call_args_list
+        self.assertEqual([c[1]['replyto'] for c in calls], ['test', 'test'])
+        self.assertEqual(_reader.call_args_list, [((queue, 'url'),), ((queue, 'url'),)])
+        self.assertEqual(_reader.return_value.close.call_count, 2)
+        self.assertEqual(Trigger.pool.get('url'), queue)
+
+    @patch('gofer.rmi.policy.Reader')
+    @patch('gofer.rmi.policy.Producer')
+    @patch('gofer.rmi.policy.Queue')
+    def test_pooled_remote_exception(self, _queue, _producer, _reader):
+        try:
+            raise ValueError('failed')
+        except ValueError:
+            result = Return.exception()
+        _reader.return_value.search.return_value = Document(result=result)
+        trigger = Trigger(self.policy(reply_queue=POOLED), 'request')
+        self.assertRaises(ValueError, trigger)
+        self.assertEqual(Trigger.pool.get('url'), _queue.return_value)
+
+    @patch('gofer.rmi.policy.Reader')
+    @patch('gofer.rmi.policy.Producer')
+    @patch('gofer.rmi.policy.Queue')
+    def test_pooled_timeout(self, _queue, _producer, _reader):
+        _reader.return_value.search.return_value = None
+        trigger = Trigger(self.policy(reply_queue=POOLED), 'request')
+        self.assertRaises(RequestTimeout, trigger)
+        self.assertEqual(len(Trigger.pool), 0)
+
+    @patch('gofer.rmi.policy.Queue')
+    def test_pooled_error(self, _queue):
+        trigger = Trigger(self.policy(reply_queue=POOLED), 'request')
+        trigger._send = Mock(side_effect=ValueError)
+        self.assertRaises(ValueError, trigger)
+        self.assertEqual(len(Trigger.pool), 0)
+
+    @patch('gofer.rmi.policy.Queue')
+    def test_pooled_failed(self, _queue):
+        trigger = Trigger(self.policy(reply_queue=POOLED), 'request')
+        trigger._send = Mock(side_effect=ModelError)
+        self.assertRaises(ModelError, trigger)
+        self.assertEqual(len(Trigger.pool), 0)
@@ -9,8 +9,109 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+
 from unittest import TestCase
+from tempfile import mkdtemp
+from shutil import rmtree
+
+from mock import patch, Mock
+
+from gofer.messaging import Document
+from gofer.messaging.codec import compressed
+from gofer.rmi.store import Pending
+
+
+class TestJournal(TestCase):
+
+    def setUp(self):
+        self.tmp = mkdtemp()
+        self.path = os.path.join(self.tmp, 'request.json')
+
+    def tearDown(self):
+        rmtree(self.tmp)
+
+    def test_small(self):
+        request = Document(sn='1', data=None)
+        Pending._write(request, self.path)
+        fp = open(self.path)
+        try:
+            self.assertFalse(compressed(fp.read()))
+        finally:
+            fp.close()
+        read = Pending._read(self.path)
+        self.assertEqual(read.__dict__, request.__dict__)
+
+    def test_large(self):
+        request = Document(sn='1', args=['A' * Pending.COMPRESSION])
+        Pending._write(request, self.path)
+        fp = open(self.path)
+        try:
+            body = fp.read()
+            self.assertTrue(compressed(body))
+            self.assertTrue(len(body) < Pending.COMPRESSION)
+        finally:
+            fp.close()
+        read = Pending._read(self.path)
+        self.assertEqual(read.__dict__, request.__dict__)
+
+    def test_corrupt(self):
+        fp = open(self.path, 'w')
+        try:
+            fp.write('x\x9cgarbage')
+        finally:
+            fp.close()
+        read = Pending._read(self.path)
+        self.assertEqual(read, None)
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestRestore(TestCase):
+
+    def setUp(self):
+        self.tmp = mkdtemp()
+        self.saved = Pending.PENDING
+        Pending.PENDING = self.tmp
+        self.path = os.path.join(self.tmp, 'test')
+        os.makedirs(self.path)
+
+    def tearDown(self):
+        Pending.PENDING = self.saved
+        rmtree(self.tmp)
+
+    @patch('gofer.rmi.store.Tracker')
+    def test_restore_cancelled(self, tracker):
+        tracker.return_value.cancelled.side_effect = lambda sn: sn == '1'
+        for sn in ('1', '2'):
+            request = Document(sn=sn, data=None, request={'classname': 'Dog'})
+            Pending._write(request, os.path.join(self.path, sn))
+        cancelled = []
+        pending = Pending('test', cancelled=cancelled.append)
+        pending.thread.join()
+        self.assertTrue(pending.is_open)
+        # restored and dropped by the scheduler
+        self.assertEqual(pending.queue.get(block=False).sn, '1')
+        self.assertEqual(pending.queue.get(block=False).sn, '2')
+        self.assertTrue(pending.queue.empty())
+        self.assertEqual(sorted(os.listdir(self.path)), ['1', '2'])
+        self.assertEqual(sorted(pending.journal), ['1', '2'])
+        # only the request not cancelled is watched
+        self.assertEqual(tracker.return_value.watch.call_count, 1)
+        self.assertEqual(tracker.return_value.watch.call_args[0][0], '2')
+        self.assertFalse(tracker.return_value.remove.called)
+        self.assertEqual(cancelled, [])
+
 
+class TestRemove(TestCase):
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_remove(self):
+        pending = Pending('test')
+        for sn in ('1', '2', '3'):
+            pending.queue.put(Document(sn=sn))
+        removed = pending.remove('2')
+        self.assertEqual(removed.sn, '2')
+        self.assertEqual(pending.remove('2'), None)
+        self.assertEqual(pending.queue.get(block=False).sn, '1')
+        self.assertEqual(pending.queue.get(block=False).sn, '3')
+        self.assertTrue(pending.queue.empty())
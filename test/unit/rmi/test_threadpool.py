@@ -11,6 +11,32 @@
 
 from unittest import TestCase
 
+from mock import Mock
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from gofer.threadpool import ThreadPool, Worker, Call
+
+
+class TestWorker(TestCase):
+
+    def test_purge(self):
+        fn = [Mock(), Mock()]
+        worker = Worker(0)
+        worker.put(Call(1, fn[0]))
+        worker.put(Call(2, fn[1]))
+        removed = worker.purge(lambda f: f is fn[1])
+        self.assertEqual([c.id for c in removed], [2])
+        self.assertEqual([c.id for c in worker.drain()], [1])
+
+
+class TestThreadPool(TestCase):
+
+    def test_purge(self):
+        fn = Mock()
+        pool = ThreadPool(0)
+        pool.threads = [Mock(), Mock()]
+        pool.threads[0].purge.return_value = [1]
+        pool.threads[1].purge.return_value = [2, 3]
+        removed = pool.purge(fn)
+        self.assertEqual(removed, [1, 2, 3])
+        for t in pool.threads:
+            t.purge.assert_called_once_with(fn)
\ No newline at end of file
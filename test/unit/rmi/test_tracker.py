@@ -9,8 +9,264 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+import shutil
+
+from time import time
+from tempfile import mkdtemp
 from unittest import TestCase
 
+from mock import patch, Mock
+
+from gofer.common import Singleton
+from gofer.rmi.criteria import Builder
+from gofer.rmi.tracker import Tracker, Index, Canceled
+
+
+LOCATORS = [
+    {'task_id': 1, 'group': 'a'},
+    {'task_id': 2, 'group': 'a'},
+    {'task_id': 3, 'group': 'b'},
+    {'task_id': 4},
+    {'group': 'b', 'tags': ['x']},
+    {},
+    None,
+    10,
+    20,
+    2.5,
+    'hello',
+    ['a', 'list'],
+]
+
+
+QUERIES = [
+    {'match': {'task_id': 2}},
+    {'match': {'group': 'a'}},
+    {'match': {'group': 'b', 'task_id': 3}},
+    {'match': {'tags': ['x']}},
+    {'match': {}},
+    {'eq': 10},
+    {'eq': 'hello'},
+    {'eq': ['a', 'list']},
+    {'neq': 10},
+    {'in': [10, 'hello']},
+    {'in': ('hello', 20)},
+    {'gt': 10},
+    {'lt': 10},
+    {'gt': 'a'},
+    {'and': ({'gt': 1}, {'lt': 15})},
+    {'and': ({'match': {'group': 'a'}}, {'neq': 1})},
+    {'or': ({'eq': 10}, {'match': {'task_id': 3}})},
+    {'or': ({'neq': 10}, {'eq': 20})},
+]
+
+
+def brute(locators, criteria):
+    return sorted([sn for sn, locator in locators.items() if criteria.match(locator)])
+
+
+class TestIndex(TestCase):
+
+    def setUp(self):
+        self.locators = dict([(str(n), l) for n, l in enumerate(LOCATORS)])
+        self.index = Index()
+        for sn, locator in self.locators.items():
+            self.index.add(sn, locator)
+
+    def test_select(self):
+        for query in QUERIES:
+            criteria = Builder().build(query)
+            selected = self.index.select(criteria)
+            if selected is None:
+                selected = self.locators.keys()
+            matched = sorted([sn for sn in selected if criteria.match(self.locators[sn])])
+            self.assertEqual(matched, brute(self.locators, criteria), query)
+
+    def test_selective(self):
+        criteria = Builder().build({'match': {'task_id': 2}})
+        self.assertEqual(self.index.select(criteria), set(['1', '4', '5']))
+        criteria = Builder().build({'eq': 10})
+        self.assertEqual(self.index.select(criteria), set(['7', '11']))
+        criteria = Builder().build({'gt': 10})
+        selected = self.index.select(criteria)
+        self.assertTrue('8' in selected)
+        self.assertFalse('7' in selected)
+        self.assertFalse('9' in selected)
+
+    def test_not_indexed(self):
+        self.assertEqual(self.index.select(Builder().build({'neq': 10})), None)
+        self.assertEqual(self.index.select(Builder().build({'in': 'abc'})), None)
+
+    def test_remove(self):
+        for sn, locator in self.locators.items():
+            self.index.remove(sn, locator)
+        self.assertEqual(self.index.values, {})
+        self.assertEqual(self.index.numbers, [])
+        self.assertEqual(self.index.numbered, [])
+        self.assertEqual(self.index.other, set())
+        self.assertEqual(self.index.dicts, set())
+        self.assertEqual(self.index.keys, {})
+        self.assertEqual(self.index.items, {})
+
+
+class TestTracker(TestCase):
+
+    def setUp(self):
+        for key in [k for k in Singleton._inst if k[0] == id(Tracker)]:
+            del Singleton._inst[key]
+
+    def tearDown(self):
+        self.setUp()
+
+    @patch('gofer.rmi.tracker.Canceled')
+    def test_find(self, canceled):
+        tracker = Tracker()
+        for n, locator in enumerate(LOCATORS):
+            tracker.add(str(n), locator)
+        for query in QUERIES:
+            criteria = Builder().build(query)
+            expected = [str(n) for n, l in enumerate(LOCATORS) if criteria.match(l)]
+            self.assertEqual(sorted(tracker.find(criteria)), sorted(expected), query)
+
+    @patch('gofer.rmi.tracker.Canceled')
+    def test_replaced(self, canceled):
+        tracker = Tracker()
+        tracker.add('1', {'task_id': 1})
+        tracker.add('1', {'task_id': 2})
+        criteria = Builder().build({'match': {'task_id': 1}})
+        self.assertEqual(tracker.find(criteria), [])
+        criteria = Builder().build({'match': {'task_id': 2}})
+        self.assertEqual(tracker.find(criteria), ['1'])
+
+    @patch('gofer.rmi.tracker.Canceled')
+    def test_remove(self, canceled):
+        tracker = Tracker()
+        tracker.add('1', {'task_id': 1})
+        tracker.remove('1')
+        tracker.remove('2')
+        criteria = Builder().build({'match': {'task_id': 1}})
+        self.assertEqual(tracker.find(criteria), [])
+        canceled.return_value.delete.assert_any_call('1')
+        canceled.return_value.delete.assert_any_call('2')
+
+
+    @patch('gofer.rmi.tracker.Canceled')
+    def test_watch(self, canceled):
+        canceled.return_value.__contains__.return_value = False
+        tracker = Tracker()
+        tracker.add('1', None)
+        called = []
+        fn = lambda: called.append(1)
+        tracker.watch('1', fn)
+        tracker.watch('1', Mock(side_effect=ValueError))
+        self.assertEqual(tracker.cancel('1'), '1')
+        self.assertEqual(called, [1])
+        canceled.return_value.__contains__.return_value = True
+        self.assertEqual(tracker.cancel('1'), None)
+        self.assertEqual(called, [1])
+        tracker.watch('1', fn)
+        self.assertEqual(called, [1, 1])
+
+    @patch('gofer.rmi.tracker.Canceled')
+    def test_unwatch(self, canceled):
+        canceled.return_value.__contains__.return_value = False
+        tracker = Tracker()
+        tracker.add('1', None)
+        fn = Mock()
+        tracker.watch('1', fn)
+        tracker.unwatch('1', fn)
+        tracker.unwatch('2', fn)
+        tracker.cancel('1')
+        self.assertFalse(fn.called)
+
+    @patch('gofer.rmi.tracker.Canceled')
+    def test_start(self, canceled):
+        canceled.return_value.__contains__.return_value = False
+        tracker = Tracker()
+        tracker.add('1', None)
+        self.assertFalse(tracker.started('1'))
+        self.assertTrue(tracker.start('1'))
+        self.assertTrue(tracker.started('1'))
+        tracker.remove('1')
+        self.assertFalse(tracker.started('1'))
+        canceled.return_value.__contains__.return_value = True
+        self.assertFalse(tracker.start('1'))
+        self.assertFalse(tracker.started('1'))
+
+
+class TestCanceled(TestCase):
+
+    def setUp(self):
+        self.path = mkdtemp()
+        self.patcher = patch('gofer.rmi.tracker.Canceled.PATH', self.path)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.path)
+
+    def records(self):
+        fp = open(os.path.join(self.path, Canceled.LOG))
+        try:
+            return [line.split()[:2] for line in fp]
+        finally:
+            fp.close()
+
+    def test_add_delete(self):
+        canceled = Canceled()
+        canceled.add('1')
+        canceled.add('2')
+        canceled.delete('1')
+        canceled.delete('3')
+        canceled.close()
+        self.assertFalse('1' in canceled)
+        self.assertTrue('2' in canceled)
+        self.assertEqual(self.records(), [['+', '1'], ['+', '2'], ['-', '1']])
+        self.assertEqual(canceled.obsolete, 2)
+
+    def test_load(self):
+        canceled = Canceled()
+        canceled.add('1')
+        canceled.add('2')
+        canceled.delete('1')
+        canceled.close()
+        # legacy (file per sn)
+        fp = open(os.path.join(self.path, '3'), 'w')
+        fp.write('3')
+        fp.close()
+        canceled = Canceled()
+        canceled.close()
+        self.assertEqual(sorted(canceled.collection), ['2', '3'])
+        self.assertEqual(sorted(self.records()), [['+', '2'], ['+', '3']])
+        self.assertEqual(sorted(os.listdir(self.path)), [Canceled.LOG])
+
+    def test_load_malformed(self):
+        fp = open(os.path.join(self.path, Canceled.LOG), 'w')
+        fp.write('+ 1 %f\n+ 2\n- \n+ 3 xx\n' % (time() + 10))
+        fp.close()
+        canceled = Canceled()
+        canceled.close()
+        self.assertEqual(canceled.collection.keys(), ['1'])
+
+    @patch('gofer.rmi.tracker.time')
+    def test_expired(self, _time):
+        _time.return_value = 100
+        canceled = Canceled()
+        canceled.add('1')
+        self.assertTrue('1' in canceled)
+        _time.return_value = 100 + Canceled.TTL
+        self.assertFalse('1' in canceled)
+        canceled.compact()
+        self.assertEqual(canceled.collection, {})
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+    @patch('gofer.rmi.tracker.Canceled.COMPACT', 4)
+    def test_compact(self):
+        canceled = Canceled()
+        canceled.add('1')
+        canceled.add('2')
+        canceled.delete('1')
+        self.assertEqual(canceled.obsolete, 2)
+        canceled.delete('2')
+        canceled.close()
+        self.assertEqual(canceled.obsolete, 0)
+        self.assertEqual(self.records(), [])
@@ -22,7 +22,7 @@ from tempfile import mktemp
 
 from gofer.common import Singleton, ThreadSingleton, Options
 from gofer.common import synchronized, conditional, released
-from gofer.common import mkdir, rmdir, unlink, nvl, valid_path, utf8
+from gofer.common import mkdir, rmdir, unlink, nvl, purge, valid_path, utf8
 from gofer.common import List
 
 
@@ -185,6 +185,22 @@ class TestNVL(TestCase):
         self.assertEqual(nvl(1, 2), 1)
 
 
+class TestPurge(TestCase):
+
+    def test_purge(self):
+        queue = Queue(3)
+        for n in range(3):
+            queue.put(n)
+        self.assertTrue(queue.full())
+        removed = purge(queue, lambda n: n % 2 == 0)
+        self.assertEqual(removed, [0, 2])
+        self.assertEqual(purge(queue, lambda n: n == 5), [])
+        queue.put(3, block=False)
+        self.assertEqual(queue.get(block=False), 1)
+        self.assertEqual(queue.get(block=False), 3)
+        self.assertTrue(queue.empty())
+
+
 class TestSingleton(TestCase):
 
     def test_call(self):
@@ -56,6 +56,31 @@ class TestRemote(TestCase):
         self.assertEqual(str(opt), str({'security': [('secret', {'secret': 'fedex'})]}))
         _remote.add.assert_called_once_with(fn)
 
+    @patch('gofer.decorators.Remote')
+    def test_class(self, _remote):
+        class Dog(object):
+            pass
+        remote(Dog)
+        opt = getattr(Dog, NAME)
+        self.assertEqual(opt.lifecycle.name, 'request')
+        self.assertFalse(_remote.add.called)
+
+    @patch('gofer.decorators.Remote')
+    def test_lifecycle(self, _remote):
+        class Dog(object):
+            pass
+        remote(lifecycle='pooled', size=3, idle=10)(Dog)
+        opt = getattr(Dog, NAME)
+        self.assertEqual(opt.lifecycle.name, 'pooled')
+        self.assertEqual(opt.lifecycle.size, 3)
+        self.assertEqual(opt.lifecycle.idle, 10)
+        self.assertFalse(_remote.add.called)
+
+    def test_lifecycle_invalid(self):
+        class Dog(object):
+            pass
+        self.assertRaises(ValueError, remote(lifecycle='xx'), Dog)
+
 
 class TestPam(TestCase):
 
@@ -14,7 +14,7 @@ from datetime import datetime
 
 from mock import patch
 
-from gofer.metrics import Timer, timestamp
+from gofer.metrics import Timer, Latency, timestamp
 
 
 class TestUtils(TestCase):
@@ -94,4 +94,30 @@ class TestTimer(TestCase):
         # minutes
         t.started = 10.0
         t.stopped = 100.0
-        self.assertEqual(str(t), '1.500 (minutes)')
\ No newline at end of file
+        self.assertEqual(str(t), '1.500 (minutes)')
+
+class TestLatency(TestCase):
+
+    def test_init(self):
+        latency = Latency()
+        self.assertEqual(latency.count, 0)
+        self.assertEqual(latency.total, 0.0)
+        self.assertEqual(latency.max, 0.0)
+        self.assertEqual(latency.last, 0.0)
+        self.assertEqual(latency.mean(), 0.0)
+
+    def test_add(self):
+        latency = Latency()
+        latency.add(0.2)
+        latency.add(0.4)
+        latency.add(0.3)
+        self.assertEqual(latency.count, 3)
+        self.assertAlmostEqual(latency.total, 0.9)
+        self.assertEqual(latency.max, 0.4)
+        self.assertEqual(latency.last, 0.3)
+        self.assertAlmostEqual(latency.mean(), 0.3)
+
+    def test_str(self):
+        latency = Latency()
+        latency.add(0.5)
+        self.assertEqual(str(latency), 'count: 1 mean: 500 (ms) max: 500 (ms) last: 500 (ms)')
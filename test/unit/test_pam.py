@@ -14,6 +14,7 @@ from unittest import TestCase
 from mock import patch
 
 from gofer import pam
+from gofer.pam import Cache
 
 
 class Test(TestCase):
@@ -77,3 +78,62 @@ class Test(TestCase):
         self.assertTrue(_authenticate.called)
         self.assertFalse(_end.called)
         self.assertFalse(valid)
+
+
+class TestCache(TestCase):
+
+    def test_disabled(self):
+        cache = Cache()
+        cache.add('user', 'password', 'login')
+        self.assertEqual(cache.entries, {})
+        self.assertFalse(cache.valid('user', 'password', 'login'))
+
+    @patch('gofer.pam.time')
+    def test_valid(self, _time):
+        _time.return_value = 100
+        cache = Cache(ttl=10)
+        cache.add('user', 'password', 'login')
+        self.assertTrue(cache.valid('user', 'password', 'login'))
+        self.assertTrue(cache.valid('user', u'password', 'login'))
+        self.assertFalse(cache.valid('user', 'xx', 'login'))
+        self.assertFalse(cache.valid('user', 'password', 'passwd'))
+        self.assertFalse(cache.valid('other', 'password', 'login'))
+        self.assertFalse('password' in repr(cache.entries))
+        _time.return_value = 110
+        self.assertFalse(cache.valid('user', 'password', 'login'))
+        self.assertEqual(cache.entries, {})
+
+    @patch('gofer.pam.time')
+    def test_size(self, _time):
+        cache = Cache(ttl=10, size=2)
+        for n, user in enumerate(('a', 'b', 'c')):
+            _time.return_value = 100 + n
+            cache.add(user, 'password', 'login')
+        self.assertEqual(len(cache.entries), 2)
+        self.assertFalse(cache.valid('a', 'password', 'login'))
+        self.assertTrue(cache.valid('b', 'password', 'login'))
+        self.assertTrue(cache.valid('c', 'password', 'login'))
+
+    def test_invalidate(self):
+        cache = Cache(ttl=10)
+        cache.add('a', 'password', 'login')
+        cache.add('b', 'password', 'login')
+        cache.invalidate('a')
+        self.assertFalse(cache.valid('a', 'password', 'login'))
+        self.assertTrue(cache.valid('b', 'password', 'login'))
+        cache.invalidate()
+        self.assertEqual(cache.entries, {})
+
+    @patch('gofer.pam._authenticate')
+    @patch('gofer.pam.cache', Cache(ttl=10))
+    def test_authenticate(self, _authenticate):
+        _authenticate.return_value = False
+        self.assertFalse(pam.authenticate('user', 'password', 'login'))
+        self.assertEqual(pam.cache.entries, {})
+        _authenticate.return_value = True
+        self.assertTrue(pam.authenticate('user', 'password', 'login'))
+        self.assertTrue(pam.authenticate('user', 'password', 'login'))
+        self.assertEqual(_authenticate.call_count, 2)
+        pam.invalidate('user')
+        self.assertTrue(pam.authenticate('user', 'password', 'login'))
+        self.assertEqual(_authenticate.call_count, 3)